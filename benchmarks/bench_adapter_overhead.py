@@ -0,0 +1,247 @@
+"""Measure the overhead of the recording adapters against a local HTTP server.
+
+The server is a stdlib ``ThreadingHTTPServer`` speaking keep-alive HTTP/1.1
+in a separate process, so no Docker containers or network are needed. Each
+scenario sends ``--count`` GET requests through a bare ``HTTPAdapter`` or a
+``RecordingHTTPAdapter`` writing to one of the storage backends, from one
+thread and from ``--threads`` threads. Every thread uses its own session;
+the storage is shared.
+
+Per scenario the script reports requests per second, the mean, p50 and p99
+request latency and the mean latency added compared to the bare adapter at
+the same thread count. ``--output`` writes the results together with the
+package, Python and platform versions as JSON, so runs can be compared
+across versions.
+
+With ``--playwright`` the ``SyncRequestHandler`` is measured as well by
+loading a page that fetches ``--count`` resources, if a Chromium browser is
+installed (``playwright install chromium``).
+
+Usage::
+
+    python benchmarks/bench_adapter_overhead.py --count 2000 --threads 8
+    python benchmarks/bench_adapter_overhead.py --output overhead.json --playwright
+"""
+
+import argparse
+import importlib.metadata
+import json
+import multiprocessing
+import platform
+import statistics
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from requests_stats.adapters.requests import RecordingHTTPAdapter
+from requests_stats.core.base_storage import Storage
+from requests_stats.storage.columnar_storage import ColumnarStorage
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+from requests_stats.storage.jsonl_storage import JSONLStorage
+from requests_stats.storage.queued_storage import QueuedStorage
+from requests_stats.storage.sqlite_storage import SQLiteStorage
+
+BODY = b'{"id": 1, "name": "doggie"}'
+PAGE_SIZE = 100
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes, avoid delayed ACK stalls
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        if self.path.startswith("/page"):
+            count = int(self.path.rpartition("/")[2])
+            body = (
+                f"<script>Promise.all(Array.from({{length: {count}}}, (_, i) =>"
+                " fetch('/pet/' + i))).then(() => document.title = 'done')"
+                "</script>"
+            ).encode()
+            content_type = "text/html"
+        else:
+            body = BODY
+            content_type = "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def serve(ports: "multiprocessing.Queue[int]") -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def storages(directory: Path) -> dict[str, Callable[[], Storage]]:
+    files = iter(range(1_000))
+
+    def path(suffix: str) -> str:
+        return str(directory / f"bench-{next(files)}{suffix}")
+
+    return {
+        "in-memory": InMemoryStorage,
+        "sqlite": lambda: SQLiteStorage(path(".db")),
+        "sqlite batched": lambda: SQLiteStorage(path(".db"), batch_size=500),
+        "sqlite queued": lambda: QueuedStorage(SQLiteStorage(path(".db"))),
+        "jsonl": lambda: JSONLStorage(path(".jsonl")),
+        "columnar": ColumnarStorage,
+    }
+
+
+def measure(
+    url: str, count: int, threads: int, storage: Storage | None
+) -> dict[str, float]:
+    latencies: list[float] = []
+    lock = threading.Lock()
+    per_thread = count // threads
+
+    def worker() -> None:
+        adapter = HTTPAdapter() if storage is None else RecordingHTTPAdapter(storage)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.get(f"{url}/pet/0")  # open the connection before measuring
+        measured = []
+        barrier.wait()
+        for index in range(per_thread):
+            start = time.perf_counter()
+            session.get(f"{url}/pet/{index}")
+            measured.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(measured)
+        session.close()
+
+    barrier = threading.Barrier(threads + 1)
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    if storage is not None:
+        storage.persist()
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed)
+
+
+def measure_playwright(url: str, count: int) -> list[dict[str, Any]]:
+    try:
+        from playwright.sync_api import Error, sync_playwright
+
+        from requests_stats.adapters.playwright import SyncRequestHandler
+    except ImportError:
+        print("playwright is not installed, skipping")
+        return []
+    results = []
+    with sync_playwright() as playwright:
+        try:
+            browser = playwright.chromium.launch()
+        except Error as exc:
+            message = str(exc).splitlines()[0]
+            print(f"cannot launch chromium, skipping playwright: {message}")
+            return []
+        for name, storage in (("bare", None), ("in-memory", InMemoryStorage())):
+            page = browser.new_page()
+            if storage is not None:
+                SyncRequestHandler(storage).register_on(page)
+            page.goto(f"{url}/page/1")  # warm up
+            start = time.perf_counter()
+            for _ in range(max(count // PAGE_SIZE, 1)):
+                page.goto(f"{url}/page/{PAGE_SIZE}")
+                page.wait_for_function("document.title === 'done'")
+            elapsed = time.perf_counter() - start
+            page.close()
+            requests_sent = max(count // PAGE_SIZE, 1) * (PAGE_SIZE + 1)
+            results.append(
+                {
+                    "adapter": "playwright",
+                    "storage": name,
+                    "threads": 1,
+                    "requests_per_second": requests_sent / elapsed,
+                }
+            )
+        browser.close()
+    return results
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "requests_per_second": len(ordered) / elapsed,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p99_ms": ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=2_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--playwright", action="store_true")
+    args = parser.parse_args()
+
+    ports: multiprocessing.Queue[int] = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(ports,), daemon=True)
+    server.start()
+    url = f"http://127.0.0.1:{ports.get(timeout=10)}"
+    results: list[dict[str, Any]] = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for threads in sorted({1, args.threads}):
+                bare = measure(url, args.count, threads, None)
+                results.append(
+                    {"adapter": "requests", "storage": "bare", "threads": threads}
+                    | bare
+                    | {"added_ms": 0.0}
+                )
+                for name, factory in storages(Path(tmp)).items():
+                    stats = measure(url, args.count, threads, factory())
+                    results.append(
+                        {"adapter": "requests", "storage": name, "threads": threads}
+                        | stats
+                        | {"added_ms": stats["mean_ms"] - bare["mean_ms"]}
+                    )
+        if args.playwright:
+            results.extend(measure_playwright(url, args.count))
+    finally:
+        server.terminate()
+
+    for result in results:
+        line = (
+            f"{result['adapter']:<10} {result['storage']:<15} "
+            f"{result['threads']:>2} threads {result['requests_per_second']:>9,.0f} req/s"
+        )
+        if "mean_ms" in result:
+            line += (
+                f"  mean {result['mean_ms']:6.3f} ms  p99 {result['p99_ms']:6.3f} ms"
+                f"  added {result['added_ms']:+6.3f} ms"
+            )
+        print(line)
+    if args.output:
+        report = {
+            "version": importlib.metadata.version("requests-stats"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "count": args.count,
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
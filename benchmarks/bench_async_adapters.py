@@ -0,0 +1,179 @@
+"""Measure the async adapters under concurrency against a local aiohttp server.
+
+Each scenario sends ``--count`` requests with ``--concurrency`` requests in
+flight and reports the throughput and the worst event loop stall observed by
+a 1 ms ticker task. The server runs in a separate process. Writing to SQLite directly from the loop stalls it on
+every commit; ``AsyncQueuedStorage`` moves those writes to a worker thread.
+
+Usage::
+
+    python benchmarks/bench_async_adapters.py --count 5000 --concurrency 50
+    python benchmarks/bench_async_adapters.py --batch-size 500
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import aiohttp
+import httpx
+from aiohttp import web
+
+from requests_stats.adapters.aiohttp import RecordingTraceConfig
+from requests_stats.adapters.httpx import RecordingAsyncTransport
+from requests_stats.core.base_storage import Storage
+from requests_stats.storage.async_queued_storage import AsyncQueuedStorage
+from requests_stats.storage.sqlite_storage import SQLiteStorage
+
+Send = Callable[[str], Awaitable[None]]
+
+
+def serve(ports: "multiprocessing.Queue[int]") -> None:
+    async def handle(request: web.Request) -> web.Response:
+        return web.json_response({"id": request.match_info["id"]})
+
+    async def start() -> None:
+        app = web.Application()
+        app.router.add_get("/pet/{id}", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        ports.put(runner.addresses[0][1])
+        await asyncio.Event().wait()
+
+    asyncio.run(start())
+
+
+async def ticker(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def run(send: Send, base_url: str, count: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            await send(f"{base_url}/pet/{index}")
+
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return count
+
+
+async def measure_httpx(
+    base_url: str, count: int, concurrency: int, storage: Storage | None
+) -> tuple[float, float]:
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        )
+    )
+    if storage is not None:
+        transport = RecordingAsyncTransport(storage, transport)
+    async with httpx.AsyncClient(transport=transport) as client:
+
+        async def send(url: str) -> None:
+            await client.get(url)
+
+        return await timed(send, base_url, count, concurrency, storage)
+
+
+async def measure_aiohttp(
+    base_url: str, count: int, concurrency: int, storage: Storage | None
+) -> tuple[float, float]:
+    trace_configs: list[aiohttp.TraceConfig] = []
+    if storage is not None:
+        trace_configs.append(RecordingTraceConfig(storage))
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(
+        connector=connector, trace_configs=trace_configs
+    ) as session:
+
+        async def send(url: str) -> None:
+            async with session.get(url) as response:
+                await response.read()
+
+        return await timed(send, base_url, count, concurrency, storage)
+
+
+async def timed(
+    send: Send, base_url: str, count: int, concurrency: int, storage: Storage | None
+) -> tuple[float, float]:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    start = time.perf_counter()
+    await run(send, base_url, count, concurrency)
+    if isinstance(storage, AsyncQueuedStorage):
+        await storage.aclose()
+    elif storage is not None:
+        storage.persist()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    return count / elapsed, max(lags, default=0.0)
+
+
+async def main_async(
+    base_url: str, count: int, concurrency: int, batch_size: int, directory: Path
+) -> None:
+    databases = iter(range(1_000))
+
+    def sqlite() -> SQLiteStorage:
+        return SQLiteStorage(
+            str(directory / f"bench-{next(databases)}.db"), batch_size=batch_size
+        )
+
+    scenarios: dict[str, Callable[[], Awaitable[tuple[float, float]]]] = {
+        "httpx bare": lambda: measure_httpx(base_url, count, concurrency, None),
+        "httpx + SQLite on the loop": lambda: measure_httpx(
+            base_url, count, concurrency, sqlite()
+        ),
+        "httpx + AsyncQueuedStorage": lambda: measure_httpx(
+            base_url, count, concurrency, AsyncQueuedStorage(sqlite())
+        ),
+        "aiohttp bare": lambda: measure_aiohttp(base_url, count, concurrency, None),
+        "aiohttp + SQLite on the loop": lambda: measure_aiohttp(
+            base_url, count, concurrency, sqlite()
+        ),
+        "aiohttp + AsyncQueuedStorage": lambda: measure_aiohttp(
+            base_url, count, concurrency, AsyncQueuedStorage(sqlite())
+        ),
+    }
+    for name, scenario in scenarios.items():
+        rate, lag = await scenario()
+        print(f"{name:<30} {rate:>8,.0f} req/s  max loop stall {lag * 1000:>7.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=1)
+    args = parser.parse_args()
+
+    # the server runs in its own process so it doesn't compete for the loop
+    ports: multiprocessing.Queue[int] = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(ports,), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{ports.get(timeout=10)}"
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(
+                main_async(
+                    base_url, args.count, args.concurrency, args.batch_size, Path(tmp)
+                )
+            )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Measure rendering the HTML coverage report for a large specification.
+
+The specification index is generated (``--operations`` operations spread
+over ``--tags`` tags, each with three responses, half of them covered), so
+no OpenAPI parsing is involved. ``render()`` builds the page as one string,
+``create()`` streams it into a file; both report their time and the peak
+memory allocated while rendering.
+
+Usage::
+
+    python benchmarks/bench_html_report.py --operations 5000 --tags 50
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from requests_stats.core.coverage import Coverage, CoverageResult
+from requests_stats.core.spec_index import OperationInfo, ResponseInfo, SpecIndex
+from requests_stats.reporters.coverage.html_reporter import HtmlReporter
+
+METHODS = ("GET", "POST", "PUT", "DELETE")
+
+
+def make_coverage(directory: Path, operations: int, tags: int) -> Coverage:
+    rng = random.Random(1)
+    infos = tuple(
+        OperationInfo(
+            method=METHODS[index % len(METHODS)],
+            path=f"/resource{index // len(METHODS)}/{{id}}",
+            summary=f"Operation {index}",
+            tags=(f"tag{rng.randrange(tags)}",),
+            responses=(
+                ResponseInfo(200, "ok"),
+                ResponseInfo(404, "not found"),
+                ResponseInfo(500, "error"),
+            ),
+        )
+        for index in range(operations)
+    )
+    index = SpecIndex(
+        paths=tuple(sorted({info.path for info in infos})),
+        server_base_paths=(),
+        operations=infos,
+    )
+    spec_file = directory / "spec.json"
+    spec_file.write_text("{}")  # only hashed, the index is passed in
+    coverage = Coverage(str(spec_file), spec_index=index)
+    result = CoverageResult(coverage.spec_hash)
+    for info in infos:
+        for response in info.responses:
+            if rng.random() < 0.5:
+                result.recorded.add((info.method, info.path, response.code))
+    coverage.merge(result)
+    return coverage
+
+
+def measure(action: Callable[[], object]) -> tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--operations", type=int, default=5_000)
+    parser.add_argument("--tags", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        coverage = make_coverage(directory, args.operations, args.tags)
+        HtmlReporter(coverage).render()  # compile the template once
+        output = directory / "report.html"
+        results = {
+            "render() to string": measure(lambda: HtmlReporter(coverage).render()),
+            "create() streamed to file": measure(
+                lambda: HtmlReporter(coverage).create(output)
+            ),
+        }
+        size = output.stat().st_size
+    print(f"{args.operations:,} operations, report size {size / 2**20:.1f} MiB")
+    for name, (elapsed, peak) in results.items():
+        print(f"{name:<28} {elapsed:8.3f} s  peak {peak / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Measure the memory used per recording by the in-memory storage backends.
+
+Every recording is built from freshly created strings, like the adapters do
+when they parse a request URL.
+
+Usage::
+
+    python benchmarks/bench_memory.py --count 200000
+"""
+
+import argparse
+import random
+import tracemalloc
+from collections.abc import Callable
+
+from requests_stats.core.base_storage import Storage
+from requests_stats.core.recording import Recording
+from requests_stats.storage.columnar_storage import ColumnarStorage
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+
+
+def make_recording(rng: random.Random) -> Recording:
+    url = f"https://petstore.example.com/api/v3/pet/{rng.randrange(10_000)}"
+    scheme, _, rest = url.partition("://")
+    netloc, _, path = rest.partition("/")
+    return Recording(
+        method="".join(("G", "E", "T")),
+        scheme=scheme,
+        netloc=netloc,
+        path="/" + path,
+        params="",
+        query="",
+        response_code=rng.choice((200, 404)),
+        duration=rng.random(),
+    )
+
+
+def measure(factory: Callable[[], Storage], count: int) -> float:
+    rng = random.Random(3)
+    tracemalloc.start()
+    storage = factory()
+    for _ in range(count):
+        storage.store(make_recording(rng))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=200_000)
+    args = parser.parse_args()
+
+    backends: dict[str, Callable[[], Storage]] = {
+        "InMemoryStorage": InMemoryStorage,
+        "ColumnarStorage": ColumnarStorage,
+    }
+    for name, factory in backends.items():
+        per_recording = measure(factory, args.count)
+        print(f"{name:<20} {per_recording:>8.1f} bytes/recording")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Compare the PathRouter trie with the previous per-template regex scan.
+
+A synthetic spec with ``--resources`` * 5 paths is written to a temporary
+file and parsed by ``Coverage``; the recorded paths are drawn at random from
+the concrete paths matching those templates.
+
+Usage::
+
+    python benchmarks/bench_path_router.py --resources 250 --requests 2000000
+"""
+
+import argparse
+import json
+import random
+import re
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from requests_stats.core.coverage import Coverage
+
+
+def build_spec(resources: int) -> dict[str, object]:
+    paths: dict[str, object] = {}
+    for index in range(resources):
+        base = f"/resource{index}"
+        for template in (
+            base,
+            f"{base}/{{id}}",
+            f"{base}/findByStatus",
+            f"{base}/{{id}}/items",
+            f"{base}/{{id}}/items/{{itemId}}",
+        ):
+            parameters = [
+                {
+                    "name": name,
+                    "in": "path",
+                    "required": True,
+                    "schema": {"type": "string"},
+                }
+                for name in re.findall(r"\{([^}]+)\}", template)
+            ]
+            paths[template] = {
+                "get": {
+                    "parameters": parameters,
+                    "responses": {"200": {"description": "ok"}},
+                }
+            }
+    return {
+        "openapi": "3.0.0",
+        "info": {"title": "Synthetic", "version": "1.0.0"},
+        "paths": paths,
+    }
+
+
+def build_requests(resources: int, count: int) -> list[str]:
+    rng = random.Random(42)
+    shapes = (
+        "/resource{r}",
+        "/resource{r}/{i}",
+        "/resource{r}/findByStatus",
+        "/resource{r}/{i}/items",
+        "/resource{r}/{i}/items/{j}",
+        "/unknown/{i}",
+    )
+    return [
+        rng.choice(shapes).format(
+            r=rng.randrange(resources), i=rng.randrange(10_000), j=rng.randrange(100)
+        )
+        for _ in range(count)
+    ]
+
+
+def regex_scan(coverage: Coverage) -> list[tuple[re.Pattern[str], str]]:
+    # the matching strategy used before the trie was introduced
+    templates = []
+    for url in coverage.spec_index.paths:
+        pattern = "^" + re.sub(r"\{[^/]+\}", "[^/]+", url) + "$"
+        templates.append((re.compile(pattern), url))
+    return templates
+
+
+def measure(label: str, paths: list[str], match: Callable[[str], str]) -> float:
+    start = time.perf_counter()
+    for path in paths:
+        match(path)
+    elapsed = time.perf_counter() - start
+    per_lookup = elapsed / len(paths) * 1e9
+    print(
+        f"{label:<12} {len(paths):>10,} paths {elapsed:>8.2f}s {per_lookup:>10,.0f} ns/path"
+    )
+    return per_lookup
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resources", type=int, default=250)
+    parser.add_argument("--requests", type=int, default=2_000_000)
+    parser.add_argument(
+        "--baseline-requests",
+        type=int,
+        default=20_000,
+        help="the regex scan is O(paths) per lookup, so it runs on a sample",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        spec_file = Path(tmp) / "spec.json"
+        spec_file.write_text(json.dumps(build_spec(args.resources)))
+        coverage = Coverage(openapi_file_path=str(spec_file))
+    print(f"spec paths: {len(coverage.spec_index.paths):,}")
+
+    paths = build_requests(args.resources, args.requests)
+    templates = regex_scan(coverage)
+
+    def scan(path: str) -> str:
+        for pattern, template in templates:
+            if pattern.match(path):
+                return template
+        return path
+
+    trie = measure("trie", paths, coverage.normalizer._apply_template)
+    regex = measure("regex scan", paths[: args.baseline_requests], scan)
+    print(f"speedup: {regex / trie:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
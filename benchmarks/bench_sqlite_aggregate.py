@@ -0,0 +1,133 @@
+"""Compare coverage/latency on aggregates pushed down into SQLite with row iteration.
+
+A recording with ``--rows`` rows over a few thousand distinct paths is
+generated once (and reused if it already exists).
+
+Usage::
+
+    python benchmarks/bench_sqlite_aggregate.py --rows 10000000 --db /tmp/big.db
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+from requests_stats.core.base_storage import Storage
+from requests_stats.core.coverage import Coverage
+from requests_stats.core.latency import Latency
+from requests_stats.core.recording import Recording
+from requests_stats.storage.sqlite_storage import SQLiteStorage
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Petstore", "version": "1.0.0"},
+    "servers": [{"url": "http://localhost/api/v3"}],
+    "paths": {
+        "/pet/{petId}": {
+            "get": {
+                "parameters": [
+                    {
+                        "name": "petId",
+                        "in": "path",
+                        "required": True,
+                        "schema": {"type": "integer"},
+                    }
+                ],
+                "responses": {"200": {"description": "ok"}},
+            }
+        },
+        "/store/inventory": {"get": {"responses": {"200": {"description": "ok"}}}},
+    },
+}
+
+
+class RowStorage(Storage):
+    """Hide the aggregation support of the wrapped storage."""
+
+    def __init__(self, storage: Storage) -> None:
+        self.storage = storage
+
+    def store(self, recording: Recording) -> None:
+        self.storage.store(recording)
+
+    def load(self) -> list[Recording]:
+        return self.storage.load()
+
+    def iter_load(self, batch_size: int = 1000) -> Iterator[Recording]:
+        return self.storage.iter_load(batch_size)
+
+    def iter_since(
+        self, checkpoint: int = 0, batch_size: int = 1000
+    ) -> Iterator[tuple[int, Recording]]:
+        return self.storage.iter_since(checkpoint, batch_size)
+
+
+def populate(db: Path, rows: int) -> None:
+    rng = random.Random(7)
+    storage = SQLiteStorage(filepath=str(db), batch_size=50_000)
+    for _ in range(rows):
+        path = rng.choice(
+            (f"/api/v3/pet/{rng.randrange(5000)}", "/api/v3/store/inventory")
+        )
+        storage.store(
+            Recording(
+                "GET",
+                "http",
+                "localhost",
+                path,
+                "",
+                "",
+                rng.choice((200, 200, 200, 404)),
+                rng.lognormvariate(-4, 1),
+            )
+        )
+    storage.close()
+
+
+def timed(label: str, function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed:>8.2f}s")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", type=Path, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = args.db or Path(tmp) / "bench.db"
+        if not db.exists():
+            populate(db, args.rows)
+        spec_file = Path(tmp) / "spec.json"
+        spec_file.write_text(json.dumps(SPEC))
+
+        storage = SQLiteStorage(filepath=str(db))
+        # build the covering index outside of the measurement
+        timed("create index (once)", lambda: list(storage.aggregate()))
+        coverage = Coverage(openapi_file_path=str(spec_file))
+        latency = Latency(openapi_file_path=str(spec_file))
+        rows_coverage = timed(
+            "coverage, row iteration", lambda: coverage.load(RowStorage(storage))
+        )
+        aggregate_coverage = timed(
+            "coverage, aggregate", lambda: coverage.load(storage)
+        )
+        rows_latency = timed(
+            "latency, row iteration", lambda: latency.load(RowStorage(storage))
+        )
+        aggregate_latency = timed("latency, aggregate", lambda: latency.load(storage))
+        storage.close()
+    print(f"coverage speedup: {rows_coverage / aggregate_coverage:.1f}x")
+    print(f"latency speedup:  {rows_latency / aggregate_latency:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Compare the unversioned SQLite layout with the versioned schema.
+
+A recording with ``--rows`` rows is written in the unversioned layout (one
+untyped table of strings, as before schema version 1), measured, then
+migrated and vacuumed and measured again: file size, a full scan, the
+grouping queries of coverage and latency, and an incremental read of the
+last 1% of the rows.
+
+Usage::
+
+    python benchmarks/bench_sqlite_schema.py --rows 2000000
+"""
+
+import argparse
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from requests_stats.core.recording import Recording
+from requests_stats.storage.sqlite_schema import migrate
+from requests_stats.storage.sqlite_storage import SQLiteStorage
+
+LOG_BASE = 1.02
+
+# the queries of SQLiteStorage before the schema was versioned
+LEGACY_QUERIES = {
+    "scan": f"SELECT {', '.join(Recording._fields)} FROM requests",
+    "coverage aggregate": (
+        "SELECT method, path, response_code, COUNT(*), SUM(duration * weight),"
+        " MIN(duration), MAX(duration), MIN(rowid), MAX(rowid), SUM(weight)"
+        " FROM requests GROUP BY method, path, response_code ORDER BY MIN(rowid)"
+    ),
+    "latency aggregate": (
+        "SELECT method, path, response_code, COUNT(*), SUM(duration * weight),"
+        " MIN(duration), MAX(duration), MIN(rowid), MAX(rowid), SUM(weight)"
+        " FROM requests GROUP BY method, path, response_code,"
+        " CAST(ceil(ln(duration) / ln(?)) AS INTEGER) ORDER BY MIN(rowid)"
+    ),
+    "iter_since last 1%": (
+        f"SELECT rowid, {', '.join(Recording._fields)} FROM requests"
+        " WHERE rowid > ? ORDER BY rowid"
+    ),
+}
+
+
+def populate_legacy(db: Path, rows: int) -> None:
+    rng = random.Random(7)
+    connection = sqlite3.connect(db)
+    columns = ", ".join(
+        f"{name} DEFAULT 1.0" if name == "weight" else name
+        for name in Recording._fields
+    )
+    connection.execute(f"CREATE TABLE requests({columns})")
+    start = 1_760_000_000.0
+    batch = []
+    for index in range(rows):
+        path = rng.choice(
+            (f"/api/v3/pet/{rng.randrange(5000)}", "/api/v3/store/inventory")
+        )
+        batch.append(
+            Recording(
+                rng.choice(("GET", "GET", "POST")),
+                "https",
+                f"shard{rng.randrange(3)}.petstore.example.com",
+                path,
+                "",
+                "",
+                rng.choice((200, 200, 200, 404)),
+                rng.lognormvariate(-4, 1),
+                timestamp=start + index / 1000,
+            )
+        )
+        if len(batch) == 50_000:
+            connection.executemany(
+                f"INSERT INTO requests VALUES ({', '.join('?' for _ in Recording._fields)})",
+                batch,
+            )
+            batch = []
+    if batch:
+        connection.executemany(
+            f"INSERT INTO requests VALUES ({', '.join('?' for _ in Recording._fields)})",
+            batch,
+        )
+    connection.commit()
+    connection.close()
+
+
+def timed(function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def measure_legacy(db: Path, rows: int) -> dict[str, float]:
+    connection = sqlite3.connect(db)
+    connection.execute(
+        "CREATE INDEX requests_by_endpoint"
+        " ON requests(method, path, response_code, duration)"
+    )
+
+    def query(name: str, *parameters: float) -> Callable[[], object]:
+        # like SQLiteStorage, build recordings from the rows
+        return lambda: [
+            Recording(*row[-len(Recording._fields) :])
+            if name in ("scan", "iter_since last 1%")
+            else row
+            for row in connection.execute(LEGACY_QUERIES[name], parameters)
+        ]
+
+    results = {
+        "scan": timed(query("scan")),
+        "coverage aggregate": timed(query("coverage aggregate")),
+        "latency aggregate": timed(query("latency aggregate", LOG_BASE)),
+        "iter_since last 1%": timed(query("iter_since last 1%", rows * 0.99)),
+    }
+    connection.close()
+    return results
+
+
+def measure_versioned(db: Path, rows: int) -> dict[str, float]:
+    storage = SQLiteStorage(filepath=str(db))
+    list(storage.aggregate())  # create the index outside of the measurement
+    results = {
+        "scan": timed(lambda: sum(1 for _ in storage.iter_load(10_000))),
+        "coverage aggregate": timed(lambda: list(storage.aggregate())),
+        "latency aggregate": timed(
+            lambda: list(storage.aggregate(duration_log_base=LOG_BASE))
+        ),
+        "iter_since last 1%": timed(
+            lambda: list(storage.iter_since(int(rows * 0.99), 10_000))
+        ),
+    }
+    storage.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = Path(tmp) / "legacy.db"
+        populate_legacy(legacy, args.rows)
+        legacy_size = legacy.stat().st_size
+        versioned = Path(tmp) / "versioned.db"
+        shutil.copy(legacy, versioned)
+        legacy_times = measure_legacy(legacy, args.rows)
+
+        connection = sqlite3.connect(versioned)
+        migration = timed(lambda: migrate(connection))
+        connection.execute("VACUUM")
+        connection.close()
+        versioned_size = versioned.stat().st_size
+        versioned_times = measure_versioned(versioned, args.rows)
+
+    print(f"{args.rows:,} rows, migration took {migration:.2f}s")
+    print(f"{'':<22}{'unversioned':>14}{'version 1':>14}")
+    print(
+        f"{'file size (MiB)':<22}{legacy_size / 2**20:>14.1f}"
+        f"{versioned_size / 2**20:>14.1f}"
+    )
+    for name in LEGACY_QUERIES:
+        print(
+            f"{name + ' (s)':<22}{legacy_times[name]:>14.3f}"
+            f"{versioned_times[name]:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
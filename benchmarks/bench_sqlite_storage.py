@@ -0,0 +1,66 @@
+"""Compare SQLiteStorage insert throughput: per-row commit vs. batched WAL.
+
+Usage::
+
+    python benchmarks/bench_sqlite_storage.py --count 20000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from requests_stats.core.recording import Recording
+from requests_stats.storage.sqlite_storage import SQLiteStorage
+
+
+def make_recording(index: int) -> Recording:
+    return Recording(
+        method="GET",
+        scheme="https",
+        netloc="petstore.example.com",
+        path=f"/api/v3/pet/{index}",
+        params="",
+        query="",
+        response_code=200,
+        duration=0.012,
+    )
+
+
+def measure(
+    filepath: Path, count: int, batch_size: int, journal_mode: str | None
+) -> float:
+    storage = SQLiteStorage(
+        filepath=str(filepath), batch_size=batch_size, journal_mode=journal_mode
+    )
+    recordings = [make_recording(i) for i in range(count)]
+    start = time.perf_counter()
+    for recording in recordings:
+        storage.store(recording)
+    storage.close()
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    scenarios: dict[str, tuple[int, str | None]] = {
+        "per-row commit (rollback journal)": (1, None),
+        "per-row commit (WAL)": (1, "WAL"),
+        f"batched x{args.batch_size} (WAL)": (args.batch_size, "WAL"),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {
+            name: measure(Path(tmp) / f"bench-{i}.db", args.count, *settings)
+            for i, (name, settings) in enumerate(scenarios.items())
+        }
+    baseline = next(iter(results.values()))
+    for name, rate in results.items():
+        print(f"{name:<40} {rate:>12,.0f} inserts/s  {rate / baseline:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import time
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+import aiohttp
+
+from requests_stats.core.base_storage import Storage
+from requests_stats.core.recording import Recording
+from requests_stats.core.sampling import Sampler
+
+
+class RecordingTraceConfig(aiohttp.TraceConfig):
+    """aiohttp trace config that records every request of a session.
+
+    Pass it to ``aiohttp.ClientSession(trace_configs=[...])``. Redirect hops
+    are recorded as separate requests, like ``RecordingHTTPAdapter`` does.
+    Combine with ``AsyncQueuedStorage`` so storing never blocks the event
+    loop.
+    """
+
+    def __init__(self, storage: Storage, sampler: Sampler | None = None) -> None:
+        super().__init__()
+        self.storage = storage
+        self.sampler = sampler
+        self.on_request_start.append(self._record_start)
+        self.on_request_redirect.append(self._record)
+        self.on_request_end.append(self._record)
+
+    async def _record_start(
+        self,
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceRequestStartParams,
+    ) -> None:
+        context.requests_stats_timestamp = time.time()
+        context.requests_stats_start = time.perf_counter()
+
+    async def _record(
+        self,
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceRequestEndParams | aiohttp.TraceRequestRedirectParams,
+    ) -> None:
+        duration = time.perf_counter() - context.requests_stats_start
+        timestamp = context.requests_stats_timestamp
+        # the next redirect hop starts now
+        context.requests_stats_timestamp = time.time()
+        context.requests_stats_start = time.perf_counter()
+        parsed = urlparse(str(params.url))
+        recording = Recording(
+            method=params.method,
+            scheme=parsed.scheme,
+            netloc=parsed.netloc,
+            path=parsed.path,
+            params=parsed.params,
+            query=parsed.query,
+            response_code=params.response.status,
+            duration=duration,
+            timestamp=timestamp,
+        )
+        if self.sampler:
+            sampled = self.sampler.sample(recording)
+            if sampled is None:
+                return
+            recording = sampled
+        self.storage.store(recording)
@@ -0,0 +1,56 @@
+import time
+from urllib.parse import urlparse
+
+import httpx
+
+from requests_stats.core.base_storage import Storage
+from requests_stats.core.recording import Recording
+from requests_stats.core.sampling import Sampler
+
+
+class RecordingAsyncTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records every request passing through it.
+
+    Wraps another transport (``httpx.AsyncHTTPTransport`` by default); the
+    duration is measured until the response headers arrived, like
+    ``requests``' ``Response.elapsed``. Combine with ``AsyncQueuedStorage``
+    so storing never blocks the event loop.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        transport: httpx.AsyncBaseTransport | None = None,
+        sampler: Sampler | None = None,
+    ) -> None:
+        self.storage = storage
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        self.sampler = sampler
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        timestamp = time.time()
+        start = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        duration = time.perf_counter() - start
+        parsed = urlparse(str(request.url))
+        recording = Recording(
+            method=request.method,
+            scheme=parsed.scheme,
+            netloc=parsed.netloc,
+            path=parsed.path,
+            params=parsed.params,
+            query=parsed.query,
+            response_code=response.status_code,
+            duration=duration,
+            timestamp=timestamp,
+        )
+        if self.sampler:
+            sampled = self.sampler.sample(recording)
+            if sampled is None:
+                return response
+            recording = sampled
+        self.storage.store(recording)
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
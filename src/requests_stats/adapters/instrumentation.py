@@ -0,0 +1,249 @@
+import http.client
+import socket
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from typing import Any
+
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool, PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.response import BaseHTTPResponse, HTTPResponse
+
+from requests_stats.core.pool_metrics import PoolMetrics
+
+
+@dataclass(slots=True)
+class PhaseTimings:
+    """Where the time of a single request went, in seconds.
+
+    Filled in step by step while urllib3 handles the request:
+
+    - ``pool_wait``: taking a connection from the pool
+    - ``connection_reused``: whether that connection was already open
+    - ``connect``: the TCP connect of a new connection
+    - ``tls_handshake``: the TLS handshake of a new HTTPS connection
+    - ``ttfb``: from the request being sent to the response headers
+    - ``download``: from the response headers until the body was read
+      and the connection went back to the pool
+    - ``request_bytes``: request line, headers and body as sent
+    - ``response_bytes``: the body as read (before decompression)
+
+    ``on_finished`` is called once the connection is released.
+    """
+
+    pool_wait: float | None = None
+    connection_reused: bool | None = None
+    connect: float | None = None
+    tls_handshake: float | None = None
+    ttfb: float | None = None
+    download: float | None = None
+    request_bytes: int = 0
+    response_bytes: int | None = None
+    finished: bool = False
+    on_finished: Callable[["PhaseTimings"], None] | None = None
+    _request_sent: float | None = None
+    _headers_received: float | None = None
+
+    def fields(self) -> dict[str, Any]:
+        """The values as keyword arguments for ``Recording._replace``."""
+        return {
+            "pool_wait": self.pool_wait,
+            "connection_reused": self.connection_reused,
+            "connect": self.connect,
+            "tls_handshake": self.tls_handshake,
+            "ttfb": self.ttfb,
+            "download": self.download,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+        }
+
+    def _finish(self) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        if self._headers_received is not None:
+            self.download = time.perf_counter() - self._headers_received
+        if self.on_finished is not None:
+            self.on_finished(self)
+
+
+def phase_timings(response: BaseHTTPResponse) -> PhaseTimings | None:
+    """Return the timings of a response from an instrumented pool, if any."""
+    timings = getattr(response, "phase_timings", None)
+    return timings if isinstance(timings, PhaseTimings) else None
+
+
+class _CountingResponse(http.client.HTTPResponse):
+    # urllib3 counts the bytes read only after it released the connection
+    def __init__(
+        self, sock: socket.socket, timings: PhaseTimings, method: str | None = None
+    ) -> None:
+        super().__init__(sock, method=method)
+        self.timings = timings
+
+    def read(self, amt: int | None = None) -> bytes:
+        data = super().read(amt)
+        self._count(data)
+        return data
+
+    def read1(self, n: int = -1) -> bytes:
+        data = super().read1(n)
+        self._count(data)
+        return data
+
+    def _count(self, data: bytes) -> None:
+        self.timings.response_bytes = (self.timings.response_bytes or 0) + len(data)
+
+
+def _count_chunk(
+    handle_chunk: Callable[[int | None], bytes], timings: PhaseTimings, amt: int | None
+) -> bytes:
+    chunk = handle_chunk(amt)
+    timings.response_bytes = (timings.response_bytes or 0) + len(chunk)
+    return chunk
+
+
+class TimedHTTPConnection(HTTPConnection):
+    timings: PhaseTimings | None = None
+
+    def _new_conn(self) -> Any:
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        if self.timings is not None:
+            self.timings.connect = time.perf_counter() - start
+        return sock
+
+    def connect(self) -> None:
+        start = time.perf_counter()
+        super().connect()
+        self._connected(time.perf_counter() - start)
+
+    def _connected(self, elapsed: float) -> None:
+        pass
+
+    def request(self, *args: Any, **kwargs: Any) -> None:
+        super().request(*args, **kwargs)
+        if self.timings is not None:
+            self.timings._request_sent = time.perf_counter()
+
+    def send(self, data: Any) -> None:
+        if self.timings is not None and isinstance(
+            data, (bytes, bytearray, memoryview)
+        ):
+            self.timings.request_bytes += len(data)
+        super().send(data)
+
+    def response_class(  # type: ignore[override]
+        self, sock: socket.socket, method: str | None = None
+    ) -> http.client.HTTPResponse:
+        # called by http.client in place of its response class
+        if self.timings is None:
+            return http.client.HTTPResponse(sock, method=method)
+        return _CountingResponse(sock, self.timings, method=method)
+
+    def getresponse(self) -> HTTPResponse:  # type: ignore[override]
+        response = super().getresponse()
+        timings = self.timings
+        if timings is not None:
+            timings._headers_received = time.perf_counter()
+            if timings._request_sent is not None:
+                timings.ttfb = timings._headers_received - timings._request_sent
+            timings.response_bytes = timings.response_bytes or 0
+            response.phase_timings = timings  # type: ignore[attr-defined]
+            if response.chunked:
+                # urllib3 decodes chunked bodies itself, reading the chunks
+                # through _fp._safe_read and not through read()/read1()
+                response._handle_chunk = partial(  # type: ignore[method-assign]
+                    _count_chunk, response._handle_chunk, timings
+                )
+        return response
+
+
+class TimedHTTPSConnection(TimedHTTPConnection, HTTPSConnection):
+    def _connected(self, elapsed: float) -> None:
+        # connect() is the TCP connect followed by the handshake
+        if self.timings is not None and self.timings.connect is not None:
+            self.timings.tls_handshake = elapsed - self.timings.connect
+
+
+class _TimedPoolMixin:
+    metrics: PoolMetrics | None = None
+
+    def __init__(
+        self, *args: Any, metrics: PoolMetrics | None = None, **kwargs: Any
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        if metrics is not None:
+            self.metrics = metrics
+            self._metrics_key = f"{self.scheme}://{self.host}:{self.port}"  # type: ignore[attr-defined]
+            metrics.register(self._metrics_key, self, self.pool.maxsize, self.block)  # type: ignore[attr-defined]
+
+    def idle_connections(self) -> int:
+        """Open connections waiting in the pool."""
+        pool = self.pool  # type: ignore[attr-defined]
+        if pool is None:
+            return 0
+        return sum(1 for conn in list(pool.queue) if conn and conn.is_connected)
+
+    def _get_conn(self, timeout: float | None = None) -> Any:
+        # nothing to take without waiting or opening an extra connection
+        exhausted = self.pool is not None and self.pool.empty()  # type: ignore[attr-defined]
+        start = time.perf_counter()
+        conn = super()._get_conn(timeout)  # type: ignore[misc]
+        conn.timings = PhaseTimings(
+            pool_wait=time.perf_counter() - start,
+            connection_reused=conn.is_connected,
+        )
+        if self.metrics is not None:
+            self.metrics.acquired(
+                self._metrics_key,
+                conn.timings.pool_wait,
+                conn.is_connected,
+                exhausted,
+            )
+        return conn
+
+    def _put_conn(self, conn: Any) -> None:
+        timings = getattr(conn, "timings", None)
+        if timings is not None:
+            conn.timings = None
+            timings._finish()
+        # urllib3 closes the connection when the pool is already full
+        discarded = (
+            conn is not None and self.pool is not None and self.pool.full()  # type: ignore[attr-defined]
+        )
+        try:
+            super()._put_conn(conn)  # type: ignore[misc]
+        finally:
+            if self.metrics is not None:
+                self.metrics.released(self._metrics_key, discarded)
+
+
+class TimedHTTPConnectionPool(_TimedPoolMixin, HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(_TimedPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+POOL_CLASSES_BY_SCHEME: dict[str, type] = {
+    "http": TimedHTTPConnectionPool,
+    "https": TimedHTTPSConnectionPool,
+}
+
+
+def instrument(manager: PoolManager, metrics: PoolMetrics | None = None) -> PoolManager:
+    """Make ``manager`` create connection pools that capture ``PhaseTimings``.
+
+    With ``metrics``, the pools also report their usage to it.
+    """
+    if metrics is None:
+        manager.pool_classes_by_scheme = POOL_CLASSES_BY_SCHEME
+    else:
+        manager.pool_classes_by_scheme = {
+            scheme: partial(pool_class, metrics=metrics)  # type: ignore[misc]
+            for scheme, pool_class in POOL_CLASSES_BY_SCHEME.items()
+        }
+    return manager
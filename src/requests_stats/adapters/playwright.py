@@ -1,42 +1,140 @@
 import re
-from typing import cast
-from urllib.parse import urlparse, ParseResult
+from collections.abc import Iterable
+from urllib.parse import urlparse
+from playwright.async_api import Page as AsyncPage, Request as AsyncRequest
 from playwright.sync_api import Page as SyncPage, Request as SyncRequest
 
 from requests_stats.core.base_storage import Storage
 from requests_stats.core.recording import Recording
+from requests_stats.core.sampling import Sampler
 
 
-class SyncRequestHandler:
-    def __init__(self, storage: Storage, path_pattern: str | None = None) -> None:
+class _RequestFilter:
+    """Filters applied before any round trip to the browser.
+
+    A request is captured if its path matches ``path_pattern``, its
+    Playwright resource type (``"fetch"``, ``"xhr"``, ``"document"``,
+    ``"image"``, ...) is one of ``resource_types`` and its host is one of
+    ``hosts``. Filters that are not given accept everything.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        path_pattern: str | None = None,
+        sampler: Sampler | None = None,
+        resource_types: Iterable[str] | None = None,
+        hosts: Iterable[str] | None = None,
+    ) -> None:
         self.storage = storage
         self.path_pattern = re.compile(path_pattern) if path_pattern else None
+        self.sampler = sampler
+        self.resource_types = frozenset(resource_types) if resource_types else None
+        self.hosts = frozenset(hosts) if hosts else None
+
+    def _accepts(self, request: SyncRequest | AsyncRequest) -> bool:
+        # url and resource_type are known locally, unlike the response
+        if self.resource_types and request.resource_type not in self.resource_types:
+            return False
+        parsed = urlparse(request.url)
+        if self.hosts and parsed.hostname not in self.hosts:
+            return False
+        return not self.path_pattern or bool(self.path_pattern.match(parsed.path))
+
+    def _store(self, recording: Recording | None) -> None:
+        if recording and self.sampler:
+            recording = self.sampler.sample(recording)
+        if recording:
+            self.storage.store(recording)
+
+
+class SyncRequestHandler(_RequestFilter):
+    """Record the requests of a page driven by Playwright's sync API.
+
+    The status is taken from the response the browser already delivered
+    with the request, so recording doesn't add round trips to the browser.
+
+    With ``deferred``, the recordings are only collected while the page
+    loads and sampled and stored by ``process_pending()``, so the recorder
+    doesn't add storage writes to the page load. Collected recordings are
+    kept in memory until then: call ``process_pending()`` before the storage
+    is read or closed, e.g. at the end of every test. It doesn't need the
+    page any more, closing it first is fine.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        path_pattern: str | None = None,
+        sampler: Sampler | None = None,
+        resource_types: Iterable[str] | None = None,
+        hosts: Iterable[str] | None = None,
+        deferred: bool = False,
+    ) -> None:
+        super().__init__(storage, path_pattern, sampler, resource_types, hosts)
+        self.deferred = deferred
+        self._pending: list[Recording] = []
 
     def register_on(self, page: SyncPage) -> None:
         page.on("requestfinished", self._capture_request)
 
+    def process_pending(self) -> int:
+        """Store the recordings collected in deferred mode, returns their number."""
+        pending, self._pending = self._pending, []
+        for recording in pending:
+            self._store(recording)
+        return len(pending)
+
     def _capture_request(self, request: SyncRequest) -> None:
-        response = request.response()
+        if not self._accepts(request):
+            return
+        response = request.existing_response
         if not response:
-            return  # TODO: when would this happen?
-        parsed = cast(ParseResult, urlparse(request.url))
-        if self.path_pattern and not self.path_pattern.match(parsed.path):
             return
-        start = request.timing.get("requestStart")
-        end = request.timing.get("responseEnd")
-        if start is None or end is None:
-            duration_ms = 0
+        recording = _create_recording(request, response.status)
+        if self.deferred:
+            self._pending.append(recording)
         else:
-            duration_ms = end - start
-        self.storage.store(
-            Recording(
-                method=request.method,
-                scheme=parsed.scheme,
-                netloc=parsed.netloc,
-                path=parsed.path,
-                params=parsed.params,
-                query=parsed.query,
-                response_code=response.status,
-                duration=duration_ms / 1000,
-            )
-        )
+            self._store(recording)
+
+
+class AsyncRequestHandler(_RequestFilter):
+    """Record the requests of a page driven by Playwright's asyncio API.
+
+    The handler runs on the event loop, so pair it with ``AsyncQueuedStorage``
+    to keep storage I/O off the loop.
+    """
+
+    def register_on(self, page: AsyncPage) -> None:
+        page.on("requestfinished", self._capture_request)
+
+    async def _capture_request(self, request: AsyncRequest) -> None:
+        if not self._accepts(request):
+            return
+        response = await request.response()
+        if not response:
+            return
+        self._store(_create_recording(request, response.status))
+
+
+def _create_recording(request: SyncRequest | AsyncRequest, status: int) -> Recording:
+    parsed = urlparse(request.url)
+    start = request.timing.get("requestStart")
+    end = request.timing.get("responseEnd")
+    if start is None or end is None:
+        duration_ms = 0
+    else:
+        duration_ms = end - start
+    # startTime is in milliseconds since the epoch, the others relative to it
+    started = request.timing.get("startTime")
+    return Recording(
+        method=request.method,
+        scheme=parsed.scheme,
+        netloc=parsed.netloc,
+        path=parsed.path,
+        params=parsed.params,
+        query=parsed.query,
+        response_code=status,
+        duration=duration_ms / 1000,
+        timestamp=started / 1000 if started else None,
+    )
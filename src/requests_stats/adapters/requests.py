@@ -1,16 +1,38 @@
-from typing import Mapping, cast
+import time
+from typing import Any, Mapping, cast
 from urllib.parse import ParseResult, urlparse
 
 from requests import PreparedRequest, Response
 from requests.adapters import HTTPAdapter, Retry
 
+from requests_stats.adapters.instrumentation import (
+    PhaseTimings,
+    instrument,
+    phase_timings,
+)
 from requests_stats.core.base_storage import Storage
+from requests_stats.core.pool_metrics import PoolMetrics
 from requests_stats.core.recording import Recording
+from requests_stats.core.sampling import Sampler
 
 MISSING = "UNKNOWN"
 
 
 class RecordingHTTPAdapter(HTTPAdapter):
+    """Record every request sent through this adapter.
+
+    With ``phases``, the connection pools are instrumented (see
+    ``adapters.instrumentation``) and recordings carry the pool wait,
+    connection reuse, connect, TLS handshake, time to first byte, download
+    time and the request and response sizes. Such a recording is stored once
+    the response body has been read and the connection is released, so a
+    streamed response that is never consumed or closed is not recorded.
+    Requests through a proxy are recorded without phases.
+
+    With ``pool_metrics``, the pools report their connection usage per host
+    to it, see ``PoolMetrics``.
+    """
+
     def __init__(
         self,
         storage: Storage,
@@ -18,9 +40,16 @@ class RecordingHTTPAdapter(HTTPAdapter):
         pool_maxsize: int = 10,
         max_retries: Retry | int | None = 0,
         pool_block: bool = False,
+        sampler: Sampler | None = None,
+        phases: bool = False,
+        pool_metrics: PoolMetrics | None = None,
     ) -> None:
+        # init_poolmanager() is called by the base class constructor
+        self.phases = phases
+        self.pool_metrics = pool_metrics
         super().__init__(pool_connections, pool_maxsize, max_retries, pool_block)
         self.storage = storage
+        self.sampler = sampler
 
     def send(
         self,
@@ -32,6 +61,7 @@ class RecordingHTTPAdapter(HTTPAdapter):
         proxies: Mapping[str, str] | None = None,
     ) -> Response:
         parsed = cast(ParseResult, urlparse(request.url))
+        timestamp = time.time()
         response = super().send(request, stream, timeout, verify, cert, proxies)
         recording = Recording(
             method=request.method or MISSING,
@@ -42,6 +72,29 @@ class RecordingHTTPAdapter(HTTPAdapter):
             query=parsed.query,
             response_code=response.status_code,
             duration=response.elapsed.total_seconds(),
+            timestamp=timestamp,
         )
-        self.storage.store(recording)
+        if self.sampler:
+            sampled = self.sampler.sample(recording)
+            if sampled is None:
+                return response
+            recording = sampled
+        timings = phase_timings(response.raw) if self.phases else None
+        if timings is None:
+            self.storage.store(recording)
+        elif timings.finished:
+            self.storage.store(recording._replace(**timings.fields()))
+        else:
+
+            def store(timings: PhaseTimings) -> None:
+                self.storage.store(recording._replace(**timings.fields()))
+
+            timings.on_finished = store
         return response
+
+    def init_poolmanager(
+        self, connections: int, maxsize: int, block: bool = False, **pool_kwargs: Any
+    ) -> None:
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        if self.phases or self.pool_metrics is not None:
+            instrument(self.poolmanager, self.pool_metrics)
@@ -1,33 +1,579 @@
+import cProfile
+import glob
+import json
+import sqlite3
+import sys
+import time
+from functools import partial
 from pathlib import Path
 
 import typer
 
+from requests_stats.core.base_storage import Storage
+from requests_stats.storage.jsonl_storage import JSONLStorage
+from requests_stats.storage.rollup_storage import RollupStorage
+from requests_stats.storage.sharded_storage import ShardedSQLiteStorage, merge_shards
+from requests_stats.storage.sqlite_schema import ENDPOINT_INDEX
+from requests_stats.storage.sqlite_schema import migrate as migrate_schema
 from requests_stats.storage.sqlite_storage import SQLiteStorage
 from requests_stats.core.coverage import Coverage
+from requests_stats.core import profiling
+from requests_stats.core.latency import Latency
+from requests_stats.core.multi_coverage import MultiCoverage
+from requests_stats.core.rollup import (
+    BUCKET_WIDTHS,
+    Rollup,
+    timeseries as fold_timeseries,
+)
+from requests_stats.core.spec_index import spec_digest
+from requests_stats.core.spec_cache import SpecCache
 from requests_stats.reporters.coverage.terminal_reporter import TerminalReporter
 from requests_stats.reporters.coverage.html_reporter import HtmlReporter
+from requests_stats.reporters.coverage.multi_terminal_reporter import (
+    MultiTerminalReporter,
+)
+from requests_stats.reporters.latency.html_reporter import (
+    HtmlReporter as LatencyHtmlReporter,
+)
+from requests_stats.reporters.latency.json_reporter import (
+    JsonReporter as LatencyJsonReporter,
+)
+from requests_stats.reporters.latency.terminal_reporter import (
+    TerminalReporter as LatencyTerminalReporter,
+)
+from requests_stats.reporters.profile.json_reporter import (
+    JsonReporter as ProfileJsonReporter,
+)
+from requests_stats.reporters.profile.terminal_reporter import (
+    TerminalReporter as ProfileTerminalReporter,
+)
+from requests_stats.reporters.timeseries.json_reporter import (
+    JsonReporter as TimeseriesJsonReporter,
+)
+from requests_stats.reporters.timeseries.terminal_reporter import (
+    TerminalReporter as TimeseriesTerminalReporter,
+)
 
 
 app = typer.Typer()
 
 
+@app.callback()
+def options(
+    ctx: typer.Context,
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Print the time, rows and memory of every pipeline stage to stderr.",
+    ),
+    profile_json: Path | None = typer.Option(
+        None, "--profile-json", help="Write the pipeline stages as JSON to this file."
+    ),
+    profile_memory: bool = typer.Option(
+        False,
+        "--profile-memory",
+        help="Trace the peak memory of every stage with tracemalloc (slow).",
+    ),
+    cprofile: Path | None = typer.Option(
+        None,
+        "--cprofile",
+        help="Dump cProfile statistics to this file, for pstats or snakeviz.",
+    ),
+) -> None:
+    if profile or profile_json or profile_memory:
+        profiler = profiling.Profiler(memory=profile_memory)
+        profiling.enable(profiler)
+        ctx.call_on_close(
+            partial(
+                _report_profile, profiler, profile or not profile_json, profile_json
+            )
+        )
+        if ctx.invoked_subcommand:
+            # the whole command, so commands without stages of their own
+            # are profiled as well; ends before the report above is written
+            ctx.with_resource(profiler.stage(ctx.invoked_subcommand))
+    if cprofile:
+        deep_profiler = cProfile.Profile()
+        deep_profiler.enable()
+        ctx.call_on_close(partial(_dump_cprofile, deep_profiler, cprofile))
+
+
 @app.command()
-def latency() -> None:
-    print("Response times statistics")
+def latency(
+    recordings: list[Path] = typer.Argument(
+        ..., help="Recordings to combine, glob patterns are expanded."
+    ),
+    spec: Path | None = typer.Option(
+        None,
+        "--spec",
+        "-s",
+        help="Group by the path templates of this OpenAPI specification instead of raw paths.",
+    ),
+    format: str = typer.Option("text", "--format", "-f"),
+    output: Path | None = typer.Option(None, "--output", "-o"),
+    spec_cache: bool = typer.Option(
+        True,
+        "--spec-cache/--no-spec-cache",
+        help="Cache the parsed OpenAPI specification between runs.",
+    ),
+    clear_spec_cache: bool = typer.Option(
+        False, "--clear-spec-cache", help="Remove all cached specifications first."
+    ),
+    spec_cache_dir: Path | None = typer.Option(None, "--spec-cache-dir"),
+    jobs: int | None = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="Processes for loading several recordings (default: number of CPUs).",
+    ),
+) -> None:
+    report_format = format.lower().strip()
+    if report_format not in ("text", "html", "json"):
+        raise typer.BadParameter(
+            "Format must be 'text', 'html' or 'json'.", param_hint="format"
+        )
+
+    latency = Latency(
+        openapi_file_path=str(spec) if spec else None,
+        spec_cache=_spec_cache(spec_cache, clear_spec_cache, spec_cache_dir),
+    )
+    latency.load_many(_expand_recordings(recordings), _open_storage, jobs)
+
+    if report_format == "text":
+        terminal_reporter = LatencyTerminalReporter(latency)
+        if output:
+            output.write_text(terminal_reporter.render(), encoding="utf-8")
+        else:
+            terminal_reporter.create()
+        return
+
+    if report_format == "json":
+        json_reporter = LatencyJsonReporter(latency)
+        if output:
+            json_reporter.create(output)
+        else:
+            print(json_reporter.render())
+        return
+
+    html_reporter = LatencyHtmlReporter(latency)
+    output_path = output or Path("latency.html")
+    html_reporter.create(output_path)
+    print(f"HTML latency report written to {output_path}")
 
 
 @app.command()
 def coverage(
-    recording: Path,
-    spec: Path,
+    recordings: list[Path] = typer.Argument(
+        ..., help="Recordings to combine, glob patterns are expanded."
+    ),
+    spec: Path = typer.Argument(...),
     format: str = typer.Option("text", "--format", "-f"),
     output: Path | None = typer.Option(None, "--output", "-o"),
+    incremental: bool = typer.Option(
+        False,
+        "--incremental",
+        help="Resume from the state saved by the previous run and only process new recordings.",
+    ),
+    state: Path | None = typer.Option(
+        None,
+        "--state",
+        help="State file for --incremental (default: <recording>.coverage-state.json).",
+    ),
+    watch: float | None = typer.Option(
+        None,
+        "--watch",
+        help="Keep running and refresh the report every WATCH seconds when new recordings arrive.",
+    ),
+    spec_cache: bool = typer.Option(
+        True,
+        "--spec-cache/--no-spec-cache",
+        help="Cache the parsed OpenAPI specification between runs.",
+    ),
+    clear_spec_cache: bool = typer.Option(
+        False, "--clear-spec-cache", help="Remove all cached specifications first."
+    ),
+    spec_cache_dir: Path | None = typer.Option(None, "--spec-cache-dir"),
+    jobs: int | None = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="Processes for loading several recordings (default: number of CPUs).",
+    ),
+) -> None:
+    report_format = format.lower().strip()
+    if report_format not in ("text", "html"):
+        raise typer.BadParameter(
+            "Format must be 'text' or 'html'.", param_hint="format"
+        )
+
+    coverage = Coverage(
+        openapi_file_path=str(spec),
+        spec_cache=_spec_cache(spec_cache, clear_spec_cache, spec_cache_dir),
+    )
+    expanded = _expand_recordings(recordings)
+    if len(expanded) > 1:
+        if incremental or watch:
+            raise typer.BadParameter(
+                "--incremental and --watch need a single recording.",
+                param_hint="recordings",
+            )
+        coverage.load_many(expanded, _open_storage, jobs)
+        _write_coverage_report(coverage, report_format, output)
+        return
+
+    [recording] = expanded
+    if incremental or watch:
+        _reject_shards(recording, "--incremental and --watch")
+    storage = _open_storage(recording)
+    state_path = state or recording.with_name(f"{recording.name}.coverage-state.json")
+    if incremental:
+        coverage.load_state(state_path)
+    coverage.update(storage)
+    if incremental:
+        coverage.save_state(state_path)
+    _write_coverage_report(coverage, report_format, output)
+
+    while watch:
+        time.sleep(watch)
+        if not coverage.update(storage):
+            continue
+        if incremental:
+            coverage.save_state(state_path)
+        _write_coverage_report(coverage, report_format, output)
+
+
+@app.command()
+def multi_coverage(
+    recordings: list[Path] = typer.Argument(
+        ..., help="Recordings to combine, glob patterns are expanded."
+    ),
+    services: list[str] = typer.Option(
+        ...,
+        "--service",
+        "-S",
+        help="HOST=SPEC, HOST/PREFIX=SPEC or BASE_URL=SPEC, once per service.",
+    ),
+    format: str = typer.Option("text", "--format", "-f"),
+    output: Path | None = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Report file, or directory for the HTML pages (default: coverage).",
+    ),
+    watch: float | None = typer.Option(
+        None,
+        "--watch",
+        help="Keep running and refresh the report every WATCH seconds when new recordings arrive.",
+    ),
+    spec_cache: bool = typer.Option(
+        True,
+        "--spec-cache/--no-spec-cache",
+        help="Cache the parsed OpenAPI specification between runs.",
+    ),
+    clear_spec_cache: bool = typer.Option(
+        False, "--clear-spec-cache", help="Remove all cached specifications first."
+    ),
+    spec_cache_dir: Path | None = typer.Option(None, "--spec-cache-dir"),
+    jobs: int | None = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="Processes for loading several recordings (default: number of CPUs).",
+    ),
+) -> None:
+    """Coverage of several services in one pass, routed by host."""
+    report_format = format.lower().strip()
+    if report_format not in ("text", "html"):
+        raise typer.BadParameter(
+            "Format must be 'text' or 'html'.", param_hint="format"
+        )
+    mapping: dict[str, str] = {}
+    for service in services:
+        target, separator, spec = service.partition("=")
+        if not separator or not target or not spec:
+            raise typer.BadParameter(
+                f"Expected HOST=SPEC, got {service!r}.", param_hint="--service"
+            )
+        mapping[target] = spec
+    try:
+        coverage = MultiCoverage(
+            mapping,
+            spec_cache=_spec_cache(spec_cache, clear_spec_cache, spec_cache_dir),
+        )
+    except ValueError as error:
+        raise typer.BadParameter(str(error), param_hint="--service") from error
+
+    expanded = _expand_recordings(recordings)
+    if len(expanded) > 1:
+        if watch:
+            raise typer.BadParameter(
+                "--watch needs a single recording.", param_hint="recordings"
+            )
+        coverage.load_many(expanded, _open_storage, jobs)
+        _write_multi_coverage_report(coverage, report_format, output)
+        return
+
+    [recording] = expanded
+    if watch:
+        _reject_shards(recording, "--watch")
+    storage = _open_storage(recording)
+    coverage.update(storage)
+    _write_multi_coverage_report(coverage, report_format, output)
+    while watch:
+        time.sleep(watch)
+        if coverage.update(storage):
+            _write_multi_coverage_report(coverage, report_format, output)
+
+
+@app.command()
+def merge(
+    sources: list[Path] = typer.Argument(
+        ..., help="Shard databases, or directories containing *.db shards."
+    ),
+    output: Path = typer.Option(..., "--output", "-o"),
+) -> None:
+    shards: list[Path] = []
+    for source in sources:
+        if source.is_dir():
+            shards.extend(ShardedSQLiteStorage(str(source)).shards())
+        else:
+            shards.append(source)
+    if output.resolve() in {shard.resolve() for shard in shards}:
+        raise typer.BadParameter(
+            "Output must not be one of the sources.", param_hint="output"
+        )
+    copied = merge_shards(shards, output)
+    print(f"Merged {copied} recordings from {len(shards)} shards into {output}")
+
+
+@app.command()
+def migrate(
+    databases: list[Path] = typer.Argument(..., help="SQLite recordings to upgrade."),
+) -> None:
+    """Upgrade the schema and create the index the reports group on."""
+    for database in _existing(databases):
+        connection = sqlite3.connect(database)
+        try:
+            before, after = migrate_schema(connection)
+            # reports open recordings read-only and leave the index to this
+            with connection:
+                connection.execute(ENDPOINT_INDEX)
+        except ValueError as error:
+            raise typer.BadParameter(str(error), param_hint="databases") from error
+        finally:
+            connection.close()
+        if before == after:
+            print(f"{database}: schema version {after}, nothing to do")
+        else:
+            print(f"{database}: migrated schema version {before} to {after}")
+
+
+@app.command()
+def vacuum(
+    databases: list[Path] = typer.Argument(..., help="SQLite recordings to compact."),
 ) -> None:
-    storage = SQLiteStorage(filepath=str(recording))
-    coverage = Coverage(openapi_file_path=str(spec))
-    coverage.load(storage)
+    for database in _existing(databases):
+        size = database.stat().st_size
+        connection = sqlite3.connect(database)
+        try:
+            # rebuild the file without free pages, refresh the planner statistics
+            connection.execute("VACUUM")
+            connection.execute("ANALYZE")
+        finally:
+            connection.close()
+        print(f"{database}: {size:,} -> {database.stat().st_size:,} bytes")
 
+
+@app.command()
+def compact(
+    databases: list[Path] = typer.Argument(..., help="SQLite recordings to compact."),
+    older_than: float = typer.Option(
+        ...,
+        "--older-than",
+        help="Fold recordings older than this many seconds into aggregates.",
+    ),
+    vacuum: bool = typer.Option(
+        True, "--vacuum/--no-vacuum", help="Shrink the file afterwards."
+    ),
+) -> None:
+    before = time.time() - older_than
+    for database in _existing(databases):
+        size = database.stat().st_size
+        storage = SQLiteStorage(filepath=str(database))
+        try:
+            compacted = storage.compact(before)
+            if vacuum:
+                storage.connection.execute("VACUUM")
+        finally:
+            storage.close()
+        print(
+            f"{database}: compacted {compacted} recordings,"
+            f" {size:,} -> {database.stat().st_size:,} bytes"
+        )
+
+
+@app.command()
+def rollup(
+    recording: Path = typer.Argument(...),
+    spec: Path | None = typer.Option(
+        None,
+        "--spec",
+        "-s",
+        help="Group by the path templates of this OpenAPI specification instead of raw paths.",
+    ),
+    output: Path | None = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="Rollup database (default: <recording>.rollups.db).",
+    ),
+    widths: list[int] = typer.Option(
+        list(BUCKET_WIDTHS), "--width", "-w", help="Bucket width in seconds."
+    ),
+    spec_cache: bool = typer.Option(
+        True,
+        "--spec-cache/--no-spec-cache",
+        help="Cache the parsed OpenAPI specification between runs.",
+    ),
+    spec_cache_dir: Path | None = typer.Option(None, "--spec-cache-dir"),
+) -> None:
+    _reject_shards(recording, "rollup")
+    output = output or recording.with_name(f"{recording.name}.rollups.db")
+    rollup = Rollup(
+        openapi_file_path=str(spec) if spec else None,
+        widths=widths,
+        spec_cache=_spec_cache(spec_cache, False, spec_cache_dir),
+    )
+    store = RollupStorage(str(output))
+    # buckets of another configuration can't be continued
+    meta = json.dumps(
+        {
+            "spec": spec_digest(str(spec)) if spec else None,
+            "widths": rollup.widths,
+            "relative_accuracy": rollup.relative_accuracy,
+        }
+    )
+    if store.meta != meta:
+        store.reset(meta)
+    rollup.checkpoint = store.checkpoint
+    processed = rollup.update(_open_storage(recording))
+    written = store.save(rollup)
+    store.close()
+    skipped = f", {rollup.skipped} without timestamp skipped" if rollup.skipped else ""
+    print(
+        f"Rolled up {processed} recordings into {written} buckets in {output}{skipped}"
+    )
+
+
+@app.command()
+def timeseries(
+    rollups: Path = typer.Argument(..., help="Rollup database written by 'rollup'."),
+    width: int | None = typer.Option(
+        None, "--width", "-w", help="Bucket width in seconds (default: smallest)."
+    ),
+    method: str | None = typer.Option(None, "--method", "-m"),
+    path: str | None = typer.Option(
+        None, "--path", "-p", help="Path template (or raw path without --spec)."
+    ),
+    format: str = typer.Option("text", "--format", "-f"),
+    output: Path | None = typer.Option(None, "--output", "-o"),
+) -> None:
     report_format = format.lower().strip()
+    if report_format not in ("text", "json"):
+        raise typer.BadParameter(
+            "Format must be 'text' or 'json'.", param_hint="format"
+        )
+    if not rollups.exists():
+        raise typer.BadParameter(f"{rollups} does not exist.", param_hint="rollups")
+    store = RollupStorage(str(rollups))
+    available = store.widths()
+    if width is None and available:
+        width = available[0]
+    if width is not None and available and width not in available:
+        raise typer.BadParameter(
+            f"No buckets of {width} s, available: {', '.join(map(str, available))}.",
+            param_hint="width",
+        )
+    points = (
+        fold_timeseries(store.read(width, method, path)) if width is not None else []
+    )
+    store.close()
+
+    if report_format == "text":
+        terminal_reporter = TimeseriesTerminalReporter(points)
+        if output:
+            output.write_text(terminal_reporter.render(), encoding="utf-8")
+        else:
+            terminal_reporter.create()
+        return
+
+    json_reporter = TimeseriesJsonReporter(points)
+    if output:
+        json_reporter.create(output)
+    else:
+        print(json_reporter.render())
+
+
+def _expand_recordings(recordings: list[Path]) -> list[Path]:
+    """Expand glob patterns the shell left alone, keeping the order."""
+    expanded: list[Path] = []
+    for recording in recordings:
+        if any(character in str(recording) for character in "*?["):
+            matches = sorted(glob.glob(str(recording)))
+            if not matches:
+                raise typer.BadParameter(
+                    f"No recordings match {recording}.", param_hint="recordings"
+                )
+            expanded.extend(Path(match) for match in matches)
+        else:
+            expanded.append(recording)
+    return expanded
+
+
+def _existing(paths: list[Path]) -> list[Path]:
+    for path in paths:
+        if not path.is_file():
+            raise typer.BadParameter(f"{path} does not exist.", param_hint="databases")
+    return paths
+
+
+def _reject_shards(recording: Path, feature: str) -> None:
+    # positions are per shard, a single checkpoint can't resume all of them
+    if recording.is_dir():
+        raise typer.BadParameter(
+            f"{feature} can't resume a shard directory, merge the shards first.",
+            param_hint="recordings",
+        )
+
+
+def _open_storage(recording: Path) -> Storage:
+    """Open a recording for reading, without changing it."""
+    if not recording.exists():
+        raise typer.BadParameter(
+            f"{recording} does not exist.", param_hint="recordings"
+        )
+    try:
+        if recording.is_dir():
+            shards = ShardedSQLiteStorage(directory=str(recording))
+            shards.check()
+            return shards
+        if recording.suffix == ".jsonl":
+            return JSONLStorage(filepath=str(recording))
+        return SQLiteStorage(filepath=str(recording), read_only=True)
+    except ValueError as error:
+        raise typer.BadParameter(str(error), param_hint="recordings") from error
+
+
+def _spec_cache(enabled: bool, clear: bool, directory: Path | None) -> SpecCache | None:
+    cache = SpecCache(directory)
+    if clear:
+        cache.clear()
+    return cache if enabled else None
+
+
+def _write_coverage_report(
+    coverage: Coverage, report_format: str, output: Path | None
+) -> None:
     if report_format == "text":
         terminal_reporter = TerminalReporter(coverage)
         if output:
@@ -37,14 +583,53 @@ def coverage(
             terminal_reporter.create()
         return
 
-    if report_format == "html":
-        html_reporter = HtmlReporter(coverage)
-        output_path = output or Path("coverage.html")
-        html_reporter.create(output_path)
-        print(f"HTML coverage report written to {output_path}")
+    html_reporter = HtmlReporter(coverage)
+    output_path = output or Path("coverage.html")
+    html_reporter.create(output_path)
+    print(f"HTML coverage report written to {output_path}")
+
+
+def _write_multi_coverage_report(
+    coverage: MultiCoverage, report_format: str, output: Path | None
+) -> None:
+    if report_format == "text":
+        terminal_reporter = MultiTerminalReporter(coverage)
+        if output:
+            output.write_text(terminal_reporter.render(), encoding="utf-8")
+        else:
+            terminal_reporter.create()
         return
 
-    raise typer.BadParameter("Format must be 'text' or 'html'.", param_hint="format")
+    # one page per specification
+    directory = output or Path("coverage")
+    directory.mkdir(parents=True, exist_ok=True)
+    names: set[str] = set()
+    for spec, service in coverage.coverages.items():
+        name = Path(spec).stem
+        while name in names:
+            name += "_"
+        names.add(name)
+        HtmlReporter(service).create(directory / f"{name}.html")
+    print(f"HTML coverage reports for {len(names)} services written to {directory}")
+
+
+def _report_profile(
+    profiler: profiling.Profiler, print_table: bool, output: Path | None
+) -> None:
+    profiling.disable()
+    if print_table:
+        ProfileTerminalReporter(profiler).create()
+    if output:
+        ProfileJsonReporter(profiler).create(output)
+
+
+def _dump_cprofile(deep_profiler: cProfile.Profile, output: Path) -> None:
+    deep_profiler.disable()
+    deep_profiler.dump_stats(output)
+    print(
+        f"cProfile statistics written to {output}, see python -m pstats",
+        file=sys.stderr,
+    )
 
 
 def main() -> None:
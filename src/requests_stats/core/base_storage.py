@@ -1,5 +1,6 @@
-from typing import Protocol
-from requests_stats.core.recording import Recording
+from collections.abc import Callable, Iterator, Mapping
+from typing import Protocol, runtime_checkable
+from requests_stats.core.recording import Recording, RecordingAggregate
 
 
 class Storage(Protocol):
@@ -13,6 +14,66 @@ class Storage(Protocol):
         """Store a single recording."""
         ...
 
+    def persist(self) -> None:
+        """Write buffered recordings to the backend.
+
+        Backends that write through immediately don't need to override this.
+        """
+        return None
+
     def load(self) -> list[Recording]:
         """Load the recordings from the storage"""
         ...
+
+    def iter_load(self, batch_size: int = 1000) -> Iterator[Recording]:
+        """Iterate over the recordings without materializing all of them.
+
+        ``batch_size`` is a hint for backends that fetch recordings in chunks.
+        The default implementation falls back to ``load()``.
+        """
+        return iter(self.load())
+
+    def iter_since(
+        self, checkpoint: int = 0, batch_size: int = 1000
+    ) -> Iterator[tuple[int, Recording]]:
+        """Iterate over the recordings stored after ``checkpoint``.
+
+        Every recording is yielded together with its position, a number that
+        grows with every stored recording (the SQLite rowid, or the offset for
+        other backends). Passing the last seen position as ``checkpoint``
+        resumes where the previous iteration stopped.
+        """
+        for position, recording in enumerate(self.iter_load(batch_size), start=1):
+            if position > checkpoint:
+                yield position, recording
+
+
+@runtime_checkable
+class AggregatingStorage(Storage, Protocol):
+    """A storage backend that can group recordings itself.
+
+    Analyses check for this interface and fall back to iterating over the
+    single recordings for backends that don't implement it.
+    """
+
+    def aggregate(
+        self,
+        checkpoint: int = 0,
+        duration_log_base: float | None = None,
+        path_map: Mapping[str, str] | Callable[[str], str] | None = None,
+        by_netloc: bool = False,
+    ) -> Iterator[RecordingAggregate]:
+        """Group the recordings stored after ``checkpoint``.
+
+        Groups are (method, path, response_code) and are yielded in order of
+        their first recording. With ``duration_log_base`` the groups are
+        additionally split into logarithmic duration buckets
+        ``(base**(k-1), base**k]``, so the aggregates can feed a histogram.
+        ``path_map`` replaces paths before grouping, e.g. to group by path
+        template; paths missing from the mapping are kept as they are. It
+        can also be a function, which is called once per distinct path.
+        Groups of compacted recordings carry a sketch of their durations
+        instead of being split into duration buckets. ``by_netloc`` splits
+        the groups by host as well, e.g. to tell services apart.
+        """
+        ...
@@ -1,11 +1,25 @@
-import re
-from dataclasses import dataclass
-from urllib.parse import urlparse
+import json
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from functools import cached_property, partial
+from pathlib import Path
+from typing import TypeVar
 
 import openapi_parser
+from openapi_parser.specification import Specification
 
+from requests_stats.core import profiling
+from requests_stats.core.normalization import PathNormalizer
+from requests_stats.core.parallel import process_map
+from requests_stats.core.spec_cache import SpecCache
+from requests_stats.core.spec_index import SpecIndex, spec_digest
 from requests_stats.core.recording import Recording
-from requests_stats.core.base_storage import Storage
+from requests_stats.core.base_storage import AggregatingStorage, Storage
+
+
+STATE_VERSION = 1
+
+T = TypeVar("T")
 
 
 @dataclass(frozen=True)
@@ -16,105 +30,226 @@ class NormalizedRecording:
     response_code: int
 
 
+@dataclass
+class CoverageResult:
+    """What was recorded, as plain data that can be pickled and merged.
+
+    ``recorded`` holds the (method, path template, response code) keys,
+    ``extra_paths`` the first original path of every key that is not part
+    of the specification.
+    """
+
+    spec_hash: str
+    recorded: set[tuple[str, str, int]] = field(default_factory=set)
+    extra_paths: dict[tuple[str, str, int], str] = field(default_factory=dict)
+
+    def merge(self, other: "CoverageResult") -> None:
+        if other.spec_hash != self.spec_hash:
+            raise ValueError("cannot merge coverage of different specifications")
+        self.recorded |= other.recorded
+        for key, original_path in other.extra_paths.items():
+            self.extra_paths.setdefault(key, original_path)
+
+
 class Coverage:
-    def __init__(self, openapi_file_path: str) -> None:
-        self.spec = openapi_parser.parse(openapi_file_path, strict_enum=False)
+    def __init__(
+        self,
+        openapi_file_path: str,
+        cache_size: int = 100_000,
+        spec_cache: SpecCache | None = None,
+        spec_index: SpecIndex | None = None,
+    ) -> None:
+        self.openapi_file_path = openapi_file_path
+        self.cache_size = cache_size
+        with profiling.stage("parse specification") as stage:
+            self.spec_hash = spec_digest(openapi_file_path)
+            if spec_index is None:
+                spec_index = (
+                    spec_cache.load(openapi_file_path, self.spec_hash)
+                    if spec_cache
+                    else SpecIndex.parse(openapi_file_path)
+                )
+            stage.add(len(spec_index.operations))
+        self.spec_index = spec_index
         self.covered: set[tuple[str, str, int]] = set()
         self.uncovered: set[tuple[str, str, int]] = set()
         self.extra: set[tuple[str, str, int]] = set()
         self.extra_details: list[tuple[str, str, str, int]] = []
-        self._path_templates = self._build_path_templates()
-        self._server_base_paths = self._build_server_base_paths()
+        self.checkpoint = 0
+        self.result = CoverageResult(self.spec_hash)
+        self._endpoints = self.spec_index.endpoints()
+        self.normalizer = PathNormalizer(
+            self.spec_index.paths,
+            self.spec_index.server_base_paths,
+            cache_size=cache_size,
+        )
+
+    @cached_property
+    def spec(self) -> Specification:
+        """The full parsed specification, only parsed when accessed."""
+        with profiling.stage("parse full specification"):
+            return openapi_parser.parse(self.openapi_file_path, strict_enum=False)
 
     def load(self, storage: Storage) -> None:
-        normalized_recordings = [
-            self._normalize_recording(rec) for rec in storage.load()
-        ]
-        recorded_requests = {
-            (rec.method, rec.normalized_path, rec.response_code)
-            for rec in normalized_recordings
-        }
-        all_endpoints = self._all_endpoints()
-        self.covered = recorded_requests & all_endpoints
-        self.uncovered = all_endpoints - recorded_requests
-        self.extra = recorded_requests - all_endpoints
-        extra_map: dict[tuple[str, str, int], NormalizedRecording] = {}
-        for rec in normalized_recordings:
-            key = (rec.method, rec.normalized_path, rec.response_code)
-            extra_map.setdefault(key, rec)
-        self.extra_details = [
-            (rec.method, rec.original_path, rec.normalized_path, rec.response_code)
-            for key, rec in extra_map.items()
-            if key in self.extra
-        ]
-
-    def _all_endpoints(self) -> set[tuple[str, str, int]]:
-        endpoints = set()
-        for path in self.spec.paths:
-            for operation in path.operations:
-                for response in operation.responses:
-                    if response.is_default or response.code is None:
-                        continue
-                    endpoints.add(
-                        (
-                            operation.method.name,
-                            path.url,
-                            int(response.code),
+        self.checkpoint = 0
+        self.result = CoverageResult(self.spec_hash)
+        self.update(storage)
+
+    def load_many(
+        self,
+        recordings: Sequence[T],
+        open_storage: Callable[[T], Storage],
+        jobs: int | None = None,
+    ) -> None:
+        """Load several recordings in parallel processes and merge them.
+
+        ``open_storage`` turns a recording into a storage inside the worker
+        process, it must be picklable (e.g. a module level function).
+        """
+        self.checkpoint = 0
+        self.result = CoverageResult(self.spec_hash)
+        collect = partial(
+            _collect_result,
+            self.openapi_file_path,
+            self.spec_index,
+            self.cache_size,
+            open_storage,
+        )
+        for result in profiling.iterate(
+            "parallel workers", process_map(collect, recordings, jobs)
+        ):
+            self.result.merge(result)
+        self.refresh()
+
+    def merge(self, result: CoverageResult) -> None:
+        """Fold in the result of another ``Coverage`` of the same specification."""
+        self.result.merge(result)
+        self.refresh()
+
+    def update(self, storage: Storage) -> int:
+        """Fold in the recordings stored since the last ``load``/``update``.
+
+        Returns the number of recordings that were processed.
+        """
+        processed = 0
+        # the time of the stage without reading is spent normalizing
+        with profiling.stage("coverage") as stage:
+            if isinstance(storage, AggregatingStorage):
+                # only the distinct (method, path, code) triples are needed
+                checkpoint = self.checkpoint
+                for aggregate in profiling.iterate(
+                    "read storage", storage.aggregate(checkpoint)
+                ):
+                    self._add(
+                        self._normalize(
+                            aggregate.method, aggregate.path, aggregate.response_code
                         )
                     )
-        return endpoints
+                    self.checkpoint = max(self.checkpoint, aggregate.last_position)
+                    processed += aggregate.request_count
+            else:
+                for position, recording in profiling.iterate(
+                    "read storage", storage.iter_since(self.checkpoint)
+                ):
+                    self._add(self._normalize_recording(recording))
+                    self.checkpoint = position
+                    processed += 1
+            stage.add(processed)
+        self.refresh()
+        return processed
+
+    def add(self, method: str | None, path: str | None, response_code: int) -> None:
+        """Fold in a single request, call ``refresh()`` when done adding."""
+        self._add(self._normalize(method, path, response_code))
+
+    def refresh(self) -> None:
+        """Recompute ``covered``, ``uncovered`` and ``extra`` from the result."""
+        with profiling.stage("set algebra"):
+            recorded = self.result.recorded
+            extra_paths = self.result.extra_paths.items()
+            self.covered = recorded & self._endpoints
+            self.uncovered = self._endpoints - recorded
+            self.extra = recorded - self._endpoints
+            self.extra_details = [
+                (method, original_path, normalized_path, code)
+                for (method, normalized_path, code), original_path in extra_paths
+            ]
+
+    def save_state(self, path: Path) -> None:
+        """Persist the checkpoint and the aggregated coverage state."""
+        state = {
+            "version": STATE_VERSION,
+            "spec_hash": self.spec_hash,
+            "checkpoint": self.checkpoint,
+            "recorded": sorted(self.result.recorded),
+            "extra_paths": [
+                [*key, original] for key, original in self.result.extra_paths.items()
+            ],
+        }
+        path.write_text(json.dumps(state), encoding="utf-8")
+
+    def load_state(self, path: Path) -> bool:
+        """Restore a state written by ``save_state``.
+
+        Returns False, leaving the coverage untouched, if there is no state
+        or it was computed for a different specification.
+        """
+        if not path.exists():
+            return False
+        state = json.loads(path.read_text(encoding="utf-8"))
+        if (
+            state.get("version") != STATE_VERSION
+            or state.get("spec_hash") != self.spec_hash
+        ):
+            return False
+        self.checkpoint = state["checkpoint"]
+        self.result = CoverageResult(
+            self.spec_hash,
+            recorded={
+                (method, template, code) for method, template, code in state["recorded"]
+            },
+            extra_paths={
+                (method, template, code): original
+                for method, template, code, original in state["extra_paths"]
+            },
+        )
+        self.refresh()
+        return True
+
+    def _add(self, rec: NormalizedRecording) -> None:
+        key = (rec.method, rec.normalized_path, rec.response_code)
+        if key in self.result.recorded:
+            return
+        self.result.recorded.add(key)
+        if key not in self._endpoints:
+            self.result.extra_paths[key] = rec.original_path
 
     def _normalize_recording(self, recording: Recording) -> NormalizedRecording:
         # TODO: check what is actually needed - maybe only path params?
-        method = (recording.method or "").upper()
-        original_path = recording.path or ""
-        path = original_path
-        if (
-            "://" in path
-        ):  # TODO: should be taken care of by adapter, check how to enforce this
-            parsed_url = urlparse(path)
-            path = parsed_url.path
-            if parsed_url.query:
-                path = f"{path}?{parsed_url.query}"
-        path = path.split("?", 1)[0]
-        path = self._strip_server_base_path(path)
-        path = self._apply_template(path)
+        return self._normalize(
+            recording.method, recording.path, recording.response_code
+        )
+
+    def _normalize(
+        self, method: str | None, path: str | None, response_code: int
+    ) -> NormalizedRecording:
+        method = (method or "").upper()
+        original_path = path or ""
         return NormalizedRecording(
             method=method,
             original_path=original_path,
-            normalized_path=path,
-            response_code=recording.response_code,
+            normalized_path=self.normalizer.normalize(method, original_path),
+            response_code=response_code,
         )
 
-    def _build_path_templates(self) -> list[tuple[re.Pattern[str], str]]:
-        templates = []
-        for path in self.spec.paths:
-            pattern = "^" + re.sub(r"\{[^/]+\}", "[^/]+", path.url) + "$"
-            templates.append((re.compile(pattern), path.url))
-        return templates
-
-    def _build_server_base_paths(self) -> list[str]:
-        base_paths: list[str] = []
-        for server in getattr(self.spec, "servers", []) or []:
-            url = getattr(server, "url", "")
-            if not url:
-                continue
-            base_path = urlparse(url).path or ""
-            if not base_path or base_path == "/":
-                continue
-            base_paths.append(base_path.rstrip("/"))
-        return sorted(set(base_paths), key=len, reverse=True)
-
-    def _strip_server_base_path(self, path: str) -> str:
-        for base_path in self._server_base_paths:
-            if path == base_path:
-                return "/"
-            if path.startswith(base_path + "/"):
-                return path[len(base_path) :]
-        return path
-
-    def _apply_template(self, path: str) -> str:
-        for pattern, template in self._path_templates:
-            if pattern.match(path):
-                return template
-        return path
+
+def _collect_result(
+    openapi_file_path: str,
+    spec_index: SpecIndex,
+    cache_size: int,
+    open_storage: Callable[[T], Storage],
+    recording: T,
+) -> CoverageResult:
+    coverage = Coverage(openapi_file_path, cache_size, spec_index=spec_index)
+    coverage.load(open_storage(recording))
+    return coverage.result
@@ -0,0 +1,226 @@
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
+from functools import partial
+from typing import TypeVar
+
+from requests_stats.core import profiling
+from requests_stats.core.base_storage import AggregatingStorage, Storage
+from requests_stats.core.normalization import PathNormalizer
+from requests_stats.core.parallel import process_map
+from requests_stats.core.recording import Recording, RecordingAggregate
+from requests_stats.core.sketch import LatencySketch
+from requests_stats.core.spec_cache import SpecCache
+from requests_stats.core.spec_index import SpecIndex
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99, 0.999)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class LatencyStats:
+    method: str
+    path: str
+    response_code: int
+    count: float
+    mean: float
+    min: float
+    max: float
+    p50: float
+    p90: float
+    p95: float
+    p99: float
+    p999: float
+
+
+class Latency:
+    """Response time statistics per (method, path template, response code).
+
+    Durations are fed into one ``LatencySketch`` per key while the
+    recordings are streamed from the storage, so memory stays bounded by the
+    number of distinct keys. Without a specification, recordings are grouped
+    by their raw path.
+    """
+
+    def __init__(
+        self,
+        openapi_file_path: str | None = None,
+        cache_size: int = 100_000,
+        spec_cache: SpecCache | None = None,
+        relative_accuracy: float = 0.01,
+        spec_index: SpecIndex | None = None,
+    ) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.cache_size = cache_size
+        self.sketches: dict[tuple[str, str, int], LatencySketch] = {}
+        if spec_index is None and openapi_file_path is not None:
+            with profiling.stage("parse specification") as stage:
+                spec_index = (
+                    spec_cache.load(openapi_file_path)
+                    if spec_cache
+                    else SpecIndex.parse(openapi_file_path)
+                )
+                stage.add(len(spec_index.operations))
+        self.spec_index = spec_index
+        if spec_index is None:
+            self.normalizer = PathNormalizer((), cache_size=cache_size)
+            return
+        self.normalizer = PathNormalizer(
+            spec_index.paths, spec_index.server_base_paths, cache_size=cache_size
+        )
+
+    def load(self, storage: Storage) -> None:
+        self.sketches = {}
+        processed = 0
+        with profiling.stage("latency") as stage:
+            if isinstance(storage, AggregatingStorage):
+                # let the backend group by template and pre-bucket the
+                # durations along the sketch buckets, every distinct raw
+                # path is normalized once
+                base = LatencySketch(self.relative_accuracy).gamma
+                for aggregate in profiling.iterate(
+                    "read storage",
+                    storage.aggregate(duration_log_base=base, path_map=self._template),
+                ):
+                    self.add_aggregate(aggregate, normalized=True)
+                    processed += aggregate.request_count
+            else:
+                for recording in profiling.iterate("read storage", storage.iter_load()):
+                    self.add(recording)
+                    processed += 1
+            stage.add(processed)
+
+    def load_many(
+        self,
+        recordings: Sequence[T],
+        open_storage: Callable[[T], Storage],
+        jobs: int | None = None,
+    ) -> None:
+        """Load several recordings in parallel processes and merge the sketches.
+
+        ``open_storage`` turns a recording into a storage inside the worker
+        process, it must be picklable (e.g. a module level function).
+        """
+        self.sketches = {}
+        collect = partial(
+            _collect_sketches,
+            self.spec_index,
+            self.cache_size,
+            self.relative_accuracy,
+            open_storage,
+        )
+        for sketches in profiling.iterate(
+            "parallel workers", process_map(collect, recordings, jobs)
+        ):
+            self.merge(sketches)
+
+    def merge(self, sketches: Mapping[tuple[str, str, int], LatencySketch]) -> None:
+        """Fold in the sketches of another ``Latency`` with the same accuracy."""
+        for key, sketch in sketches.items():
+            existing = self.sketches.get(key)
+            if existing is None:
+                self.sketches[key] = sketch
+            else:
+                existing.merge(sketch)
+
+    def add(self, recording: Recording) -> None:
+        sketch = self._sketch(recording.method, recording.path, recording.response_code)
+        sketch.add(recording.duration, weight=recording.weight)
+
+    def add_aggregate(
+        self, aggregate: RecordingAggregate, normalized: bool = False
+    ) -> None:
+        """Add a group of recordings that fall into a single sketch bucket.
+
+        Compacted groups bring their own sketch, which is merged instead.
+        ``normalized`` skips the normalization of a path that already is a
+        template, e.g. of a group aggregated with ``path_map``.
+        """
+        sketch = self._sketch(
+            aggregate.method, aggregate.path, aggregate.response_code, normalized
+        )
+        if aggregate.sketch is None:
+            fold_aggregate(sketch, aggregate)
+        elif aggregate.sketch.relative_accuracy == sketch.relative_accuracy:
+            sketch.merge(aggregate.sketch)
+        else:
+            # re-bucket the representative value of every bucket, keeping
+            # the exact sum, min and max of the group
+            compacted = aggregate.sketch
+            low, high, total = sketch.min, sketch.max, sketch.sum
+            if compacted.zero_count:
+                sketch.add(0.0, weight=compacted.zero_count)
+            for key, weight in compacted.buckets.items():
+                sketch.add(2 * compacted.gamma**key / (compacted.gamma + 1), weight)
+            sketch.min = min(low, compacted.min)
+            sketch.max = max(high, compacted.max)
+            sketch.sum = total + compacted.sum
+
+    def _sketch(
+        self,
+        method: str | None,
+        path: str | None,
+        response_code: int,
+        normalized: bool = False,
+    ) -> LatencySketch:
+        method = (method or "").upper()
+        path = path or ""
+        if not normalized:
+            path = self.normalizer.normalize(method, path)
+        key = (method, path, response_code)
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = LatencySketch(self.relative_accuracy)
+        return sketch
+
+    def _template(self, path: str) -> str:
+        # the template doesn't depend on the method, only the cache key does
+        return self.normalizer.normalize("", path)
+
+    def stats(self) -> list[LatencyStats]:
+        return [
+            LatencyStats(
+                method,
+                path,
+                code,
+                sketch.count,
+                sketch.mean,
+                sketch.min,
+                sketch.max,
+                *(sketch.quantile(q) for q in QUANTILES),
+            )
+            for (method, path, code), sketch in sorted(self.sketches.items())
+        ]
+
+
+def fold_aggregate(sketch: LatencySketch, aggregate: RecordingAggregate) -> None:
+    """Add a group of recordings that fall into a single bucket of ``sketch``."""
+    # min, max and the sum stay exact, the remaining recordings are
+    # represented by their mean which lies in the same bucket; sampled
+    # rows are assumed to carry the group's mean weight
+    weight = aggregate.weight_sum / aggregate.request_count
+    sketch.add(aggregate.duration_min, weight=weight)
+    if aggregate.request_count > 1:
+        sketch.add(aggregate.duration_max, weight=weight)
+    if aggregate.request_count > 2:
+        rest = aggregate.weight_sum - 2 * weight
+        rest_sum = aggregate.duration_sum - weight * (
+            aggregate.duration_min + aggregate.duration_max
+        )
+        sketch.add(rest_sum / rest, weight=rest)
+
+
+def _collect_sketches(
+    spec_index: SpecIndex | None,
+    cache_size: int,
+    relative_accuracy: float,
+    open_storage: Callable[[T], Storage],
+    recording: T,
+) -> dict[tuple[str, str, int], LatencySketch]:
+    latency = Latency(
+        cache_size=cache_size,
+        relative_accuracy=relative_accuracy,
+        spec_index=spec_index,
+    )
+    latency.load(open_storage(recording))
+    return latency.sketches
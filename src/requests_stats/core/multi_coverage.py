@@ -0,0 +1,217 @@
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
+from functools import partial
+from typing import TypeVar
+from urllib.parse import urlsplit
+
+from requests_stats.core import profiling
+from requests_stats.core.base_storage import AggregatingStorage, Storage
+from requests_stats.core.coverage import Coverage, CoverageResult
+from requests_stats.core.parallel import process_map
+from requests_stats.core.spec_cache import SpecCache
+from requests_stats.core.spec_index import SpecIndex
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class ServiceRoute:
+    """Requests to ``host`` below ``path_prefix`` belong to ``spec``.
+
+    ``host`` is lower case; without a port it matches the host on any port.
+    """
+
+    host: str
+    path_prefix: str
+    spec: str
+
+    @classmethod
+    def parse(cls, target: str, spec: str) -> "ServiceRoute":
+        """Parse ``host``, ``host/prefix`` or a base URL like ``https://host/prefix``."""
+        parsed = urlsplit(target if "://" in target else f"//{target}")
+        if not parsed.netloc:
+            raise ValueError(f"no host in {target!r}")
+        return cls(parsed.netloc.lower(), parsed.path.rstrip("/"), spec)
+
+    def matches(self, path: str) -> bool:
+        prefix = self.path_prefix
+        return not prefix or path == prefix or path.startswith(prefix + "/")
+
+
+class MultiCoverage:
+    """Coverage of several services, each against its own specification.
+
+    ``services`` maps a host or base URL (see ``ServiceRoute.parse``) to the
+    specification of the service behind it; several hosts can share one
+    specification. Every recording is routed by its host and path to one
+    ``Coverage`` in a single pass over the storage, so traffic of the other
+    services no longer shows up as extra paths. Paths below a prefix are
+    matched as they are and, if that finds no template, without the prefix,
+    as a gateway forwarding them would. Requests to hosts without a
+    specification are counted per host in ``unrouted``.
+    """
+
+    def __init__(
+        self,
+        services: Mapping[str, str],
+        cache_size: int = 100_000,
+        spec_cache: SpecCache | None = None,
+        spec_indexes: Mapping[str, SpecIndex] | None = None,
+    ) -> None:
+        if not services:
+            raise ValueError("at least one service is needed")
+        self.services = dict(services)
+        self.cache_size = cache_size
+        self.routes = [
+            ServiceRoute.parse(target, spec) for target, spec in services.items()
+        ]
+        self.coverages: dict[str, Coverage] = {}
+        for spec in dict.fromkeys(route.spec for route in self.routes):
+            self.coverages[spec] = Coverage(
+                spec,
+                cache_size,
+                spec_cache=spec_cache,
+                spec_index=spec_indexes[spec] if spec_indexes else None,
+            )
+        self.unrouted: dict[str, float] = {}
+        self.checkpoint = 0
+        self._templates = {
+            spec: frozenset(coverage.spec_index.paths)
+            for spec, coverage in self.coverages.items()
+        }
+        self._by_host: dict[str, list[ServiceRoute]] = {}
+        for route in sorted(
+            self.routes, key=lambda route: len(route.path_prefix), reverse=True
+        ):
+            self._by_host.setdefault(route.host, []).append(route)
+
+    def route(self, netloc: str, path: str) -> ServiceRoute | None:
+        """The route of the longest matching path prefix for a request."""
+        netloc = netloc.lower()
+        host, _, port = netloc.rpartition(":")
+        candidates = self._by_host.get(netloc, [])
+        if port.isdigit():
+            candidates = candidates + self._by_host.get(host, [])
+        for route in candidates:
+            if route.matches(path):
+                return route
+        return None
+
+    def load(self, storage: Storage) -> None:
+        self._reset()
+        self.update(storage)
+
+    def load_many(
+        self,
+        recordings: Sequence[T],
+        open_storage: Callable[[T], Storage],
+        jobs: int | None = None,
+    ) -> None:
+        """Load several recordings in parallel processes and merge them.
+
+        ``open_storage`` turns a recording into a storage inside the worker
+        process, it must be picklable (e.g. a module level function).
+        """
+        self._reset()
+        collect = partial(
+            _collect_results,
+            self.services,
+            self.cache_size,
+            {spec: coverage.spec_index for spec, coverage in self.coverages.items()},
+            open_storage,
+        )
+        for results, unrouted in profiling.iterate(
+            "parallel workers", process_map(collect, recordings, jobs)
+        ):
+            self.merge(results, unrouted)
+
+    def merge(
+        self, results: Mapping[str, CoverageResult], unrouted: Mapping[str, float]
+    ) -> None:
+        """Fold in the results of another ``MultiCoverage`` of the same services."""
+        for spec, result in results.items():
+            self.coverages[spec].merge(result)
+        for host, count in unrouted.items():
+            self.unrouted[host] = self.unrouted.get(host, 0) + count
+
+    def update(self, storage: Storage) -> int:
+        """Fold in the recordings stored since the last ``load``/``update``.
+
+        Returns the number of recordings that were processed.
+        """
+        processed = 0
+        with profiling.stage("multi coverage") as stage:
+            if isinstance(storage, AggregatingStorage):
+                for aggregate in profiling.iterate(
+                    "read storage", storage.aggregate(self.checkpoint, by_netloc=True)
+                ):
+                    self._add(
+                        aggregate.netloc or "",
+                        aggregate.method,
+                        aggregate.path,
+                        aggregate.response_code,
+                        aggregate.weight_sum,
+                    )
+                    self.checkpoint = max(self.checkpoint, aggregate.last_position)
+                    processed += aggregate.request_count
+            else:
+                for position, recording in profiling.iterate(
+                    "read storage", storage.iter_since(self.checkpoint)
+                ):
+                    self._add(
+                        recording.netloc,
+                        recording.method,
+                        recording.path,
+                        recording.response_code,
+                        recording.weight,
+                    )
+                    self.checkpoint = position
+                    processed += 1
+            stage.add(processed)
+        for coverage in self.coverages.values():
+            coverage.refresh()
+        return processed
+
+    def _add(
+        self,
+        netloc: str,
+        method: str | None,
+        path: str | None,
+        response_code: int,
+        weight: float,
+    ) -> None:
+        path = path or ""
+        route = self.route(netloc, path)
+        if route is None:
+            self.unrouted[netloc] = self.unrouted.get(netloc, 0) + weight
+            return
+        coverage = self.coverages[route.spec]
+        if (
+            route.path_prefix
+            and coverage.normalizer.normalize((method or "").upper(), path)
+            not in self._templates[route.spec]
+        ):
+            path = path[len(route.path_prefix) :] or "/"
+        coverage.add(method, path, response_code)
+
+    def _reset(self) -> None:
+        self.checkpoint = 0
+        self.unrouted = {}
+        for coverage in self.coverages.values():
+            coverage.checkpoint = 0
+            coverage.result = CoverageResult(coverage.spec_hash)
+
+
+def _collect_results(
+    services: Mapping[str, str],
+    cache_size: int,
+    spec_indexes: Mapping[str, SpecIndex],
+    open_storage: Callable[[T], Storage],
+    recording: T,
+) -> tuple[dict[str, CoverageResult], dict[str, float]]:
+    coverage = MultiCoverage(services, cache_size, spec_indexes=spec_indexes)
+    coverage.load(open_storage(recording))
+    return (
+        {spec: service.result for spec, service in coverage.coverages.items()},
+        coverage.unrouted,
+    )
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+from requests_stats.core.path_router import PathRouter
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+class PathNormalizer:
+    """Map recorded paths to the OpenAPI path templates they belong to.
+
+    Results are kept in a bounded LRU cache keyed by the raw (method, path),
+    because real traffic repeats the same paths over and over. A
+    ``cache_size`` of 0 disables the cache.
+    """
+
+    def __init__(
+        self,
+        templates: Iterable[str],
+        server_base_paths: Iterable[str] = (),
+        cache_size: int = 100_000,
+    ) -> None:
+        self.cache_size = cache_size
+        self._router = PathRouter(templates)
+        self._server_base_paths = sorted(set(server_base_paths), key=len, reverse=True)
+        self._cache: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def normalize(self, method: str, path: str) -> str:
+        """Return the template for ``path``, or the cleaned up path if none matches."""
+        key = (method, path)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._hits += 1
+            self._cache.move_to_end(key)
+            return cached
+        self._misses += 1
+        normalized = self._normalize(path)
+        if self.cache_size > 0:
+            self._cache[key] = normalized
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self._evictions += 1
+        return normalized
+
+    def cache_stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            size=len(self._cache),
+            maxsize=self.cache_size,
+        )
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+        self._hits = self._misses = self._evictions = 0
+
+    def _normalize(self, path: str) -> str:
+        if (
+            "://" in path
+        ):  # TODO: should be taken care of by adapter, check how to enforce this
+            parsed_url = urlparse(path)
+            path = parsed_url.path
+        path = path.split("?", 1)[0]
+        path = self._strip_server_base_path(path)
+        return self._apply_template(path)
+
+    def _strip_server_base_path(self, path: str) -> str:
+        for base_path in self._server_base_paths:
+            if path == base_path:
+                return "/"
+            if path.startswith(base_path + "/"):
+                return path[len(base_path) :]
+        return path
+
+    def _apply_template(self, path: str) -> str:
+        return self._router.match(path) or path
@@ -0,0 +1,33 @@
+import multiprocessing
+import os
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from typing import TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def process_map(
+    function: Callable[[T], R], items: Sequence[T], jobs: int | None = None
+) -> Iterator[R]:
+    """Apply ``function`` to ``items`` in a process pool, yielding results in order.
+
+    ``function`` and its results must be picklable. With a single job or a
+    single item everything runs in the current process. ``jobs`` defaults
+    to the number of CPUs. Workers are started by a fork server, forking
+    the (possibly multi-threaded) caller directly can deadlock; where there
+    is no fork server (Windows) they are spawned.
+    """
+    workers = min(jobs or os.cpu_count() or 1, len(items))
+    if workers <= 1:
+        yield from map(function, items)
+        return
+    method = (
+        "forkserver"
+        if "forkserver" in multiprocessing.get_all_start_methods()
+        else "spawn"
+    )
+    context = multiprocessing.get_context(method)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        yield from pool.map(function, items)
@@ -0,0 +1,75 @@
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+_PARAMETER = re.compile(r"\{[^/{}]+\}")
+
+
+@dataclass
+class _Node:
+    literals: dict[str, "_Node"] = field(default_factory=dict)
+    patterns: dict[str, tuple[re.Pattern[str], "_Node"]] = field(default_factory=dict)
+    parameter: "_Node | None" = None
+    template: str | None = None
+
+
+class PathRouter:
+    """Match request paths to OpenAPI path templates with a segment trie.
+
+    Lookup walks the trie one path segment at a time. At every level a
+    literal segment is preferred over a segment mixing literals and
+    parameters (e.g. ``{name}.json``), which in turn is preferred over a
+    plain parameter segment, as required by the OpenAPI specification:
+    ``/pet/findByStatus`` wins over ``/pet/{petId}`` regardless of the order
+    in which the paths are declared.
+    """
+
+    def __init__(self, templates: Iterable[str] = ()) -> None:
+        self._root = _Node()
+        for template in templates:
+            self.add(template)
+
+    def add(self, template: str) -> None:
+        node = self._root
+        for segment in template.split("/"):
+            if not _PARAMETER.search(segment):
+                node = node.literals.setdefault(segment, _Node())
+            elif _PARAMETER.fullmatch(segment):
+                if node.parameter is None:
+                    node.parameter = _Node()
+                node = node.parameter
+            else:
+                if segment not in node.patterns:
+                    node.patterns[segment] = (_compile_segment(segment), _Node())
+                node = node.patterns[segment][1]
+        if node.template is None:
+            node.template = template
+
+    def match(self, path: str) -> str | None:
+        """Return the template matching ``path``, or None."""
+        return self._match(self._root, path.split("/"), 0)
+
+    def _match(self, node: _Node, segments: list[str], index: int) -> str | None:
+        if index == len(segments):
+            return node.template
+        segment = segments[index]
+        literal = node.literals.get(segment)
+        if literal is not None:
+            template = self._match(literal, segments, index + 1)
+            if template is not None:
+                return template
+        if not segment:
+            return None
+        for pattern, child in node.patterns.values():
+            if pattern.fullmatch(segment):
+                template = self._match(child, segments, index + 1)
+                if template is not None:
+                    return template
+        if node.parameter is not None:
+            return self._match(node.parameter, segments, index + 1)
+        return None
+
+
+def _compile_segment(segment: str) -> re.Pattern[str]:
+    parts = _PARAMETER.split(segment)
+    return re.compile("[^/]+".join(re.escape(part) for part in parts))
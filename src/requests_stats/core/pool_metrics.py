@@ -0,0 +1,127 @@
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Protocol
+
+
+class MonitoredPool(Protocol):
+    def idle_connections(self) -> int: ...
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    """Connection usage of the pools of one host, times in seconds.
+
+    ``exhausted`` counts acquisitions that found no free slot in the pool:
+    with ``block`` they waited for another request to release a connection,
+    otherwise they opened an extra connection that was ``discarded`` when
+    released into the full pool.
+    """
+
+    host: str
+    maxsize: int
+    block: bool
+    active: int
+    idle: int
+    peak_active: int
+    acquired: int
+    new: int
+    reused: int
+    exhausted: int
+    discarded: int
+    wait_total: float
+    wait_max: float
+
+    @property
+    def wait_mean(self) -> float:
+        return self.wait_total / self.acquired if self.acquired else 0.0
+
+    @property
+    def suggested_maxsize(self) -> int:
+        """The ``pool_maxsize`` that would have served the peak without waiting."""
+        if self.block and self.exhausted:
+            # waits hide the real demand, there was at least one more request
+            return self.maxsize + 1
+        return max(self.peak_active, 1)
+
+
+@dataclass
+class _HostCounters:
+    maxsize: int
+    block: bool
+    active: int = 0
+    peak_active: int = 0
+    acquired: int = 0
+    new: int = 0
+    reused: int = 0
+    exhausted: int = 0
+    discarded: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    pools: "weakref.WeakSet[MonitoredPool]" = field(default_factory=weakref.WeakSet)
+
+
+class PoolMetrics:
+    """Live connection pool metrics per host, fed by instrumented pools.
+
+    Pass an instance to ``RecordingHTTPAdapter(pool_metrics=...)`` and read
+    ``stats()`` or hand it to a pool reporter once the load is done. The
+    counters are shared by all adapters using the same instance.
+    """
+
+    def __init__(self) -> None:
+        self._hosts: dict[str, _HostCounters] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self, host: str, pool: MonitoredPool, maxsize: int, block: bool
+    ) -> None:
+        with self._lock:
+            counters = self._hosts.get(host)
+            if counters is None:
+                counters = self._hosts[host] = _HostCounters(maxsize, block)
+            counters.maxsize = maxsize
+            counters.block = block
+            counters.pools.add(pool)
+
+    def acquired(self, host: str, wait: float, reused: bool, exhausted: bool) -> None:
+        with self._lock:
+            counters = self._hosts[host]
+            counters.active += 1
+            counters.peak_active = max(counters.peak_active, counters.active)
+            counters.acquired += 1
+            if reused:
+                counters.reused += 1
+            else:
+                counters.new += 1
+            counters.exhausted += exhausted
+            counters.wait_total += wait
+            counters.wait_max = max(counters.wait_max, wait)
+
+    def released(self, host: str, discarded: bool) -> None:
+        with self._lock:
+            counters = self._hosts[host]
+            counters.active -= 1
+            counters.discarded += discarded
+
+    def stats(self) -> list[PoolStats]:
+        """A snapshot of every host, in the order they were first used."""
+        with self._lock:
+            return [
+                PoolStats(
+                    host=host,
+                    maxsize=c.maxsize,
+                    block=c.block,
+                    active=c.active,
+                    idle=sum(pool.idle_connections() for pool in c.pools),
+                    peak_active=c.peak_active,
+                    acquired=c.acquired,
+                    new=c.new,
+                    reused=c.reused,
+                    exhausted=c.exhausted,
+                    discarded=c.discarded,
+                    wait_total=c.wait_total,
+                    wait_max=c.wait_max,
+                )
+                for host, c in self._hosts.items()
+            ]
@@ -0,0 +1,177 @@
+import time
+import tracemalloc
+from collections.abc import Iterable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from dataclasses import dataclass
+from typing import Self, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class StageStats:
+    """Accumulated over all runs of one pipeline stage.
+
+    ``path`` are the names of the enclosing stages and the stage itself.
+    ``self_seconds`` excludes the time of nested stages, ``peak_memory`` is
+    the most memory allocated on top of what was allocated when the stage
+    started, None without memory tracing.
+    """
+
+    path: tuple[str, ...]
+    calls: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+    self_seconds: float = 0.0
+    peak_memory: int | None = None
+
+    @property
+    def name(self) -> str:
+        return self.path[-1]
+
+    def add(self, rows: int) -> None:
+        """Count ``rows`` processed by the stage."""
+        self.rows += rows
+
+
+class _NullStage(StageStats):
+    """Stands in for a stage while profiling is disabled, records nothing."""
+
+    def add(self, rows: int) -> None:
+        pass
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage(("disabled",))
+
+
+class Profiler:
+    """Time, count and optionally trace the memory of pipeline stages.
+
+    Stages nest: a stage entered while another one runs is recorded below
+    it. With ``memory`` the peak allocation of every stage is traced with
+    ``tracemalloc``, which slows down everything else considerably.
+    """
+
+    def __init__(self, memory: bool = False) -> None:
+        self.memory = memory
+        self.stages: dict[tuple[str, ...], StageStats] = {}
+        self._stack: list[tuple[str, ...]] = []
+        # per open stage: memory allocated when it started, highest peak seen
+        self._memory: list[tuple[int, int]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        """Record the block as stage ``name``."""
+        stats = self._stats(name)
+        self._stack.append(stats.path)
+        if self.memory:
+            self._enter_memory()
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds += time.perf_counter() - start
+            stats.calls += 1
+            if self.memory:
+                self._exit_memory(stats)
+            self._stack.pop()
+
+    def iterate(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Yield from ``iterable``, recording the time spent producing items.
+
+        The time the caller spends on the items is not included, so a loop
+        over a storage can be split into reading and processing. Stages
+        entered while producing an item are recorded below this one.
+        """
+        stats = self._stats(name)
+        stats.calls += 1
+        iterator = iter(iterable)
+        while True:
+            self._stack.append(stats.path)
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                stats.seconds += time.perf_counter() - start
+                self._stack.pop()
+            stats.rows += 1
+            yield item
+
+    def stats(self) -> list[StageStats]:
+        """The stages in the order they were first entered, parents first."""
+        for stats in self.stages.values():
+            children = sum(
+                child.seconds
+                for child in self.stages.values()
+                if child.path[:-1] == stats.path
+            )
+            stats.self_seconds = max(stats.seconds - children, 0.0)
+        return list(self.stages.values())
+
+    def _stats(self, name: str) -> StageStats:
+        path = (*(self._stack[-1] if self._stack else ()), name)
+        stats = self.stages.get(path)
+        if stats is None:
+            stats = self.stages[path] = StageStats(path)
+        return stats
+
+    def _enter_memory(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._memory:
+            # keep the peak of the enclosing stage before resetting it
+            started, highest = self._memory[-1]
+            self._memory[-1] = (started, max(highest, peak))
+        tracemalloc.reset_peak()
+        self._memory.append((current, current))
+
+    def _exit_memory(self, stats: StageStats) -> None:
+        started, highest = self._memory.pop()
+        peak = max(highest, tracemalloc.get_traced_memory()[1])
+        stats.peak_memory = max(stats.peak_memory or 0, peak - started)
+        if self._memory:
+            outer_started, outer_highest = self._memory[-1]
+            self._memory[-1] = (outer_started, max(outer_highest, peak))
+        tracemalloc.reset_peak()
+
+
+_profiler: Profiler | None = None
+
+
+def enable(profiler: Profiler) -> None:
+    """Record the stages of the pipeline into ``profiler`` from now on."""
+    global _profiler
+    _profiler = profiler
+
+
+def disable() -> None:
+    global _profiler
+    _profiler = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def stage(name: str) -> AbstractContextManager[StageStats]:
+    """Record the block as stage ``name`` of the enabled profiler, if any."""
+    if _profiler is None:
+        return _NULL_STAGE
+    return _profiler.stage(name)
+
+
+def iterate(name: str, iterable: Iterable[T]) -> Iterable[T]:
+    """Record producing the items as stage ``name``, see ``Profiler.iterate``.
+
+    Returns ``iterable`` itself when profiling is disabled.
+    """
+    if _profiler is None:
+        return iterable
+    return _profiler.iterate(name, iterable)
@@ -1,5 +1,7 @@
 from typing import NamedTuple
 
+from requests_stats.core.sketch import LatencySketch
+
 
 class Recording(NamedTuple):
     method: str
@@ -10,3 +12,49 @@ class Recording(NamedTuple):
     query: str
     response_code: int
     duration: float
+    # number of requests this recording stands for, see ``Sampler``
+    weight: float = 1.0
+    # start of the request in seconds since the epoch, None in recordings
+    # written before it was captured
+    timestamp: float | None = None
+    # optional phase timings in seconds and sizes in bytes, see
+    # ``adapters.instrumentation``; None when they weren't captured
+    pool_wait: float | None = None
+    connection_reused: bool | None = None
+    connect: float | None = None
+    tls_handshake: float | None = None
+    ttfb: float | None = None
+    download: float | None = None
+    request_bytes: int | None = None
+    response_bytes: int | None = None
+
+
+PHASES_START = Recording._fields.index("pool_wait")
+PHASE_FIELDS = Recording._fields[PHASES_START:]
+
+
+class RecordingAggregate(NamedTuple):
+    """Recordings sharing method, path and response code, folded into one row.
+
+    ``first_position``/``last_position`` are the storage positions (see
+    ``Storage.iter_since``) of the first and last recording in the group.
+    ``request_count`` counts rows, ``weight_sum`` the requests they stand for,
+    and ``duration_sum`` is weighted as well.
+
+    Groups read from compacted storage carry the ``sketch`` of their
+    durations, the single recordings are gone. ``netloc`` is only set when
+    the groups are split by host as well.
+    """
+
+    method: str
+    path: str
+    response_code: int
+    request_count: int
+    duration_sum: float
+    duration_min: float
+    duration_max: float
+    first_position: int
+    last_position: int
+    weight_sum: float
+    sketch: LatencySketch | None = None
+    netloc: str | None = None
@@ -0,0 +1,151 @@
+import math
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from requests_stats.core.base_storage import Storage
+from requests_stats.core.normalization import PathNormalizer
+from requests_stats.core.recording import Recording
+from requests_stats.core.sketch import LatencySketch
+from requests_stats.core.spec_cache import SpecCache
+from requests_stats.core.spec_index import SpecIndex
+
+# bucket widths in seconds
+BUCKET_WIDTHS = (1, 10, 60)
+
+
+@dataclass
+class RollupBucket:
+    """The requests to one endpoint template that started in one time bucket.
+
+    ``start`` is a multiple of ``width`` in seconds since the epoch.
+    ``count`` and ``errors`` (responses of 400 and above) are weighted like
+    the ``sketch`` of the durations.
+    """
+
+    width: int
+    start: int
+    method: str
+    path: str
+    count: float
+    errors: float
+    sketch: LatencySketch
+
+    def merge(self, other: "RollupBucket") -> None:
+        self.count += other.count
+        self.errors += other.errors
+        self.sketch.merge(other.sketch)
+
+
+@dataclass(frozen=True)
+class TimeseriesPoint:
+    start: int
+    width: int
+    count: float
+    errors: float
+    requests_per_second: float
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+class Rollup:
+    """Pre-aggregate recordings into fixed time buckets per endpoint template.
+
+    ``update()`` streams the recordings stored since the last update into
+    one ``RollupBucket`` per width, bucket start and (method, path
+    template), recordings without a timestamp are only counted in
+    ``skipped``. The buckets are a delta: persist them with
+    ``RollupStorage.save()``, which merges them into the stored ones and
+    clears them.
+    """
+
+    def __init__(
+        self,
+        openapi_file_path: str | None = None,
+        widths: Iterable[int] = BUCKET_WIDTHS,
+        relative_accuracy: float = 0.01,
+        cache_size: int = 100_000,
+        spec_cache: SpecCache | None = None,
+        spec_index: SpecIndex | None = None,
+    ) -> None:
+        self.widths = tuple(sorted(set(widths)))
+        if not self.widths or self.widths[0] < 1:
+            raise ValueError("bucket widths must be at least one second")
+        self.relative_accuracy = relative_accuracy
+        self.buckets: dict[tuple[int, int, str, str], RollupBucket] = {}
+        self.checkpoint = 0
+        self.skipped = 0
+        if spec_index is None and openapi_file_path is not None:
+            spec_index = (
+                spec_cache.load(openapi_file_path)
+                if spec_cache
+                else SpecIndex.parse(openapi_file_path)
+            )
+        if spec_index is None:
+            self.normalizer = PathNormalizer((), cache_size=cache_size)
+            return
+        self.normalizer = PathNormalizer(
+            spec_index.paths, spec_index.server_base_paths, cache_size=cache_size
+        )
+
+    def update(self, storage: Storage) -> int:
+        """Add the recordings stored since ``checkpoint``, returns their number."""
+        processed = 0
+        for position, recording in storage.iter_since(self.checkpoint):
+            self.add(recording)
+            self.checkpoint = position
+            processed += 1
+        return processed
+
+    def add(self, recording: Recording) -> None:
+        if recording.timestamp is None:
+            self.skipped += 1
+            return
+        method = (recording.method or "").upper()
+        path = self.normalizer.normalize(method, recording.path or "")
+        error = recording.weight if recording.response_code >= 400 else 0.0
+        for width in self.widths:
+            start = math.floor(recording.timestamp / width) * width
+            key = (width, start, method, path)
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = RollupBucket(
+                    width,
+                    start,
+                    method,
+                    path,
+                    0.0,
+                    0.0,
+                    LatencySketch(self.relative_accuracy),
+                )
+            bucket.count += recording.weight
+            bucket.errors += error
+            bucket.sketch.add(recording.duration, weight=recording.weight)
+
+
+def timeseries(buckets: Iterable[RollupBucket]) -> list[TimeseriesPoint]:
+    """Fold buckets of one width into one point per bucket start."""
+    merged: dict[int, RollupBucket] = {}
+    for bucket in buckets:
+        existing = merged.get(bucket.start)
+        if existing is None:
+            merged[bucket.start] = bucket
+        else:
+            existing.merge(bucket)
+    return [
+        TimeseriesPoint(
+            start=start,
+            width=bucket.width,
+            count=bucket.count,
+            errors=bucket.errors,
+            requests_per_second=bucket.count / bucket.width,
+            mean=bucket.sketch.mean,
+            p50=bucket.sketch.quantile(0.5),
+            p95=bucket.sketch.quantile(0.95),
+            p99=bucket.sketch.quantile(0.99),
+            max=bucket.sketch.max if bucket.sketch.count else 0.0,
+        )
+        for start, bucket in sorted(merged.items())
+    ]
@@ -0,0 +1,112 @@
+import random
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+from requests_stats.core.normalization import PathNormalizer
+from requests_stats.core.recording import Recording
+
+
+def endpoint_key(recording: Recording) -> Hashable:
+    """Default key for ``max_per_key``: method, host, raw path and status."""
+    return (
+        recording.method,
+        recording.netloc,
+        recording.path,
+        recording.response_code,
+    )
+
+
+def template_key(normalizer: PathNormalizer) -> Callable[[Recording], Hashable]:
+    """Key for ``max_per_key`` like ``endpoint_key``, with the path template.
+
+    Paths carrying ids then share the count of their endpoint.
+    """
+
+    def key(recording: Recording) -> Hashable:
+        return (
+            recording.method,
+            recording.netloc,
+            normalizer.normalize(recording.method, recording.path),
+            recording.response_code,
+        )
+
+    return key
+
+
+class Sampler:
+    """Decide which recordings to keep, and how many requests each one stands for.
+
+    Recordings are kept with probability ``rate``. Responses outside the 2xx
+    range (with ``keep_errors``) and requests taking at least
+    ``slow_threshold`` seconds are always kept. With ``max_per_key``, the
+    n-th recording of a key (see ``endpoint_key``) is additionally kept only
+    with probability ``min(1, max_per_key / n)``, so a hot endpoint keeps
+    producing rows at a logarithmic pace instead of a linear one. The counts
+    of the ``max_keys`` most recently seen keys are kept in an LRU; a key
+    evicted from it starts counting from one again. Raw paths with ids make
+    a key per id, use ``template_key`` to count per endpoint.
+
+    A kept recording gets ``weight = 1 / p``, ``p`` being its probability
+    to be kept, which makes weighted counts and sums unbiased estimates of
+    the unsampled ones.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        keep_errors: bool = True,
+        slow_threshold: float | None = None,
+        max_per_key: int | None = None,
+        key: Callable[[Recording], Hashable] = endpoint_key,
+        random_source: Callable[[], float] = random.random,
+        max_keys: int = 10_000,
+    ) -> None:
+        if not 0 < rate <= 1:
+            raise ValueError("rate must be in (0, 1]")
+        if max_per_key is not None and max_per_key < 1:
+            raise ValueError("max_per_key must be at least 1")
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+        self.rate = rate
+        self.keep_errors = keep_errors
+        self.slow_threshold = slow_threshold
+        self.max_per_key = max_per_key
+        self.key = key
+        self.random_source = random_source
+        self.max_keys = max_keys
+        self.seen = 0
+        self.kept = 0
+        self._counts: OrderedDict[Hashable, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sample(self, recording: Recording) -> Recording | None:
+        """Return the recording to store, with its weight set, or None to drop it."""
+        with self._lock:
+            self.seen += 1
+            if self._always_keep(recording):
+                self.kept += 1
+                return recording
+            probability = self.rate
+            if self.max_per_key is not None:
+                count = self._count(self.key(recording))
+                probability *= min(1.0, self.max_per_key / count)
+            if probability < 1 and self.random_source() >= probability:
+                return None
+            self.kept += 1
+        return recording._replace(weight=recording.weight / probability)
+
+    def _count(self, key: Hashable) -> int:
+        count = self._counts[key] = self._counts.get(key, 0) + 1
+        self._counts.move_to_end(key)
+        if len(self._counts) > self.max_keys:
+            self._counts.popitem(last=False)
+        return count
+
+    def _always_keep(self, recording: Recording) -> bool:
+        if self.keep_errors and not 200 <= recording.response_code < 300:
+            return True
+        return (
+            self.slow_threshold is not None
+            and recording.duration >= self.slow_threshold
+        )
@@ -0,0 +1,109 @@
+import math
+from typing import Any
+
+
+class LatencySketch:
+    """Mergeable quantile sketch with a relative error guarantee.
+
+    Values are counted in logarithmically sized buckets ``(gamma**(k-1),
+    gamma**k]`` (as in DDSketch), so
+    every quantile is reported within ``relative_accuracy`` of the true value
+    while memory only depends on the range of the values, not on how many
+    were added. Two sketches with the same accuracy can be merged losslessly,
+    e.g. to combine the results of several recordings.
+    """
+
+    def __init__(
+        self, relative_accuracy: float = 0.01, max_buckets: int = 2048
+    ) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.buckets: dict[int, float] = {}
+        self.zero_count = 0.0
+        self.count = 0.0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        """Add a (non-negative) value, counted ``weight`` times."""
+        value = max(value, 0.0)
+        self.count += weight
+        self.sum += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 0.0:
+            self.zero_count += weight
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0.0) + weight
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def merge(self, other: "LatencySketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge sketches with different accuracies")
+        for key, weight in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0.0) + weight
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimate the ``q``-quantile (0 <= q <= 1) of the added values."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = self.zero_count
+        if self.zero_count and seen >= rank:
+            return 0.0
+        estimate = self.max
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen >= rank:
+                estimate = 2 * self.gamma**key / (self.gamma + 1)
+                break
+        return min(max(estimate, self.min), self.max)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "buckets": [[key, weight] for key, weight in sorted(self.buckets.items())],
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "LatencySketch":
+        sketch = cls(relative_accuracy=data["relative_accuracy"])
+        sketch.buckets = {int(key): weight for key, weight in data["buckets"]}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if data["min"] is not None:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+    def _collapse(self) -> None:
+        # fold the lowest buckets together, this only loses accuracy for
+        # the fastest requests, which are the least interesting ones
+        keys = sorted(self.buckets)
+        excess = len(keys) - self.max_buckets
+        merged = sum(self.buckets.pop(key) for key in keys[:excess])
+        self.buckets[keys[excess]] += merged
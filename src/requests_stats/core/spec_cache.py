@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+
+from requests_stats.core.spec_index import SpecIndex, spec_digest
+
+CACHE_VERSION = 1
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "requests-stats" / "specs"
+
+
+class SpecCache:
+    """On-disk cache of ``SpecIndex`` objects keyed by the spec file content.
+
+    Changing the specification changes its hash, so stale entries are never
+    used. Only the given file is hashed: changes to files it references via
+    an external ``$ref`` are not detected, clear the cache in that case.
+    """
+
+    def __init__(self, directory: Path | None = None) -> None:
+        self.directory = directory or default_cache_dir()
+
+    def load(self, openapi_file_path: str, digest: str | None = None) -> SpecIndex:
+        """Return the index for the spec, parsing and caching it on a miss."""
+        entry = (
+            self.directory
+            / f"{self._key(digest or spec_digest(openapi_file_path))}.json"
+        )
+        try:
+            return SpecIndex.from_dict(json.loads(entry.read_text(encoding="utf-8")))
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        index = SpecIndex.parse(openapi_file_path)
+        try:
+            self._write(entry, json.dumps(index.to_dict(), separators=(",", ":")))
+        except OSError:
+            pass  # an unwritable cache only costs the next run a parse
+        return index
+
+    def clear(self) -> int:
+        """Remove all cached entries and return how many were removed."""
+        removed = 0
+        for entry in self.directory.glob("*.json"):
+            entry.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def _key(self, digest: str) -> str:
+        try:
+            parser_version = version("openapi3-parser")
+        except PackageNotFoundError:
+            parser_version = "unknown"
+        return f"{digest}-v{CACHE_VERSION}-{parser_version}"
+
+    def _write(self, entry: Path, content: str) -> None:
+        # write to a temporary file first, concurrent runs must never see
+        # a partially written entry
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            tmp.write(content)
+        os.replace(tmp_name, entry)
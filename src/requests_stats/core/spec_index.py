@@ -0,0 +1,130 @@
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+import openapi_parser
+from openapi_parser.specification import Specification
+
+
+@dataclass(frozen=True)
+class ResponseInfo:
+    code: int
+    description: str
+
+
+@dataclass(frozen=True)
+class OperationInfo:
+    method: str
+    path: str
+    summary: str
+    tags: tuple[str, ...]
+    responses: tuple[ResponseInfo, ...]
+
+
+@dataclass(frozen=True)
+class SpecIndex:
+    """The parts of an OpenAPI specification needed for the reports.
+
+    Unlike the parsed ``openapi_parser`` specification this is small, cheap to
+    serialize and can be cached between runs.
+    """
+
+    paths: tuple[str, ...]
+    server_base_paths: tuple[str, ...]
+    operations: tuple[OperationInfo, ...]
+
+    @classmethod
+    def parse(cls, openapi_file_path: str) -> "SpecIndex":
+        return cls.from_spec(openapi_parser.parse(openapi_file_path, strict_enum=False))
+
+    @classmethod
+    def from_spec(cls, spec: Specification) -> "SpecIndex":
+        operations = []
+        for path in spec.paths:
+            for operation in path.operations:
+                responses = tuple(
+                    ResponseInfo(
+                        code=int(response.code),
+                        description=(response.description or "").strip(),
+                    )
+                    for response in operation.responses
+                    if not response.is_default and response.code is not None
+                )
+                operations.append(
+                    OperationInfo(
+                        method=operation.method.name,
+                        path=str(path.url),
+                        summary=(operation.summary or "").strip(),
+                        tags=tuple(operation.tags or ()),
+                        responses=responses,
+                    )
+                )
+        return cls(
+            paths=tuple(str(path.url) for path in spec.paths),
+            server_base_paths=_server_base_paths(spec),
+            operations=tuple(operations),
+        )
+
+    def endpoints(self) -> set[tuple[str, str, int]]:
+        """All documented (method, path template, response code) triples."""
+        return {
+            (operation.method, operation.path, response.code)
+            for operation in self.operations
+            for response in operation.responses
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "paths": list(self.paths),
+            "server_base_paths": list(self.server_base_paths),
+            "operations": [
+                [
+                    operation.method,
+                    operation.path,
+                    operation.summary,
+                    list(operation.tags),
+                    [[r.code, r.description] for r in operation.responses],
+                ]
+                for operation in self.operations
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "SpecIndex":
+        return cls(
+            paths=tuple(data["paths"]),
+            server_base_paths=tuple(data["server_base_paths"]),
+            operations=tuple(
+                OperationInfo(
+                    method=method,
+                    path=path,
+                    summary=summary,
+                    tags=tuple(tags),
+                    responses=tuple(
+                        ResponseInfo(code=code, description=description)
+                        for code, description in responses
+                    ),
+                )
+                for method, path, summary, tags, responses in data["operations"]
+            ),
+        )
+
+
+def spec_digest(openapi_file_path: str) -> str:
+    """Content hash of a specification file."""
+    return hashlib.sha256(Path(openapi_file_path).read_bytes()).hexdigest()
+
+
+def _server_base_paths(spec: Specification) -> tuple[str, ...]:
+    base_paths: list[str] = []
+    for server in getattr(spec, "servers", []) or []:
+        url = getattr(server, "url", "")
+        if not url:
+            continue
+        base_path = urlparse(url).path or ""
+        if not base_path or base_path == "/":
+            continue
+        base_paths.append(base_path.rstrip("/"))
+    return tuple(base_paths)
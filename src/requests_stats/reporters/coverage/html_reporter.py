@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from collections import defaultdict
 from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import cast
+from typing import Any
 
 from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
 
+from requests_stats.core import profiling
 from requests_stats.core.coverage import Coverage
 
 
@@ -29,22 +31,53 @@ class EndpointGroup:
     tags: tuple[str, ...]
 
 
+@dataclass(frozen=True)
+class GroupSummary:
+    covered_count: int
+    total_count: int
+    label: str
+    serialized: dict[str, object]
+
+
 class HtmlReporter:
+    """Render the coverage as a single HTML page.
+
+    The coverage of every endpoint group is computed once per rendering and
+    shared by the summary, the tag sections and the group rows; ``create``
+    streams the page into the file instead of building it in memory.
+    """
+
     def __init__(self, coverage: Coverage) -> None:
         self.coverage = coverage
 
     def create(self, output: Path) -> None:
-        output.write_text(self.render(), encoding="utf-8")
+        with profiling.stage("render html"):
+            with profiling.stage("report context"):
+                context = self._context()
+            with output.open("w", encoding="utf-8") as file:
+                file.writelines(_template().generate(**context))
 
     def render(self) -> str:
-        groups = self._collect_groups()
+        with profiling.stage("render html"):
+            with profiling.stage("report context"):
+                context = self._context()
+            return _template().render(**context)
+
+    @cached_property
+    def groups(self) -> list[EndpointGroup]:
+        """The endpoint groups of the specification, collected on first use."""
+        return self._collect_groups()
+
+    def _context(self) -> dict[str, Any]:
+        groups = self.groups
+        summaries = {group: self._summarize(group) for group in groups}
         tags_map = self._group_by_tags(groups)
         extra = sorted(
             self.coverage.extra_details,
             key=lambda item: (item[0], item[2], item[3], item[1]),
         )
 
-        summary_status = self._count_group_status(groups)
+        summary_status = self._count_group_status(groups, summaries)
         total_endpoints = sum(summary_status.values())
         coverage_percent = (
             f"{(summary_status['covered'] / total_endpoints * 100):.1f}"
@@ -55,17 +88,17 @@ class HtmlReporter:
         tags: list[dict[str, object]] = []
         for tag_name in sorted(tags_map, key=lambda name: name.lower()):
             tag_groups = tags_map[tag_name]
-            tag_covered, tag_total = self._count_group_coverage(tag_groups)
+            tag_covered, tag_total = self._count_group_coverage(tag_groups, summaries)
             tag_coverage = (
                 f"{(tag_covered / tag_total * 100):.1f}" if tag_total else "0.0"
             )
-            group_status = self._count_group_status(tag_groups)
+            group_status = self._count_group_status(tag_groups, summaries)
             tags.append(
                 {
                     "name": tag_name,
                     "coverage_percent": tag_coverage,
                     "status": group_status,
-                    "groups": [self._serialize_group(group) for group in tag_groups],
+                    "groups": [summaries[group].serialized for group in tag_groups],
                 }
             )
 
@@ -80,37 +113,28 @@ class HtmlReporter:
             for method, original_path, normalized_path, code in extra
         ]
 
-        return cast(
-            str,
-            self._template().render(
-                summary_status=summary_status,
-                coverage_percent=coverage_percent,
-                tags=tags,
-                extra=extra_items,
-            ),
-        )
+        return {
+            "summary_status": summary_status,
+            "coverage_percent": coverage_percent,
+            "tags": tags,
+            "extra": extra_items,
+        }
 
     def _collect_groups(self) -> list[EndpointGroup]:
         entries: list[ResponseEntry] = []
-        for path in self.coverage.spec.paths:
-            for operation in path.operations:
-                tags = tuple(operation.tags or ["default"])
-                summary = (operation.summary or "").strip()
-                for response in operation.responses:
-                    if response.is_default or response.code is None:
-                        continue
-                    code = int(response.code)
-                    description = (response.description or "").strip()
-                    entries.append(
-                        ResponseEntry(
-                            method=operation.method.name,
-                            path=path.url,
-                            response_code=code,
-                            response_description=description,
-                            tags=tags,
-                            summary=summary,
-                        )
+        for operation in self.coverage.spec_index.operations:
+            tags = operation.tags or ("default",)
+            for response in operation.responses:
+                entries.append(
+                    ResponseEntry(
+                        method=operation.method,
+                        path=operation.path,
+                        response_code=response.code,
+                        response_description=response.description,
+                        tags=tags,
+                        summary=operation.summary,
                     )
+                )
         grouped: dict[tuple[str, str, str], list[ResponseEntry]] = defaultdict(list)
         for entry in entries:
             grouped[(entry.method, entry.path, entry.summary)].append(entry)
@@ -144,20 +168,26 @@ class HtmlReporter:
             grouped[tag] = sorted(items, key=self._group_sort_key)
         return dict(grouped)
 
-    def _count_group_coverage(self, groups: list[EndpointGroup]) -> tuple[int, int]:
+    def _count_group_coverage(
+        self,
+        groups: list[EndpointGroup],
+        summaries: dict[EndpointGroup, GroupSummary],
+    ) -> tuple[int, int]:
         covered = 0
         total = 0
         for group in groups:
-            covered += self._covered_response_count(group)
-            total += len(group.responses)
+            covered += summaries[group].covered_count
+            total += summaries[group].total_count
         return covered, total
 
-    def _count_group_status(self, groups: list[EndpointGroup]) -> dict[str, int]:
+    def _count_group_status(
+        self,
+        groups: list[EndpointGroup],
+        summaries: dict[EndpointGroup, GroupSummary],
+    ) -> dict[str, int]:
         counts = {"covered": 0, "partial": 0, "uncovered": 0}
         for group in groups:
-            covered = self._covered_response_count(group)
-            total = len(group.responses)
-            label = self._coverage_label(covered, total)
+            label = summaries[group].label
             if label == "covered":
                 counts["covered"] += 1
             elif label == "uncovered" or label == "none":
@@ -166,32 +196,41 @@ class HtmlReporter:
                 counts["partial"] += 1
         return counts
 
-    def _serialize_group(self, group: EndpointGroup) -> dict[str, object]:
-        covered_count = self._covered_response_count(group)
-        total_count = len(group.responses)
+    def _summarize(self, group: EndpointGroup) -> GroupSummary:
+        covered = self.coverage.covered
         responses = [
             {
                 "code": code,
                 "description": description,
                 "status": (
                     "covered"
-                    if (group.method, group.path, code) in self.coverage.covered
+                    if (group.method, group.path, code) in covered
                     else "uncovered"
                 ),
             }
             for code, description in group.responses
         ]
-        return {
-            "method": group.method,
-            "method_lower": group.method.lower(),
-            "path": group.path,
-            "summary": group.summary,
-            "covered_count": covered_count,
-            "total_count": total_count,
-            "coverage_status": self._coverage_status(covered_count, total_count),
-            "coverage_label": self._coverage_label(covered_count, total_count),
-            "responses": responses,
-        }
+        covered_count = sum(
+            1 for response in responses if response["status"] == "covered"
+        )
+        total_count = len(group.responses)
+        label = self._coverage_label(covered_count, total_count)
+        return GroupSummary(
+            covered_count=covered_count,
+            total_count=total_count,
+            label=label,
+            serialized={
+                "method": group.method,
+                "method_lower": group.method.lower(),
+                "path": group.path,
+                "summary": group.summary,
+                "covered_count": covered_count,
+                "total_count": total_count,
+                "coverage_status": self._coverage_status(covered_count, total_count),
+                "coverage_label": label,
+                "responses": responses,
+            },
+        )
 
     def _group_sort_key(self, group: EndpointGroup) -> tuple[int, str]:
         return (self._method_rank(group.method), group.path)
@@ -209,13 +248,6 @@ class HtmlReporter:
         }
         return order.get(method.upper(), 99)
 
-    def _covered_response_count(self, group: EndpointGroup) -> int:
-        return sum(
-            1
-            for code, _ in group.responses
-            if (group.method, group.path, code) in self.coverage.covered
-        )
-
     def _coverage_status(self, covered: int, total: int) -> str:
         if total == 0 or covered == 0:
             return "uncovered"
@@ -232,14 +264,14 @@ class HtmlReporter:
             return "uncovered"
         return "partial"
 
-    def _template(self) -> Template:
-        template_dir = Path(__file__).parent / "templates"
-        env = Environment(
-            loader=FileSystemLoader(template_dir),
-            autoescape=select_autoescape(
-                enabled_extensions=("html", "htm", "xml", "j2")
-            ),
-            trim_blocks=True,
-            lstrip_blocks=True,
-        )
-        return env.get_template("html_report.html.j2")
+
+@lru_cache(maxsize=1)
+def _template() -> Template:
+    template_dir = Path(__file__).parent / "templates"
+    env = Environment(
+        loader=FileSystemLoader(template_dir),
+        autoescape=select_autoescape(enabled_extensions=("html", "htm", "xml", "j2")),
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    return env.get_template("html_report.html.j2")
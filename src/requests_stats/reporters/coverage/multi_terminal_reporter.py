@@ -0,0 +1,35 @@
+from requests_stats.core.multi_coverage import MultiCoverage
+from requests_stats.reporters.coverage.terminal_reporter import TerminalReporter
+
+
+class MultiTerminalReporter:
+    """One section per service, followed by the traffic nobody claimed."""
+
+    def __init__(self, coverage: MultiCoverage) -> None:
+        self.coverage = coverage
+
+    def render(self) -> str:
+        sections = []
+        for spec, coverage in self.coverage.coverages.items():
+            hosts = ", ".join(
+                f"{route.host}{route.path_prefix}"
+                for route in self.coverage.routes
+                if route.spec == spec
+            )
+            covered = len(coverage.covered)
+            total = covered + len(coverage.uncovered)
+            percent = covered / total * 100 if total else 0.0
+            sections.append(
+                f"{spec} ({hosts}): {covered} of {total} operations/responses"
+                f" covered ({percent:.1f}%)\n{TerminalReporter(coverage).render()}"
+            )
+        if self.coverage.unrouted:
+            lines = "\n".join(
+                f"    {host or '(no host)'}: {count:,.0f}"
+                for host, count in sorted(self.coverage.unrouted.items())
+            )
+            sections.append(f"Requests to hosts without a specification:\n{lines}\n")
+        return "\n".join(sections)
+
+    def create(self) -> None:
+        print(self.render())
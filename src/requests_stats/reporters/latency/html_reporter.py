@@ -0,0 +1,57 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+
+from requests_stats.core import profiling
+from requests_stats.core.latency import Latency
+from requests_stats.reporters.latency.terminal_reporter import COLUMNS, format_values
+
+
+class HtmlReporter:
+    def __init__(self, latency: Latency) -> None:
+        self.latency = latency
+
+    def create(self, output: Path) -> None:
+        with profiling.stage("render html"):
+            with profiling.stage("report context"):
+                context = self._context()
+            with output.open("w", encoding="utf-8") as file:
+                file.writelines(_template().generate(**context))
+
+    def render(self) -> str:
+        with profiling.stage("render html"):
+            with profiling.stage("report context"):
+                context = self._context()
+            return _template().render(**context)
+
+    def _context(self) -> dict[str, Any]:
+        rows = [
+            {
+                "method": stats.method,
+                "method_lower": stats.method.lower(),
+                "path": stats.path,
+                "code": stats.response_code,
+                "error": stats.response_code >= 400,
+                "cells": format_values(stats),
+            }
+            for stats in self.latency.stats()
+        ]
+        return {
+            "columns": COLUMNS,
+            "rows": rows,
+            "accuracy": f"{self.latency.relative_accuracy * 100:g}",
+        }
+
+
+@lru_cache(maxsize=1)
+def _template() -> Template:
+    template_dir = Path(__file__).parent / "templates"
+    env = Environment(
+        loader=FileSystemLoader(template_dir),
+        autoescape=select_autoescape(enabled_extensions=("html", "htm", "xml", "j2")),
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    return env.get_template("latency_report.html.j2")
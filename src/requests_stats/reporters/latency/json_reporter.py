@@ -0,0 +1,23 @@
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+from requests_stats.core.latency import Latency
+
+
+class JsonReporter:
+    def __init__(self, latency: Latency) -> None:
+        self.latency = latency
+
+    def create(self, output: Path) -> None:
+        output.write_text(self.render(), encoding="utf-8")
+
+    def render(self) -> str:
+        return json.dumps(
+            {
+                "unit": "seconds",
+                "relative_accuracy": self.latency.relative_accuracy,
+                "endpoints": [asdict(stats) for stats in self.latency.stats()],
+            },
+            indent=2,
+        )
@@ -0,0 +1,46 @@
+from requests_stats.core.latency import Latency, LatencyStats
+
+COLUMNS = ("count", "mean", "min", "p50", "p90", "p95", "p99", "p99.9", "max")
+
+
+def format_values(stats: LatencyStats) -> tuple[str, ...]:
+    """Format the values for ``COLUMNS``, durations in milliseconds."""
+    durations = (
+        stats.mean,
+        stats.min,
+        stats.p50,
+        stats.p90,
+        stats.p95,
+        stats.p99,
+        stats.p999,
+        stats.max,
+    )
+    return (f"{stats.count:,.0f}", *(f"{value * 1000:.2f}" for value in durations))
+
+
+class TerminalReporter:
+    def __init__(self, latency: Latency) -> None:
+        self.latency = latency
+
+    def render(self) -> str:
+        stats = self.latency.stats()
+        if not stats:
+            return "No recordings\n"
+        rows = [
+            (f"{s.method} {s.path} {s.response_code}", *format_values(s)) for s in stats
+        ]
+        header = ("endpoint", *COLUMNS)
+        widths = [
+            max(len(row[i]) for row in (header, *rows)) for i in range(len(header))
+        ]
+        lines = [
+            "  ".join(
+                cell.ljust(width) if i == 0 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(row, widths, strict=True))
+            )
+            for row in (header, *rows)
+        ]
+        return "Response times in milliseconds:\n\n" + "\n".join(lines) + "\n"
+
+    def create(self) -> None:
+        print(self.render())
@@ -0,0 +1,29 @@
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+from requests_stats.core.pool_metrics import PoolMetrics
+
+
+class JsonReporter:
+    def __init__(self, metrics: PoolMetrics) -> None:
+        self.metrics = metrics
+
+    def create(self, output: Path) -> None:
+        output.write_text(self.render(), encoding="utf-8")
+
+    def render(self) -> str:
+        return json.dumps(
+            {
+                "unit": "seconds",
+                "hosts": [
+                    {
+                        **asdict(stats),
+                        "wait_mean": stats.wait_mean,
+                        "suggested_maxsize": stats.suggested_maxsize,
+                    }
+                    for stats in self.metrics.stats()
+                ],
+            },
+            indent=2,
+        )
@@ -0,0 +1,69 @@
+from requests_stats.core.pool_metrics import PoolMetrics, PoolStats
+
+COLUMNS = (
+    "maxsize",
+    "active",
+    "idle",
+    "peak",
+    "acquired",
+    "new",
+    "reused",
+    "exhausted",
+    "discarded",
+    "wait mean",
+    "wait max",
+    "suggested",
+)
+
+
+def format_values(stats: PoolStats) -> tuple[str, ...]:
+    """Format the values for ``COLUMNS``, waits in milliseconds."""
+    maxsize = f"{stats.maxsize}{' (block)' if stats.block else ''}"
+    counts = (
+        stats.active,
+        stats.idle,
+        stats.peak_active,
+        stats.acquired,
+        stats.new,
+        stats.reused,
+        stats.exhausted,
+        stats.discarded,
+    )
+    return (
+        maxsize,
+        *(f"{count:,}" for count in counts),
+        f"{stats.wait_mean * 1000:.2f}",
+        f"{stats.wait_max * 1000:.2f}",
+        str(stats.suggested_maxsize),
+    )
+
+
+class TerminalReporter:
+    def __init__(self, metrics: PoolMetrics) -> None:
+        self.metrics = metrics
+
+    def render(self) -> str:
+        stats = self.metrics.stats()
+        if not stats:
+            return "No connections\n"
+        rows = [(s.host, *format_values(s)) for s in stats]
+        header = ("host", *COLUMNS)
+        widths = [
+            max(len(row[i]) for row in (header, *rows)) for i in range(len(header))
+        ]
+        lines = [
+            "  ".join(
+                cell.ljust(width) if i == 0 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(row, widths, strict=True))
+            )
+            for row in (header, *rows)
+        ]
+        return (
+            "Connection pools, waits in milliseconds,"
+            " suggested pool_maxsize from the peak of active connections:\n\n"
+            + "\n".join(lines)
+            + "\n"
+        )
+
+    def create(self) -> None:
+        print(self.render())
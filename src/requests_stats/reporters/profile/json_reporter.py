@@ -0,0 +1,26 @@
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+from requests_stats.core.profiling import Profiler
+
+
+class JsonReporter:
+    def __init__(self, profiler: Profiler) -> None:
+        self.profiler = profiler
+
+    def create(self, output: Path) -> None:
+        output.write_text(self.render(), encoding="utf-8")
+
+    def render(self) -> str:
+        return json.dumps(
+            {
+                "unit": "seconds",
+                "memory_unit": "bytes",
+                "stages": [
+                    {"name": stats.name, **asdict(stats)}
+                    for stats in self.profiler.stats()
+                ],
+            },
+            indent=2,
+        )
@@ -0,0 +1,44 @@
+import sys
+
+from requests_stats.core.profiling import Profiler, StageStats
+
+COLUMNS = ("calls", "rows", "total s", "self s", "peak MiB")
+
+
+def format_values(stats: StageStats) -> tuple[str, ...]:
+    """Format the values for ``COLUMNS``, memory in MiB."""
+    return (
+        f"{stats.calls:,}",
+        f"{stats.rows:,}" if stats.rows else "-",
+        f"{stats.seconds:.3f}",
+        f"{stats.self_seconds:.3f}",
+        "-" if stats.peak_memory is None else f"{stats.peak_memory / 2**20:.1f}",
+    )
+
+
+class TerminalReporter:
+    def __init__(self, profiler: Profiler) -> None:
+        self.profiler = profiler
+
+    def render(self) -> str:
+        stats = self.profiler.stats()
+        if not stats:
+            return "No stages recorded\n"
+        # nested stages are indented below the stage they ran in
+        rows = [("  " * (len(s.path) - 1) + s.name, *format_values(s)) for s in stats]
+        header = ("stage", *COLUMNS)
+        widths = [
+            max(len(row[i]) for row in (header, *rows)) for i in range(len(header))
+        ]
+        lines = [
+            "  ".join(
+                cell.ljust(width) if i == 0 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(row, widths, strict=True))
+            )
+            for row in (header, *rows)
+        ]
+        return "Pipeline stages:\n\n" + "\n".join(lines) + "\n"
+
+    def create(self) -> None:
+        # stderr, so the profile doesn't end up in reports written to stdout
+        print(self.render(), file=sys.stderr)
@@ -0,0 +1,20 @@
+import json
+from collections.abc import Sequence
+from dataclasses import asdict
+from pathlib import Path
+
+from requests_stats.core.rollup import TimeseriesPoint
+
+
+class JsonReporter:
+    def __init__(self, points: Sequence[TimeseriesPoint]) -> None:
+        self.points = points
+
+    def create(self, output: Path) -> None:
+        output.write_text(self.render(), encoding="utf-8")
+
+    def render(self) -> str:
+        return json.dumps(
+            {"unit": "seconds", "points": [asdict(point) for point in self.points]},
+            indent=2,
+        )
@@ -0,0 +1,51 @@
+from collections.abc import Sequence
+from datetime import UTC, datetime
+
+from requests_stats.core.rollup import TimeseriesPoint
+
+COLUMNS = ("count", "errors", "req/s", "mean", "p50", "p95", "p99", "max")
+
+
+def format_values(point: TimeseriesPoint) -> tuple[str, ...]:
+    """Format the values for ``COLUMNS``, durations in milliseconds."""
+    durations = (point.mean, point.p50, point.p95, point.p99, point.max)
+    return (
+        f"{point.count:,.0f}",
+        f"{point.errors:,.0f}",
+        f"{point.requests_per_second:,.1f}",
+        *(f"{value * 1000:.2f}" for value in durations),
+    )
+
+
+class TerminalReporter:
+    def __init__(self, points: Sequence[TimeseriesPoint]) -> None:
+        self.points = points
+
+    def render(self) -> str:
+        if not self.points:
+            return "No rollups\n"
+        rows = [
+            (
+                datetime.fromtimestamp(p.start, UTC).strftime("%Y-%m-%d %H:%M:%S"),
+                *format_values(p),
+            )
+            for p in self.points
+        ]
+        header = ("start (UTC)", *COLUMNS)
+        widths = [
+            max(len(row[i]) for row in (header, *rows)) for i in range(len(header))
+        ]
+        lines = [
+            "  ".join(
+                cell.ljust(width) if i == 0 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(row, widths, strict=True))
+            )
+            for row in (header, *rows)
+        ]
+        return (
+            f"Requests per {self.points[0].width} s bucket,"
+            " response times in milliseconds:\n\n" + "\n".join(lines) + "\n"
+        )
+
+    def create(self) -> None:
+        print(self.render())
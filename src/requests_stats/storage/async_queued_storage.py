@@ -0,0 +1,99 @@
+import asyncio
+from collections.abc import Iterator
+from types import TracebackType
+
+from requests_stats.core.recording import Recording
+from requests_stats.core.base_storage import Storage
+
+
+class AsyncQueuedStorage(Storage):
+    """Hand recordings from asyncio code to another storage in batches.
+
+    ``store()`` never blocks the event loop: it puts the recording on an
+    ``asyncio.Queue`` (dropping it when the queue is full), and a drain task
+    writes batches of up to ``batch_size`` recordings to the wrapped storage
+    in a worker thread. The drain task starts with the first stored
+    recording; await ``aclose()`` (or use ``async with``) to write what is
+    left. Recordings the wrapped storage fails to store are counted in
+    ``failed`` and skipped.
+    """
+
+    def __init__(
+        self, storage: Storage, maxsize: int = 10_000, batch_size: int = 500
+    ) -> None:
+        self.storage = storage
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.failed = 0
+        self.last_error: Exception | None = None
+        self._queue: asyncio.Queue[Recording] = asyncio.Queue(maxsize)
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def store(self, recording: Recording) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+        try:
+            self._queue.put_nowait(recording)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def flush(self) -> None:
+        """Wait until all queued recordings were handed to the storage."""
+        if self._task is not None:
+            await self._queue.join()
+        await asyncio.to_thread(self.storage.persist)
+
+    async def aclose(self) -> None:
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __aenter__(self) -> "AsyncQueuedStorage":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+    def load(self) -> list[Recording]:
+        return self.storage.load()
+
+    def iter_load(self, batch_size: int = 1000) -> Iterator[Recording]:
+        return self.storage.iter_load(batch_size)
+
+    def iter_since(
+        self, checkpoint: int = 0, batch_size: int = 1000
+    ) -> Iterator[tuple[int, Recording]]:
+        return self.storage.iter_since(checkpoint, batch_size)
+
+    async def _drain(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await asyncio.to_thread(self._write, batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: list[Recording]) -> None:
+        for recording in batch:
+            try:
+                self.storage.store(recording)
+            except Exception as exc:  # keep draining, a dead task blocks join()
+                self.failed += 1
+                self.last_error = exc
@@ -0,0 +1,163 @@
+import math
+import threading
+from array import array
+from collections.abc import Iterator
+from typing import Any, NamedTuple
+
+from requests_stats.core.recording import PHASE_FIELDS, PHASES_START, Recording
+from requests_stats.core.base_storage import Storage
+
+STRING_COLUMNS = ("method", "scheme", "netloc", "path", "params", "query")
+_NO_PHASES = (None,) * len(PHASE_FIELDS)
+
+
+class StringDictionary:
+    """Dictionary encoding: every distinct string is kept once."""
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class Columns(NamedTuple):
+    """Zero-copy views on the columns of a ``ColumnarStorage``.
+
+    String columns hold codes into the matching ``dictionaries`` entry.
+    """
+
+    method: memoryview
+    scheme: memoryview
+    netloc: memoryview
+    path: memoryview
+    params: memoryview
+    query: memoryview
+    response_code: memoryview
+    duration: memoryview
+    weight: memoryview
+    timestamp: memoryview
+    dictionaries: dict[str, list[str]]
+
+
+class ColumnarStorage(Storage):
+    """Keep recordings in memory, column by column.
+
+    Strings are dictionary-encoded into ``array('I')`` columns, response
+    codes live in an ``array('H')``, durations, weights and timestamps (NaN
+    when missing) in ``array('d')``, so a recording costs a few dozen bytes
+    instead of a tuple with eight object references and six string objects.
+    Phase timings are rarely captured,
+    they are kept sparsely in ``phases``, keyed by the recording's index.
+    A lock keeps the columns aligned when recordings are stored from several
+    threads.
+    """
+
+    def __init__(self) -> None:
+        self.dictionaries = {name: StringDictionary() for name in STRING_COLUMNS}
+        self.string_columns = {name: array("I") for name in STRING_COLUMNS}
+        self.response_codes = array("H")
+        self.durations = array("d")
+        self.weights = array("d")
+        self.timestamps = array("d")
+        self.phases: dict[int, tuple[Any, ...]] = {}
+        self._lock = threading.Lock()
+
+    def store(self, recording: Recording) -> None:
+        timestamp = recording.timestamp
+        phases = recording[PHASES_START:]
+        with self._lock:
+            for name, value in zip(STRING_COLUMNS, recording[:6], strict=True):
+                self.string_columns[name].append(self.dictionaries[name].encode(value))
+            self.response_codes.append(recording.response_code)
+            self.durations.append(recording.duration)
+            self.weights.append(recording.weight)
+            self.timestamps.append(math.nan if timestamp is None else timestamp)
+            if phases != _NO_PHASES:
+                self.phases[len(self.durations) - 1] = phases
+
+    def load(self) -> list[Recording]:
+        return list(self.iter_load())
+
+    def iter_load(self, batch_size: int = 1000) -> Iterator[Recording]:
+        for _, recording in self.iter_since(0, batch_size):
+            yield recording
+
+    def iter_since(
+        self, checkpoint: int = 0, batch_size: int = 1000
+    ) -> Iterator[tuple[int, Recording]]:
+        strings = [
+            (self.dictionaries[name].values, self.string_columns[name])
+            for name in STRING_COLUMNS
+        ]
+        index = checkpoint
+        while True:
+            # decode a batch at a time under the lock, not while yielding
+            with self._lock:
+                end = min(index + batch_size, len(self.durations))
+                batch = [self._decode(strings, i) for i in range(index, end)]
+            if not batch:
+                return
+            for recording in batch:
+                index += 1
+                yield index, recording
+
+    def columns(self) -> Columns:
+        """Return zero-copy views on all columns.
+
+        The arrays can't grow while a view is alive, release the views
+        (``memoryview.release()``) before storing more recordings.
+        """
+        with self._lock:
+            views = {
+                name: memoryview(self.string_columns[name]) for name in STRING_COLUMNS
+            }
+            return Columns(
+                method=views["method"],
+                scheme=views["scheme"],
+                netloc=views["netloc"],
+                path=views["path"],
+                params=views["params"],
+                query=views["query"],
+                response_code=memoryview(self.response_codes),
+                duration=memoryview(self.durations),
+                weight=memoryview(self.weights),
+                timestamp=memoryview(self.timestamps),
+                dictionaries={
+                    name: self.dictionaries[name].values for name in STRING_COLUMNS
+                },
+            )
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    def _decode(
+        self, strings: list[tuple[list[str], array[int]]], index: int
+    ) -> Recording:
+        method, scheme, netloc, path, params, query = (
+            values[codes[index]] for values, codes in strings
+        )
+        timestamp = self.timestamps[index]
+        recording = Recording(
+            method=method,
+            scheme=scheme,
+            netloc=netloc,
+            path=path,
+            params=params,
+            query=query,
+            response_code=self.response_codes[index],
+            duration=self.durations[index],
+            weight=self.weights[index],
+            timestamp=None if math.isnan(timestamp) else timestamp,
+        )
+        if phases := self.phases.get(index):
+            recording = recording._replace(**dict(zip(PHASE_FIELDS, phases)))
+        return recording
@@ -1,3 +1,5 @@
+from collections.abc import Iterator
+
 from requests_stats.core.recording import Recording
 from requests_stats.core.base_storage import Storage
 
@@ -11,3 +13,12 @@ class InMemoryStorage(Storage):
 
     def load(self) -> list[Recording]:
         return self.recordings
+
+    def iter_load(self, batch_size: int = 1000) -> Iterator[Recording]:
+        return iter(self.recordings)
+
+    def iter_since(
+        self, checkpoint: int = 0, batch_size: int = 1000
+    ) -> Iterator[tuple[int, Recording]]:
+        for position in range(checkpoint, len(self.recordings)):
+            yield position + 1, self.recordings[position]
@@ -0,0 +1,139 @@
+import json
+import mmap
+import os
+import threading
+from collections.abc import Iterator
+from typing import Any
+
+from requests_stats.core.recording import PHASE_FIELDS, PHASES_START, Recording
+from requests_stats.core.base_storage import Storage
+
+
+_NO_PHASES = (None,) * len(PHASE_FIELDS)
+
+
+class JSONLStorage(Storage):
+    """Append recordings to a file, one JSON array per line.
+
+    Writes are buffered and appended without any transactions. The file is
+    opened with ``O_APPEND`` and every flush is a single ``write`` of whole
+    lines, so several processes can append to the same file without
+    interleaving partial lines.
+
+    Reading memory-maps the file and parses it in chunks of lines, a line
+    that is still being written by another process is skipped. Corrupt
+    lines, e.g. of a writer that crashed halfway through one, are skipped
+    and counted in ``corrupt_lines``. Positions (see ``Storage.iter_since``)
+    are byte offsets of the end of a line.
+
+    The file is only created when the first recordings are written, reading
+    a file that doesn't exist yields nothing.
+    """
+
+    def __init__(
+        self, filepath: str = "requests.jsonl", buffer_size: int = 64 * 1024
+    ) -> None:
+        self.filepath = filepath
+        self.buffer_size = buffer_size
+        self.corrupt_lines = 0
+        self._fd: int | None = None
+        self._buffer: list[bytes] = []
+        self._buffered = 0
+        self._lock = threading.Lock()
+
+    def store(self, recording: Recording) -> None:
+        values: tuple[Any, ...] = recording
+        if recording[PHASES_START:] == _NO_PHASES:
+            # keep lines short, missing values fall back to the defaults
+            values = recording[:PHASES_START]
+        line = json.dumps(values, separators=(",", ":")).encode() + b"\n"
+        with self._lock:
+            self._buffer.append(line)
+            self._buffered += len(line)
+            if self._buffered >= self.buffer_size:
+                self._flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def persist(self) -> None:
+        self.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def load(self) -> list[Recording]:
+        return list(self.iter_load())
+
+    def iter_load(self, batch_size: int = 1000) -> Iterator[Recording]:
+        for _, recording in self.iter_since(0, batch_size):
+            yield recording
+
+    def iter_since(
+        self, checkpoint: int = 0, batch_size: int = 1000
+    ) -> Iterator[tuple[int, Recording]]:
+        self.flush()
+        try:
+            file = open(self.filepath, "rb")
+        except FileNotFoundError:
+            return
+        with file:
+            if os.fstat(file.fileno()).st_size <= checkpoint:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield from self._parse(mapped, checkpoint, batch_size)
+
+    def _parse(
+        self, mapped: mmap.mmap, start: int, batch_size: int
+    ) -> Iterator[tuple[int, Recording]]:
+        while True:
+            lines: list[bytes] = []
+            ends: list[int] = []
+            while len(lines) < batch_size:
+                end = mapped.find(b"\n", start)
+                if end < 0:
+                    break  # end of file, or a line that is still being written
+                if end > start:
+                    lines.append(mapped[start:end])
+                    ends.append(end + 1)
+                start = end + 1
+            if not lines:
+                return
+            try:
+                # one json.loads per chunk is a lot cheaper than one per line
+                rows = json.loads(b"[" + b",".join(lines) + b"]")
+                recordings: list[Recording | None] = [Recording(*row) for row in rows]
+                if len(recordings) != len(lines):
+                    raise ValueError("corrupt line")
+            except (ValueError, TypeError):
+                recordings = [_decode(line) for line in lines]
+            for end, recording in zip(ends, recordings, strict=True):
+                if recording is None:
+                    self.corrupt_lines += 1
+                else:
+                    yield end, recording
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        if self._fd is None:
+            self._fd = os.open(
+                self.filepath, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+            )
+        data = memoryview(b"".join(self._buffer))
+        while data:  # regular files only see short writes when the disk is full
+            data = data[os.write(self._fd, data) :]
+        self._buffer = []
+        self._buffered = 0
+
+
+def _decode(line: bytes) -> Recording | None:
+    try:
+        return Recording(*json.loads(line))
+    except (ValueError, TypeError):
+        return None
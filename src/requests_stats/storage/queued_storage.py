@@ -0,0 +1,144 @@
+import atexit
+import queue
+import threading
+from collections.abc import Iterator
+from enum import Enum
+
+from requests_stats.core.recording import Recording
+from requests_stats.core.base_storage import Storage
+
+
+class BackpressurePolicy(Enum):
+    """What to do when a recording is stored while the queue is full."""
+
+    BLOCK = "block"
+    DROP_NEWEST = "drop-newest"
+    DROP_OLDEST = "drop-oldest"
+
+
+class QueuedStorage(Storage):
+    """Hand recordings to another storage on a dedicated writer thread.
+
+    ``store()`` only puts the recording on a bounded queue, so a slow backend
+    does not add to the latency of the requests being recorded. Once the
+    queue holds ``maxsize`` recordings, ``policy`` decides whether ``store()``
+    waits for the writer or drops a recording.
+
+    The writer is a daemon thread. Recordings still queued when the
+    interpreter exits are written by an ``atexit`` hook, unless it doesn't
+    exit normally (``os._exit()``, a fatal signal); ``close()`` when done.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        maxsize: int = 10_000,
+        policy: BackpressurePolicy = BackpressurePolicy.BLOCK,
+    ) -> None:
+        self.storage = storage
+        self.policy = policy
+        self.dropped = 0
+        self.failed = 0
+        self.last_error: Exception | None = None
+        self._queue: queue.Queue[Recording | None] = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        # held while storing and closing, nothing is queued behind the final
+        # None the writer stops at
+        self._closing = threading.Lock()
+        self._closed = False
+        self._pending = 0
+        self._writer = threading.Thread(
+            target=self._drain, name="requests-stats-writer", daemon=True
+        )
+        self._writer.start()
+        atexit.register(self.close)
+
+    @property
+    def pending(self) -> int:
+        """Number of recordings that have not been written or dropped yet."""
+        return self._pending
+
+    def store(self, recording: Recording) -> None:
+        with self._closing:
+            if self._closed:
+                raise RuntimeError("QueuedStorage is closed")
+            with self._lock:
+                self._pending += 1
+            if self.policy is BackpressurePolicy.BLOCK:
+                self._queue.put(recording)
+                return
+            while True:
+                try:
+                    self._queue.put_nowait(recording)
+                    return
+                except queue.Full:
+                    if self.policy is BackpressurePolicy.DROP_NEWEST:
+                        self._count_drop()
+                        return
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    continue
+                self._queue.task_done()
+                self._count_drop()
+
+    def flush(self) -> None:
+        """Wait until the writer has handed every queued recording over."""
+        self._queue.join()
+        self.storage.persist()
+
+    def persist(self) -> None:
+        self.flush()
+
+    def close(self) -> None:
+        """Flush the queue and stop the writer thread.
+
+        ``store()`` raises ``RuntimeError`` from then on.
+        """
+        with self._closing:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        atexit.unregister(self.close)
+        self._writer.join()
+        self.storage.persist()
+
+    def load(self) -> list[Recording]:
+        if not self._closed:
+            self.flush()
+        return self.storage.load()
+
+    def iter_load(self, batch_size: int = 1000) -> Iterator[Recording]:
+        if not self._closed:
+            self.flush()
+        return self.storage.iter_load(batch_size)
+
+    def iter_since(
+        self, checkpoint: int = 0, batch_size: int = 1000
+    ) -> Iterator[tuple[int, Recording]]:
+        if not self._closed:
+            self.flush()
+        return self.storage.iter_since(checkpoint, batch_size)
+
+    def _count_drop(self) -> None:
+        with self._lock:
+            self.dropped += 1
+            self._pending -= 1
+
+    def _drain(self) -> None:
+        while True:
+            recording = self._queue.get()
+            try:
+                if recording is None:
+                    return
+                self.storage.store(recording)
+            except Exception as exc:  # keep draining, a dead writer blocks join()
+                with self._lock:
+                    self.failed += 1
+                    self.last_error = exc
+            finally:
+                if recording is not None:
+                    with self._lock:
+                        self._pending -= 1
+                self._queue.task_done()
@@ -0,0 +1,150 @@
+import json
+import sqlite3
+from collections.abc import Iterator
+
+from requests_stats.core.rollup import Rollup, RollupBucket
+from requests_stats.core.sketch import LatencySketch
+
+
+class RollupStorage:
+    """Keep the buckets of a ``Rollup`` in an SQLite ``rollups`` table.
+
+    One row per width, bucket start, method and path template, with the
+    latency sketch as JSON. ``rollup_state`` holds the position in the
+    recording up to which it has been rolled up, and what the rollup was
+    configured with (``meta``), so a later run can continue from there.
+    """
+
+    def __init__(self, filepath: str = "rollups.db") -> None:
+        self.connection = sqlite3.connect(filepath)
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS rollups("
+                "width INTEGER, start INTEGER, method TEXT, path TEXT,"
+                " count REAL, errors REAL, sketch TEXT,"
+                " PRIMARY KEY (width, start, method, path)) WITHOUT ROWID"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS rollup_state(name TEXT PRIMARY KEY, value)"
+            )
+
+    @property
+    def checkpoint(self) -> int:
+        value = self._state("checkpoint")
+        return 0 if value is None else int(value)
+
+    @property
+    def meta(self) -> str | None:
+        return self._state("meta")
+
+    def reset(self, meta: str) -> None:
+        """Drop all buckets, e.g. because the specification changed."""
+        with self.connection:
+            self.connection.execute("DELETE FROM rollups")
+            self.connection.execute("DELETE FROM rollup_state")
+            self._set_state("meta", meta)
+
+    def save(self, rollup: Rollup) -> int:
+        """Merge the buckets of ``rollup`` into the stored ones and clear them.
+
+        Returns the number of buckets written.
+        """
+        written = 0
+        with self.connection:
+            for bucket in rollup.buckets.values():
+                row = self.connection.execute(
+                    "SELECT count, errors, sketch FROM rollups"
+                    " WHERE width = ? AND start = ? AND method = ? AND path = ?",
+                    (bucket.width, bucket.start, bucket.method, bucket.path),
+                ).fetchone()
+                if row is not None:
+                    bucket.merge(_bucket(bucket.width, bucket.start, "", "", *row))
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        bucket.width,
+                        bucket.start,
+                        bucket.method,
+                        bucket.path,
+                        bucket.count,
+                        bucket.errors,
+                        json.dumps(bucket.sketch.to_dict(), separators=(",", ":")),
+                    ),
+                )
+                written += 1
+            self._set_state("checkpoint", rollup.checkpoint)
+        rollup.buckets = {}
+        return written
+
+    def widths(self) -> list[int]:
+        return [
+            width
+            for (width,) in self.connection.execute(
+                "SELECT DISTINCT width FROM rollups ORDER BY width"
+            )
+        ]
+
+    def read(
+        self,
+        width: int,
+        method: str | None = None,
+        path: str | None = None,
+        since: int | None = None,
+        until: int | None = None,
+    ) -> Iterator[RollupBucket]:
+        """Yield the buckets of one width in time order, optionally filtered."""
+        conditions = ["width = ?"]
+        parameters: list[object] = [width]
+        for condition, value in (
+            ("method = ?", method.upper() if method else None),
+            ("path = ?", path),
+            ("start >= ?", since),
+            ("start < ?", until),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+        cursor = self.connection.execute(
+            "SELECT width, start, method, path, count, errors, sketch FROM rollups"
+            f" WHERE {' AND '.join(conditions)} ORDER BY start",
+            parameters,
+        )
+        try:
+            for row in cursor:
+                yield _bucket(*row)
+        finally:
+            cursor.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _state(self, name: str) -> str | None:
+        row = self.connection.execute(
+            "SELECT value FROM rollup_state WHERE name = ?", (name,)
+        ).fetchone()
+        return None if row is None else str(row[0])
+
+    def _set_state(self, name: str, value: str | int) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO rollup_state VALUES (?, ?)", (name, value)
+        )
+
+
+def _bucket(
+    width: int,
+    start: int,
+    method: str,
+    path: str,
+    count: float,
+    errors: float,
+    sketch: str,
+) -> RollupBucket:
+    return RollupBucket(
+        width,
+        start,
+        method,
+        path,
+        count,
+        errors,
+        LatencySketch.from_dict(json.loads(sketch)),
+    )
@@ -0,0 +1,220 @@
+import os
+import sqlite3
+import threading
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from pathlib import Path
+
+from requests_stats.core.recording import Recording, RecordingAggregate
+from requests_stats.core.base_storage import AggregatingStorage
+from requests_stats.storage.sqlite_schema import (
+    LOOKUP_COLUMNS,
+    STORED_COLUMNS,
+    check_version,
+)
+from requests_stats.storage.sqlite_storage import SQLiteStorage
+
+
+def worker_id() -> str:
+    """Identify the current worker: the pytest-xdist worker id or the pid."""
+    return os.environ.get("PYTEST_XDIST_WORKER") or f"pid{os.getpid()}"
+
+
+class ShardedSQLiteStorage(AggregatingStorage):
+    """Write one SQLite shard per worker into a directory.
+
+    Every process (or pytest-xdist worker) writes to its own
+    ``<worker id>.db``, so parallel test runs no longer contend for SQLite's
+    write lock. Reading treats all shards in the directory as one storage;
+    use ``merge_shards`` to combine them into a single file.
+
+    Positions are only meaningful within a shard, so incremental reads
+    (``iter_since`` or ``aggregate`` with a checkpoint) are not supported.
+    Shards are opened while reading, call ``check()`` first to find shards
+    written by a newer version.
+    """
+
+    def __init__(
+        self,
+        directory: str = "requests.shards",
+        batch_size: int = 1,
+        flush_interval: float | None = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._writer: SQLiteStorage | None = None
+        self._writer_pid = 0
+        # opening the writer, one per process; the writer locks itself
+        self._lock = threading.Lock()
+
+    def shards(self) -> list[Path]:
+        return sorted(self.directory.glob("*.db"))
+
+    def check(self) -> None:
+        """Raise ``ValueError`` naming a shard too new for this version."""
+        for path in self.shards():
+            connection = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+            try:
+                check_version(connection)
+            except ValueError as error:
+                raise ValueError(f"shard {path}: {error}") from None
+            finally:
+                connection.close()
+
+    def store(self, recording: Recording) -> None:
+        writer = self._writer
+        if writer is None or self._writer_pid != os.getpid():
+            writer = self._open_writer()
+        writer.store(recording)
+
+    def persist(self) -> None:
+        if self._writer is not None:
+            self._writer.persist()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def load(self) -> list[Recording]:
+        return list(self.iter_load())
+
+    def iter_load(self, batch_size: int = 1000) -> Iterator[Recording]:
+        for shard in self._readers():
+            yield from shard.iter_load(batch_size)
+
+    def iter_since(
+        self, checkpoint: int = 0, batch_size: int = 1000
+    ) -> Iterator[tuple[int, Recording]]:
+        _check_no_checkpoint(checkpoint)
+        return enumerate(self.iter_load(batch_size), start=1)
+
+    def aggregate(
+        self,
+        checkpoint: int = 0,
+        duration_log_base: float | None = None,
+        path_map: Mapping[str, str] | Callable[[str], str] | None = None,
+        by_netloc: bool = False,
+    ) -> Iterator[RecordingAggregate]:
+        _check_no_checkpoint(checkpoint)
+        for shard in self._readers():
+            yield from shard.aggregate(
+                duration_log_base=duration_log_base,
+                path_map=path_map,
+                by_netloc=by_netloc,
+            )
+
+    def _open_writer(self) -> SQLiteStorage:
+        with self._lock:
+            if self._writer is None or self._writer_pid != os.getpid():
+                # (re)open after a fork, the child must not share the connection
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._writer = SQLiteStorage(
+                    filepath=str(self.directory / f"{worker_id()}.db"),
+                    batch_size=self.batch_size,
+                    flush_interval=self.flush_interval,
+                )
+                self._writer_pid = os.getpid()
+            return self._writer
+
+    def _readers(self) -> Iterator[SQLiteStorage]:
+        self.persist()
+        for path in self.shards():
+            reader = SQLiteStorage(filepath=str(path), read_only=True)
+            try:
+                yield reader
+            finally:
+                reader.close()
+
+
+def merge_shards(sources: Iterable[Path], target: Path) -> int:
+    """Copy all recordings from the ``sources`` databases into ``target``.
+
+    Rows are copied inside SQLite with ``ATTACH`` and ``INSERT ... SELECT``,
+    one transaction per shard, re-encoding the lookup ids of the shard into
+    the ones of the target. Shards of an older schema version are migrated
+    first, compacted groups are merged into the ones of the target, their
+    positions moved onto the ids the shard's recordings got in the target.
+    Returns the number of copied recordings.
+    """
+    storage = SQLiteStorage(filepath=str(target))
+    connection = storage.connection
+    selected = ", ".join(
+        f"target_{LOOKUP_COLUMNS[name]}.id"
+        if name in LOOKUP_COLUMNS
+        else f"shard_requests.{name}"
+        for name in Recording._fields
+    )
+    joins = "".join(
+        f" JOIN shard.{table} AS shard_{table}"
+        f" ON shard_{table}.id = shard_requests.{column}_id"
+        f" JOIN main.{table} AS target_{table}"
+        f" ON target_{table}.value = shard_{table}.value"
+        for column, table in LOOKUP_COLUMNS.items()
+    )
+    copied = 0
+    try:
+        for source in sources:
+            shard = SQLiteStorage(filepath=str(source))
+            compacted = list(shard.compacted())
+            shard.close()
+            connection.execute("ATTACH DATABASE ? AS shard", (str(source),))
+            try:
+                with connection:
+                    for table in LOOKUP_COLUMNS.values():
+                        connection.execute(
+                            f"INSERT OR IGNORE INTO main.{table}(value)"
+                            f" SELECT value FROM shard.{table} ORDER BY id"
+                        )
+                    base = connection.execute(
+                        "SELECT COALESCE(MAX(id), 0) FROM main.requests"
+                    ).fetchone()[0]
+                    cursor = connection.execute(
+                        f"INSERT INTO main.requests ({', '.join(STORED_COLUMNS)})"
+                        f" SELECT {selected}"
+                        f" FROM shard.requests AS shard_requests{joins}"
+                        " ORDER BY shard_requests.id"
+                    )
+                    copied += cursor.rowcount
+                    compacted = [
+                        group._replace(
+                            first_position=_rebase(
+                                connection, base, cursor.rowcount, group.first_position
+                            ),
+                            last_position=_rebase(
+                                connection, base, cursor.rowcount, group.last_position
+                            ),
+                        )
+                        for group in compacted
+                    ]
+            finally:
+                connection.execute("DETACH DATABASE shard")
+            storage.merge_compacted(compacted)
+    finally:
+        storage.close()
+    return copied
+
+
+def _rebase(
+    connection: sqlite3.Connection, base: int, copied: int, position: int
+) -> int:
+    """Translate a position of the attached shard into one of the target.
+
+    The shard's recordings were appended in order after ``base``; positions
+    are clamped to the ids they got, so checkpoints taken from compacted
+    groups never skip recordings of the target.
+    """
+    if not copied:
+        return max(base, 1)
+    rank: int = connection.execute(
+        "SELECT COUNT(*) FROM shard.requests WHERE id <= ?", (position,)
+    ).fetchone()[0]
+    return base + min(max(rank, 1), copied)
+
+
+def _check_no_checkpoint(checkpoint: int) -> None:
+    if checkpoint:
+        raise ValueError(
+            "incremental reads are not supported for shards, merge them first"
+        )
@@ -0,0 +1,196 @@
+import sqlite3
+from collections.abc import Callable
+
+from requests_stats.core.recording import Recording
+
+# bumped by every entry of MIGRATIONS, stored in PRAGMA user_version
+SCHEMA_VERSION = 3
+
+# dictionary-encoded columns, each value is kept once in a table of its name
+LOOKUP_COLUMNS = {
+    "method": "methods",
+    "scheme": "schemes",
+    "netloc": "netlocs",
+    "path": "paths",
+}
+
+# the columns of a recording as created by version 1, in the order of
+# Recording's fields; frozen, a field added to Recording gets its column in
+# a migration of its own
+_COLUMNS_1 = {
+    "method": "INTEGER NOT NULL REFERENCES methods(id)",
+    "scheme": "INTEGER NOT NULL REFERENCES schemes(id)",
+    "netloc": "INTEGER NOT NULL REFERENCES netlocs(id)",
+    "path": "INTEGER NOT NULL REFERENCES paths(id)",
+    "params": "TEXT NOT NULL DEFAULT ''",
+    "query": "TEXT NOT NULL DEFAULT ''",
+    "response_code": "INTEGER NOT NULL",
+    "duration": "REAL NOT NULL",
+    "weight": "REAL NOT NULL DEFAULT 1.0",
+    "timestamp": "REAL",
+    "pool_wait": "REAL",
+    "connection_reused": "INTEGER",
+    "connect": "REAL",
+    "tls_handshake": "REAL",
+    "ttfb": "REAL",
+    "download": "REAL",
+    "request_bytes": "INTEGER",
+    "response_bytes": "INTEGER",
+}
+
+# the columns of the requests table after the last migration, in the order
+# of Recording's fields
+STORED_COLUMNS = tuple(
+    f"{name}_id" if name in LOOKUP_COLUMNS else name for name in Recording._fields
+)
+
+# defaults for columns the unversioned layout gained over time
+_LEGACY_DEFAULTS = {"weight": "1.0"}
+
+# a recording with its position, the lookup columns as ids
+SELECT_RECORDINGS = f"SELECT id, {', '.join(STORED_COLUMNS)} FROM requests"
+INSERT_RECORDING = (
+    f"INSERT INTO requests ({', '.join(STORED_COLUMNS)})"
+    f" VALUES ({', '.join('?' for _ in STORED_COLUMNS)})"
+)
+# the access pattern of Coverage and Latency: group by endpoint, bucket the
+# durations; weight and netloc make the index covering, also when grouping
+# by host
+ENDPOINT_INDEX = (
+    "CREATE INDEX IF NOT EXISTS requests_by_endpoint"
+    " ON requests(method_id, path_id, response_code, duration, weight, netloc_id)"
+)
+
+
+def schema_version(connection: sqlite3.Connection) -> int:
+    version: int = connection.execute("PRAGMA user_version").fetchone()[0]
+    return version
+
+
+def check_version(connection: sqlite3.Connection) -> None:
+    """Raise ``ValueError`` if the database is newer than ``SCHEMA_VERSION``.
+
+    Older databases can be read once migrated, see ``migrate``.
+    """
+    version = schema_version(connection)
+    if version > SCHEMA_VERSION:
+        raise ValueError(
+            f"database schema version {version} is newer than {SCHEMA_VERSION},"
+            " upgrade requests-stats"
+        )
+
+
+def migrate(connection: sqlite3.Connection) -> tuple[int, int]:
+    """Bring the database up to ``SCHEMA_VERSION``, one transaction per step.
+
+    Returns the versions before and after. Databases of a newer version are
+    left alone and raise ``ValueError``.
+    """
+    check_version(connection)
+    before = schema_version(connection)
+    for version in range(before, SCHEMA_VERSION):
+        with connection:
+            # BEGIN IMMEDIATE so two processes don't migrate at the same time
+            connection.execute("BEGIN IMMEDIATE")
+            if schema_version(connection) != version:
+                continue  # migrated by another process meanwhile
+            MIGRATIONS[version](connection)
+            connection.execute(f"PRAGMA user_version = {version + 1}")
+    return before, schema_version(connection)
+
+
+def _migrate_to_1(connection: sqlite3.Connection) -> None:
+    """Untyped ``requests`` table of string columns to lookup tables."""
+    legacy = {row[1] for row in connection.execute("PRAGMA table_info(requests)")}
+    if legacy:
+        connection.execute("ALTER TABLE requests RENAME TO legacy_requests")
+        connection.execute("DROP INDEX IF EXISTS requests_by_endpoint")
+    for table in LOOKUP_COLUMNS.values():
+        connection.execute(
+            f"CREATE TABLE {table}(id INTEGER PRIMARY KEY, value TEXT NOT NULL UNIQUE)"
+        )
+    names = [f"{name}_id" if name in LOOKUP_COLUMNS else name for name in _COLUMNS_1]
+    columns = ", ".join(
+        f"{stored} {definition}"
+        for stored, definition in zip(names, _COLUMNS_1.values(), strict=True)
+    )
+    # the rowid alias keeps positions (see Storage.iter_since) stable
+    connection.execute(f"CREATE TABLE requests(id INTEGER PRIMARY KEY, {columns})")
+    if not legacy:
+        return
+    for column, table in LOOKUP_COLUMNS.items():
+        connection.execute(
+            f"INSERT INTO {table}(value)"
+            f" SELECT DISTINCT COALESCE({column}, '') FROM legacy_requests"
+        )
+    selected = ", ".join(
+        f"{LOOKUP_COLUMNS[name]}.id"
+        if name in LOOKUP_COLUMNS
+        else f"COALESCE(legacy_requests.{name}, '')"
+        if name in ("params", "query")
+        else f"legacy_requests.{name}"
+        if name in legacy
+        else _LEGACY_DEFAULTS.get(name, "NULL")
+        for name in _COLUMNS_1
+    )
+    joins = "".join(
+        f" JOIN {table} ON {table}.value = COALESCE(legacy_requests.{column}, '')"
+        for column, table in LOOKUP_COLUMNS.items()
+    )
+    connection.execute(
+        f"INSERT INTO requests (id, {', '.join(names)})"
+        f" SELECT legacy_requests.rowid, {selected} FROM legacy_requests{joins}"
+    )
+    connection.execute("DROP TABLE legacy_requests")
+
+
+def _migrate_to_2(connection: sqlite3.Connection) -> None:
+    """Add ``compacted``, one row of folded recordings per group."""
+    # the columns of RecordingAggregate, with the sketch as JSON
+    connection.execute(
+        "CREATE TABLE compacted("
+        "method_id INTEGER NOT NULL REFERENCES methods(id),"
+        " path_id INTEGER NOT NULL REFERENCES paths(id),"
+        " response_code INTEGER NOT NULL, request_count INTEGER NOT NULL,"
+        " duration_sum REAL NOT NULL, duration_min REAL NOT NULL,"
+        " duration_max REAL NOT NULL, first_position INTEGER NOT NULL,"
+        " last_position INTEGER NOT NULL, weight_sum REAL NOT NULL,"
+        " sketch TEXT NOT NULL,"
+        " PRIMARY KEY (method_id, path_id, response_code)) WITHOUT ROWID"
+    )
+
+
+def _migrate_to_3(connection: sqlite3.Connection) -> None:
+    """Key compacted groups by host as well, so they can be told apart by service."""
+    connection.execute("ALTER TABLE compacted RENAME TO compacted_2")
+    connection.execute(
+        "CREATE TABLE compacted("
+        "method_id INTEGER NOT NULL REFERENCES methods(id),"
+        " netloc_id INTEGER NOT NULL REFERENCES netlocs(id),"
+        " path_id INTEGER NOT NULL REFERENCES paths(id),"
+        " response_code INTEGER NOT NULL, request_count INTEGER NOT NULL,"
+        " duration_sum REAL NOT NULL, duration_min REAL NOT NULL,"
+        " duration_max REAL NOT NULL, first_position INTEGER NOT NULL,"
+        " last_position INTEGER NOT NULL, weight_sum REAL NOT NULL,"
+        " sketch TEXT NOT NULL,"
+        " PRIMARY KEY (method_id, netloc_id, path_id, response_code)) WITHOUT ROWID"
+    )
+    # groups compacted before were folded across hosts
+    connection.execute("INSERT OR IGNORE INTO netlocs(value) VALUES ('')")
+    connection.execute(
+        "INSERT INTO compacted SELECT method_id,"
+        " (SELECT id FROM netlocs WHERE value = ''), path_id, response_code,"
+        " request_count, duration_sum, duration_min, duration_max,"
+        " first_position, last_position, weight_sum, sketch FROM compacted_2"
+    )
+    connection.execute("DROP TABLE compacted_2")
+    # recreated on first use with netloc_id, see ENDPOINT_INDEX
+    connection.execute("DROP INDEX IF EXISTS requests_by_endpoint")
+
+
+# MIGRATIONS[n] upgrades a database from version n to n + 1
+MIGRATIONS: list[Callable[[sqlite3.Connection], None]] = [
+    _migrate_to_1,
+    _migrate_to_2,
+    _migrate_to_3,
+]
@@ -1,36 +1,536 @@
+import itertools
+import json
+import math
 import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from pathlib import Path
 
-from requests_stats.core.recording import Recording
-from requests_stats.core.base_storage import Storage
+from requests_stats.core.recording import Recording, RecordingAggregate
+from requests_stats.core.base_storage import AggregatingStorage
+from requests_stats.core.latency import fold_aggregate
+from requests_stats.core.sketch import LatencySketch
+from requests_stats.storage.sqlite_schema import (
+    ENDPOINT_INDEX,
+    INSERT_RECORDING,
+    LOOKUP_COLUMNS,
+    SCHEMA_VERSION,
+    SELECT_RECORDINGS,
+    check_version,
+    migrate,
+    schema_version,
+)
 
+_LOOKUP_INDEXES = tuple(Recording._fields.index(name) for name in LOOKUP_COLUMNS)
+# the columns of a compacted group after method, path and response code
+_COMPACTED_VALUES = (
+    "request_count, duration_sum, duration_min, duration_max,"
+    " first_position, last_position, weight_sum, sketch"
+)
 
-class SQLiteStorage(Storage):
-    def __init__(self, filepath: str = "requests.db") -> None:  # TODO: make pathlike
-        self.connection = sqlite3.connect(filepath)
+
+class SQLiteStorage(AggregatingStorage):
+    """Store recordings in an SQLite database.
+
+    By default every recording is committed right away. With ``batch_size``
+    greater than one, recordings are buffered and written with a single
+    ``executemany`` in one transaction once ``batch_size`` recordings are
+    pending or ``flush_interval`` seconds have passed since the last flush.
+    The time threshold is checked whenever a new recording is stored, so call
+    ``persist()`` or ``close()`` to write whatever is left.
+
+    ``aggregate()`` groups recordings inside SQLite on a covering index, which
+    is created on first use so it doesn't slow down recording.
+
+    The schema is versioned (see ``sqlite_schema``): method, scheme, host and
+    path are stored once in lookup tables and referenced by id. Databases of
+    an older version are migrated when they are opened.
+
+    With ``read_only`` the file is opened read-only and left exactly as it
+    is: the journal mode is kept and ``aggregate()`` doesn't create its
+    index, that is left to ``requests-stats migrate``. Databases of an older
+    version are copied into a private temporary database, which is migrated
+    instead; the copy is a snapshot and deleted on ``close()``.
+
+    ``compact()`` folds old recordings into one compacted group per method,
+    path and response code, with a ``LatencySketch`` of the durations.
+    ``aggregate()`` yields the compacted groups along with the recordings,
+    ``load()`` and the ``iter_*`` methods only see the recordings. With
+    ``retention`` set, a background thread compacts the recordings older than
+    that many seconds every ``compact_interval`` seconds, on a connection of
+    its own so ``store()`` doesn't wait for it. Errors of a compaction are
+    kept in ``last_compaction_error`` and it is retried at the next interval.
+    """
+
+    def __init__(
+        self,
+        filepath: str = "requests.db",  # TODO: make pathlike
+        batch_size: int = 1,
+        flush_interval: float | None = None,
+        journal_mode: str | None = "WAL",
+        retention: float | None = None,
+        compact_interval: float = 600.0,
+        read_only: bool = False,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if compact_interval <= 0:
+            raise ValueError("compact_interval must be positive")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention = retention
+        self.compact_interval = compact_interval
+        self.read_only = read_only
+        if read_only:
+            self.connection = sqlite3.connect(
+                f"{Path(filepath).resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+            try:
+                check_version(self.connection)
+                if schema_version(self.connection) < SCHEMA_VERSION:
+                    # SQLite deletes the database named "" when it is closed
+                    copy = sqlite3.connect("", check_same_thread=False)
+                    self.connection.backup(copy)
+                    self.connection.close()
+                    self.connection = copy
+                    migrate(self.connection)
+            except ValueError as error:
+                self.connection.close()
+                raise ValueError(f"{filepath}: {error}") from None
+        else:
+            self.connection = sqlite3.connect(filepath, check_same_thread=False)
+            if journal_mode:
+                self.connection.execute(f"PRAGMA journal_mode={journal_mode}")
+                if journal_mode.upper() == "WAL":
+                    # WAL is durable across application crashes with NORMAL,
+                    # which avoids an fsync on every commit.
+                    self.connection.execute("PRAGMA synchronous=NORMAL")
+            migrate(self.connection)
         self.cursor = self.connection.cursor()
-        self.cursor.execute(
-            "CREATE TABLE IF NOT EXISTS requests(method, scheme, netloc, path, params, query, response_code, duration)"
-        )
+        self._lookups = [
+            LookupTable(self.connection, table) for table in LOOKUP_COLUMNS.values()
+        ]
+        self._bucket_expression = "CAST(ceil(ln(duration) / ln(?)) AS INTEGER)"
+        try:
+            self.connection.execute("SELECT ceil(ln(1))")
+        except sqlite3.OperationalError:
+            # SQLite was built without math functions
+            self.connection.create_function(
+                "log_bucket", 2, _log_bucket, deterministic=True
+            )
+            self._bucket_expression = "log_bucket(duration, ?)"
+        self._pending: list[Recording] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self.last_compaction_error: Exception | None = None
+        self._stop_compacting = threading.Event()
+        self._compactor: threading.Thread | None = None
+        if retention is not None and not read_only:
+            self._compactor = threading.Thread(
+                target=self._compact_periodically,
+                args=(filepath, retention),
+                name="requests-stats-compactor",
+                daemon=True,
+            )
+            self._compactor.start()
 
     def store(self, recording: Recording) -> None:
-        self.cursor.execute(
-            "INSERT INTO requests VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            [
-                recording.method,
-                recording.scheme,
-                recording.netloc,
-                recording.path,
-                recording.params,
-                recording.query,
-                recording.response_code,
-                recording.duration,
-            ],
-        )
-        self.connection.commit()
+        with self._lock:
+            self._pending.append(recording)
+            if len(self._pending) >= self.batch_size or (
+                self.flush_interval is not None
+                and time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self._flush()
+
+    def flush(self) -> None:
+        """Write all buffered recordings in a single transaction."""
+        with self._lock:
+            self._flush()
 
     def persist(self) -> None:
-        # Nothing to do, sqlite3 handles writing to disk
-        return
+        self.flush()
+
+    def close(self) -> None:
+        if self._compactor is not None:
+            self._stop_compacting.set()
+            self._compactor.join()
+        self.flush()
+        self.connection.close()
 
     def load(self) -> list[Recording]:
-        return [Recording(*x) for x in self.cursor.execute("SELECT * FROM requests")]
+        return list(self.iter_load())
+
+    def iter_load(self, batch_size: int = 1000) -> Iterator[Recording]:
+        for _, recording in self.iter_since(0, batch_size):
+            yield recording
+
+    def iter_since(
+        self, checkpoint: int = 0, batch_size: int = 1000
+    ) -> Iterator[tuple[int, Recording]]:
+        self.flush()
+        cursor = self.connection.execute(
+            f"{SELECT_RECORDINGS} WHERE id > ? ORDER BY id", (checkpoint,)
+        )
+        self._refresh_lookups()
+        methods, schemes, netlocs, paths = (lookup.values for lookup in self._lookups)
+        try:
+            while rows := cursor.fetchmany(batch_size):
+                for position, method, scheme, netloc, path, *row in rows:
+                    try:
+                        strings = (
+                            methods[method],
+                            schemes[scheme],
+                            netlocs[netloc],
+                            paths[path],
+                        )
+                    except KeyError:
+                        # added by another connection after the refresh
+                        self._refresh_lookups()
+                        strings = (
+                            methods[method],
+                            schemes[scheme],
+                            netlocs[netloc],
+                            paths[path],
+                        )
+                    yield position, Recording(*strings, *row)
+        finally:
+            cursor.close()
+
+    def aggregate(
+        self,
+        checkpoint: int = 0,
+        duration_log_base: float | None = None,
+        path_map: Mapping[str, str] | Callable[[str], str] | None = None,
+        by_netloc: bool = False,
+    ) -> Iterator[RecordingAggregate]:
+        self.flush()
+        rename = _path_function(path_map) if path_map is not None else None
+        # compacted groups hold the oldest recordings
+        compacted: dict[tuple[str, str | None, str, int], RecordingAggregate] = {}
+        for folded in self.compacted(checkpoint):
+            if rename is not None:
+                folded = folded._replace(path=rename(folded.path))
+            if not by_netloc:
+                folded = folded._replace(netloc=None)
+            key = (folded.method, folded.netloc, folded.path, folded.response_code)
+            compacted[key] = (
+                _combine(compacted[key], folded) if key in compacted else folded
+            )
+        yield from compacted.values()
+        if not self.read_only:
+            with self.connection:
+                self.connection.execute(ENDPOINT_INDEX)
+        methods, _, netlocs, paths = self._lookups
+        paths.refresh()
+        group = "path_id"
+        netloc = ", netloc_id" if by_netloc else ""
+        join = ""
+        names = paths.values
+        parameters: list[float] = []
+        bucket = ""
+        if duration_log_base is not None:
+            bucket = f", {self._bucket_expression}"
+            parameters.append(duration_log_base)
+        if rename is not None:
+            # group the path ids by integer ids of the mapped paths, so the
+            # strings are only compared once per distinct path
+            groups: dict[str, int] = {}
+            rows = [
+                (path_id, groups.setdefault(rename(path), len(groups)))
+                for path_id, path in list(paths.values.items())
+            ]
+            names = dict(enumerate(groups))
+            table = f"path_map_{next(_temp_tables)}"
+            # commit right away, an open transaction would pin the snapshot
+            # of this connection and make later transactions fail
+            with self.connection:
+                self.connection.execute(
+                    f"CREATE TEMP TABLE {table}(path_id INTEGER PRIMARY KEY, group_id INTEGER)"
+                )
+                self.connection.executemany(
+                    f"INSERT INTO temp.{table} VALUES (?, ?)", rows
+                )
+            group = f"{table}.group_id"
+            join = f" JOIN temp.{table} ON {table}.path_id = requests.path_id"
+        where = " WHERE requests.id > ?" if checkpoint else ""
+        if checkpoint:
+            parameters.insert(0, checkpoint)
+        cursor = self.connection.execute(
+            f"SELECT method_id, {group}, response_code, COUNT(*),"
+            " SUM(duration * weight), MIN(duration), MAX(duration),"
+            f" MIN(requests.id), MAX(requests.id), SUM(weight){netloc}"
+            f" FROM requests{join}{where}"
+            f" GROUP BY method_id, {group}, response_code{netloc}{bucket}"
+            " ORDER BY MIN(requests.id)",
+            parameters,
+        )
+        try:
+            for method, path, *row in cursor:
+                aggregate = RecordingAggregate(
+                    methods.decode(method), names[path], *row[:8]
+                )
+                if by_netloc:
+                    aggregate = aggregate._replace(netloc=netlocs.decode(row[8]))
+                yield aggregate
+        finally:
+            cursor.close()
+            if rename is not None:
+                with self.connection:
+                    self.connection.execute(f"DROP TABLE temp.{table}")
+
+    def compacted(self, checkpoint: int = 0) -> Iterator[RecordingAggregate]:
+        """Yield the compacted groups with recordings stored after ``checkpoint``."""
+        methods, _, netlocs, paths = self._lookups
+        cursor = self.connection.execute(
+            f"SELECT method_id, path_id, response_code, {_COMPACTED_VALUES},"
+            " netloc_id FROM compacted WHERE last_position > ?"
+            " ORDER BY first_position",
+            (checkpoint,),
+        )
+        try:
+            for method, path, *row, netloc in cursor:
+                yield _compacted_group(
+                    netlocs.decode(netloc),
+                    methods.decode(method),
+                    paths.decode(path),
+                    *row,
+                )
+        finally:
+            cursor.close()
+
+    def compact(self, before: float, relative_accuracy: float = 0.01) -> int:
+        """Fold the recordings started before ``before`` into compacted groups.
+
+        Every group keeps the count, the weighted duration sum, min and max
+        and a sketch of the durations, and is merged into the group compacted
+        earlier. Recordings without a timestamp count as old, the newest
+        recording is always kept so positions keep growing. Returns the
+        number of compacted recordings.
+
+        The freed pages are reused by new recordings, ``VACUUM`` shrinks the
+        file.
+        """
+        with self._lock:
+            return self._compact(before, relative_accuracy)
+
+    def merge_compacted(self, groups: Iterable[RecordingAggregate]) -> None:
+        """Merge compacted groups, e.g. of another database, into this one."""
+        with self._lock, self.connection:
+            self._merge_compacted(groups)
+
+    def _compact_periodically(self, filepath: str, retention: float) -> None:
+        compactor = SQLiteStorage(filepath, journal_mode=None)
+        try:
+            while not self._stop_compacting.wait(self.compact_interval):
+                try:
+                    compactor.compact(time.time() - retention)
+                except sqlite3.Error as error:  # e.g. locked, try again later
+                    self.last_compaction_error = error
+        finally:
+            compactor.close()
+
+    def _compact(self, before: float, relative_accuracy: float = 0.01) -> int:
+        self._flush()
+        methods, _, netlocs, paths = self._lookups
+        # SQLite hands out max(rowid) + 1 as the next id
+        where = (
+            "id < (SELECT MAX(id) FROM requests)"
+            " AND (timestamp < ? OR timestamp IS NULL)"
+        )
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            # bucket the durations along the sketch buckets, like Latency
+            groups: dict[tuple[int, int, int, int], RecordingAggregate] = {}
+            for method, path, code, *row, netloc in self.connection.execute(
+                "SELECT method_id, path_id, response_code, COUNT(*),"
+                " SUM(duration * weight), MIN(duration), MAX(duration),"
+                f" MIN(id), MAX(id), SUM(weight), netloc_id FROM requests"
+                f" WHERE {where} GROUP BY method_id, netloc_id, path_id,"
+                f" response_code, {self._bucket_expression}",
+                (before, LatencySketch(relative_accuracy).gamma),
+            ):
+                bucket = RecordingAggregate(
+                    methods.decode(method), paths.decode(path), code, *row
+                )
+                sketch = LatencySketch(relative_accuracy)
+                fold_aggregate(sketch, bucket)
+                bucket = bucket._replace(sketch=sketch, netloc=netlocs.decode(netloc))
+                key = (method, netloc, path, code)
+                groups[key] = _combine(groups[key], bucket) if key in groups else bucket
+            self._merge_compacted(groups.values())
+            cursor = self.connection.execute(
+                f"DELETE FROM requests WHERE {where}", (before,)
+            )
+        compacted: int = cursor.rowcount
+        return compacted
+
+    def _merge_compacted(self, groups: Iterable[RecordingAggregate]) -> None:
+        methods, _, netlocs, paths = self._lookups
+        for group in groups:
+            sketch = group.sketch
+            if sketch is None:
+                raise ValueError("only compacted groups can be merged")
+            key = (
+                methods.encode(group.method),
+                netlocs.encode(group.netloc or ""),
+                paths.encode(group.path),
+                group.response_code,
+            )
+            row = self.connection.execute(
+                f"SELECT {_COMPACTED_VALUES} FROM compacted WHERE method_id = ?"
+                " AND netloc_id = ? AND path_id = ? AND response_code = ?",
+                key,
+            ).fetchone()
+            if row is not None:
+                group = _combine(
+                    group, _compacted_group(group.netloc, *group[:3], *row)
+                )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO compacted (method_id, netloc_id, path_id,"
+                f" response_code, {_COMPACTED_VALUES})"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    *key,
+                    group.request_count,
+                    group.duration_sum,
+                    group.duration_min,
+                    group.duration_max,
+                    group.first_position,
+                    group.last_position,
+                    group.weight_sum,
+                    json.dumps(sketch.to_dict(), separators=(",", ":")),
+                ),
+            )
+
+    def _flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        with self.connection:
+            rows = [self._encode(recording) for recording in self._pending]
+            self.connection.executemany(INSERT_RECORDING, rows)
+        self._pending = []
+
+    def _refresh_lookups(self) -> None:
+        for lookup in self._lookups:
+            lookup.refresh()
+
+    def _encode(self, recording: Recording) -> list[object]:
+        row: list[object] = list(recording)
+        for lookup, index in zip(self._lookups, _LOOKUP_INDEXES, strict=True):
+            row[index] = lookup.encode(str(recording[index] or ""))
+        return row
+
+
+class LookupTable:
+    """The values of one lookup table, cached in both directions.
+
+    Ids only grow, so values added by other connections are picked up by
+    reading the rows after the highest id seen so far.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, table: str) -> None:
+        self.connection = connection
+        self.table = table
+        self.ids: dict[str, int] = {}
+        self.values: dict[int, str] = {}
+        self._last_id = 0
+
+    def encode(self, value: str) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            self.connection.execute(
+                f"INSERT OR IGNORE INTO {self.table}(value) VALUES (?)", (value,)
+            )
+            value_id = self.connection.execute(
+                f"SELECT id FROM {self.table} WHERE value = ?", (value,)
+            ).fetchone()[0]
+            self.ids[value] = value_id
+            self.values[value_id] = value
+        return value_id
+
+    def decode(self, value_id: int) -> str:
+        value = self.values.get(value_id)
+        if value is None:
+            self.refresh()
+            value = self.values[value_id]
+        return value
+
+    def refresh(self) -> None:
+        for value_id, value in self.connection.execute(
+            f"SELECT id, value FROM {self.table} WHERE id > ? ORDER BY id",
+            (self._last_id,),
+        ):
+            self.ids[value] = value_id
+            self.values[value_id] = value
+            self._last_id = value_id
+
+
+_temp_tables = itertools.count()
+
+
+def _path_function(
+    path_map: Mapping[str, str] | Callable[[str], str],
+) -> Callable[[str], str]:
+    if isinstance(path_map, Mapping):
+        mapping = path_map
+        return lambda path: mapping.get(path, path)
+    return path_map
+
+
+def _compacted_group(
+    netloc: str | None,
+    method: str,
+    path: str,
+    response_code: int,
+    request_count: int,
+    duration_sum: float,
+    duration_min: float,
+    duration_max: float,
+    first_position: int,
+    last_position: int,
+    weight_sum: float,
+    sketch: str,
+) -> RecordingAggregate:
+    return RecordingAggregate(
+        method,
+        path,
+        response_code,
+        request_count,
+        duration_sum,
+        duration_min,
+        duration_max,
+        first_position,
+        last_position,
+        weight_sum,
+        LatencySketch.from_dict(json.loads(sketch)),
+        netloc,
+    )
+
+
+def _combine(
+    group: RecordingAggregate, other: RecordingAggregate
+) -> RecordingAggregate:
+    """Fold ``other`` into ``group``, merging the sketches in place."""
+    if group.sketch is None or other.sketch is None:
+        raise ValueError("only compacted groups can be combined")
+    group.sketch.merge(other.sketch)
+    return group._replace(
+        request_count=group.request_count + other.request_count,
+        duration_sum=group.duration_sum + other.duration_sum,
+        duration_min=min(group.duration_min, other.duration_min),
+        duration_max=max(group.duration_max, other.duration_max),
+        first_position=min(group.first_position, other.first_position),
+        last_position=max(group.last_position, other.last_position),
+        weight_sum=group.weight_sum + other.weight_sum,
+    )
+
+
+def _log_bucket(duration: float | None, base: float) -> int | None:
+    if not duration or duration <= 0:
+        return None
+    return math.ceil(math.log(duration) / math.log(base))
@@ -0,0 +1,46 @@
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Answers 100 bytes on a persistent connection, after ``?delay=`` seconds.
+
+    Under ``/chunked`` the 100 bytes are sent in chunks of 30 bytes.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if "?delay=" in self.path:
+            time.sleep(float(self.path.split("?delay=")[1]))
+        self.send_response(200)
+        if self.path.startswith("/chunked"):
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for size in (30, 30, 30, 10):
+                self.wfile.write(b"%x\r\n%s\r\n" % (size, b"x" * size))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self.send_header("Content-Length", "100")
+        self.end_headers()
+        self.wfile.write(b"x" * 100)
+
+    do_POST = do_GET
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def keep_alive_url() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/test"
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,28 @@
+import asyncio
+
+import aiohttp
+from pytest_httpserver import HTTPServer
+
+from requests_stats.adapters.aiohttp import RecordingTraceConfig
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+
+
+def test_trace_config_records_redirect_hops(httpserver: HTTPServer) -> None:
+    httpserver.expect_request("/old").respond_with_data(
+        status=301, headers={"Location": "/new"}
+    )
+    httpserver.expect_request("/new").respond_with_json({}, 200)
+    storage = InMemoryStorage()
+
+    async def run() -> None:
+        trace_config = RecordingTraceConfig(storage)
+        async with aiohttp.ClientSession(trace_configs=[trace_config]) as session:
+            async with session.get(httpserver.url_for("/old")) as response:
+                await response.read()
+
+    asyncio.run(run())
+
+    assert [(r.path, r.response_code) for r in storage.recordings] == [
+        ("/old", 301),
+        ("/new", 200),
+    ]
@@ -0,0 +1,26 @@
+import asyncio
+
+import httpx
+from pytest_httpserver import HTTPServer
+
+from requests_stats.adapters.httpx import RecordingAsyncTransport
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+
+
+def test_transport_records_requests(httpserver: HTTPServer) -> None:
+    httpserver.expect_request("/pets/1").respond_with_json({}, 404)
+    storage = InMemoryStorage()
+
+    async def run() -> None:
+        transport = RecordingAsyncTransport(storage)
+        async with httpx.AsyncClient(transport=transport) as client:
+            await client.get(httpserver.url_for("/pets/1?x=1"))
+
+    asyncio.run(run())
+
+    [recording] = storage.recordings
+    assert recording.method == "GET"
+    assert recording.path == "/pets/1"
+    assert recording.query == "x=1"
+    assert recording.response_code == 404
+    assert recording.duration > 0
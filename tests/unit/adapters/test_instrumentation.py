@@ -0,0 +1,58 @@
+import requests
+from pytest_httpserver import HTTPServer
+
+from requests_stats.adapters.requests import RecordingHTTPAdapter
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+
+
+def test_phases(keep_alive_url: str) -> None:
+    storage = InMemoryStorage()
+    session = requests.Session()
+    session.mount("http://", RecordingHTTPAdapter(storage=storage, phases=True))
+    session.get(keep_alive_url)
+    session.post(keep_alive_url, data=b"y" * 10)
+    first, second = storage.load()
+    assert first.connection_reused is False
+    assert first.connect is not None and first.connect >= 0
+    assert first.tls_handshake is None
+    assert second.connection_reused is True
+    assert second.connect is None
+    for recording in (first, second):
+        assert recording.pool_wait is not None
+        assert recording.ttfb is not None and recording.download is not None
+        assert recording.response_bytes == 100
+    assert second.request_bytes is not None and first.request_bytes is not None
+    assert second.request_bytes > first.request_bytes
+
+
+def test_counts_chunked_responses(keep_alive_url: str) -> None:
+    storage = InMemoryStorage()
+    session = requests.Session()
+    session.mount("http://", RecordingHTTPAdapter(storage=storage, phases=True))
+    url = keep_alive_url.replace("/test", "/chunked")
+    assert len(session.get(url).content) == 100
+    assert len(session.get(url, stream=True).raw.read()) == 100
+    assert [recording.response_bytes for recording in storage.load()] == [100, 100]
+
+
+def test_streamed_response_is_stored_on_release(httpserver: HTTPServer) -> None:
+    httpserver.expect_request("/test").respond_with_data("x" * 100)
+    storage = InMemoryStorage()
+    session = requests.Session()
+    session.mount("http://", RecordingHTTPAdapter(storage=storage, phases=True))
+    response = session.get(httpserver.url_for("/test"), stream=True)
+    assert storage.load() == []
+    response.close()
+    (recording,) = storage.load()
+    assert recording.download is not None
+
+
+def test_no_phases_by_default(httpserver: HTTPServer) -> None:
+    httpserver.expect_request("/test").respond_with_data("x")
+    storage = InMemoryStorage()
+    session = requests.Session()
+    session.mount("http://", RecordingHTTPAdapter(storage=storage))
+    session.get(httpserver.url_for("/test"))
+    (recording,) = storage.load()
+    assert recording.ttfb is None
+    assert recording.timestamp is not None
@@ -0,0 +1,60 @@
+from typing import Any, cast
+from unittest.mock import MagicMock
+
+from playwright.sync_api import Error, Request
+
+from requests_stats.adapters.playwright import SyncRequestHandler
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+
+
+def make_request(url: str, resource_type: str = "fetch") -> Any:
+    request = MagicMock()
+    request.url = url
+    request.resource_type = resource_type
+    request.method = "GET"
+    request.timing = {"requestStart": 10.0, "responseEnd": 30.0}
+    request.existing_response.status = 200
+    # a round trip to the browser, which fails once the page is closed
+    request.response.side_effect = Error("Target page has been closed")
+    return request
+
+
+def capture(handler: SyncRequestHandler, *requests: Any) -> None:
+    for request in requests:
+        handler._capture_request(cast(Request, request))
+
+
+def test_filters_before_fetching_the_response() -> None:
+    storage = InMemoryStorage()
+    handler = SyncRequestHandler(
+        storage,
+        path_pattern=r"/api/",
+        resource_types={"fetch", "xhr"},
+        hosts={"petstore.example.com"},
+    )
+    matching = make_request("https://petstore.example.com/api/pet/1")
+    rejected = [
+        make_request("https://petstore.example.com/logo.png", "image"),
+        make_request("https://petstore.example.com/api/pet/1", "image"),
+        make_request("https://cdn.example.com/api/pet/1"),
+        make_request("https://petstore.example.com/static/app.js"),
+    ]
+    capture(handler, matching, *rejected)
+
+    assert [r.path for r in storage.recordings] == ["/api/pet/1"]
+    assert storage.recordings[0].duration == 0.02
+    assert storage.recordings[0].response_code == 200
+
+
+def test_deferred_requests_are_stored_by_process_pending() -> None:
+    storage = InMemoryStorage()
+    handler = SyncRequestHandler(storage, deferred=True)
+    request = make_request("https://petstore.example.com/api/pet/1")
+    capture(handler, request)
+    # the page is closed before the recordings are processed
+    request.existing_response = None
+
+    assert storage.recordings == []
+    assert handler.process_pending() == 1
+    assert [r.response_code for r in storage.recordings] == [200]
+    assert handler.process_pending() == 0
@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from requests_stats.adapters.requests import RecordingHTTPAdapter
+from requests_stats.core.pool_metrics import PoolMetrics
+from requests_stats.reporters.pool.terminal_reporter import TerminalReporter
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+
+
+def run_load(url: str, adapter: RecordingHTTPAdapter, requests_count: int) -> None:
+    session = requests.Session()
+    session.mount("http://", adapter)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda _: session.get(url), range(requests_count)))
+
+
+def test_overflowing_pool_discards_connections(keep_alive_url: str) -> None:
+    metrics = PoolMetrics()
+    adapter = RecordingHTTPAdapter(
+        storage=InMemoryStorage(), pool_maxsize=2, pool_metrics=metrics
+    )
+    run_load(f"{keep_alive_url}?delay=0.05", adapter, 8)
+
+    (stats,) = metrics.stats()
+    assert stats.acquired == 8
+    assert stats.new + stats.reused == 8
+    assert stats.active == 0
+    assert stats.peak_active > 2
+    assert stats.discarded > 0
+    assert stats.idle == 2
+    assert stats.suggested_maxsize == stats.peak_active
+    assert stats.host in TerminalReporter(metrics).render()
+
+
+def test_blocking_pool_waits(keep_alive_url: str) -> None:
+    metrics = PoolMetrics()
+    adapter = RecordingHTTPAdapter(
+        storage=InMemoryStorage(), pool_maxsize=2, pool_block=True, pool_metrics=metrics
+    )
+    run_load(f"{keep_alive_url}?delay=0.05", adapter, 8)
+
+    (stats,) = metrics.stats()
+    assert stats.peak_active == 2
+    assert stats.new == 2
+    assert stats.reused == 6
+    assert stats.discarded == 0
+    assert stats.exhausted > 0
+    assert stats.wait_max > 0.01
+    assert stats.suggested_maxsize == 3
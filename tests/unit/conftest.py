@@ -0,0 +1,29 @@
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+
+from requests_stats.core.recording import Recording
+
+
+def _make_recording(path: str = "/", **fields: Any) -> Recording:
+    values: dict[str, Any] = {
+        "method": "GET",
+        "scheme": "https",
+        "netloc": "example.com",
+        "path": path,
+        "params": "",
+        "query": "",
+        "response_code": 200,
+        "duration": 0.1,
+    }
+    return Recording(**(values | fields))
+
+
+@pytest.fixture
+def make_recording() -> Callable[..., Recording]:
+    """Build a 200 response to ``GET https://example.com<path>`` in 0.1 s.
+
+    Keyword arguments replace any other field of the recording.
+    """
+    return _make_recording
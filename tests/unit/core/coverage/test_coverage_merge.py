@@ -0,0 +1,86 @@
+import json
+import pickle
+from pathlib import Path
+
+from requests_stats.core.coverage import Coverage
+from requests_stats.core.latency import Latency
+from requests_stats.core.recording import Recording
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+
+
+def write_spec(tmp_path: Path) -> Path:
+    spec = {
+        "openapi": "3.0.0",
+        "info": {"title": "Petstore", "version": "1.0.0"},
+        "paths": {
+            "/pet/{petId}": {
+                "get": {
+                    "parameters": [
+                        {
+                            "name": "petId",
+                            "in": "path",
+                            "required": True,
+                            "schema": {"type": "integer"},
+                        }
+                    ],
+                    "responses": {"200": {"description": "ok"}},
+                }
+            },
+            "/hello": {"get": {"responses": {"200": {"description": "ok"}}}},
+        },
+    }
+    spec_file = tmp_path / "spec.json"
+    spec_file.write_text(json.dumps(spec))
+    return spec_file
+
+
+def open_storage(paths: list[str]) -> InMemoryStorage:
+    storage = InMemoryStorage()
+    for path in paths:
+        storage.store(
+            Recording(
+                method="GET",
+                scheme="https",
+                netloc="example.com",
+                path=path,
+                params="",
+                query="",
+                response_code=200,
+                duration=0.1,
+            )
+        )
+    return storage
+
+
+def test_load_many_merges_results_from_worker_processes(tmp_path: Path) -> None:
+    spec_file = write_spec(tmp_path)
+    recordings = [["/pet/1"], ["/unknown/1", "/pet/2"], ["/unknown/2"]]
+    coverage = Coverage(openapi_file_path=str(spec_file))
+    coverage.load_many(recordings, open_storage, jobs=2)
+
+    assert coverage.covered == {("GET", "/pet/{petId}", 200)}
+    assert coverage.uncovered == {("GET", "/hello", 200)}
+    assert sorted(coverage.extra_details) == [
+        ("GET", "/unknown/1", "/unknown/1", 200),
+        ("GET", "/unknown/2", "/unknown/2", 200),
+    ]
+
+
+def test_results_pickle_and_merge(tmp_path: Path) -> None:
+    spec_file = write_spec(tmp_path)
+    first, second = Coverage(str(spec_file)), Coverage(str(spec_file))
+    first.load(open_storage(["/pet/1"]))
+    second.load(open_storage(["/hello"]))
+    first.merge(pickle.loads(pickle.dumps(second.result)))
+
+    assert first.uncovered == set()
+
+
+def test_latency_load_many_merges_sketches() -> None:
+    latency = Latency()
+    latency.load_many([["/a", "/a"], ["/a", "/b"]], open_storage, jobs=2)
+
+    assert {stats.path: stats.count for stats in latency.stats()} == {
+        "/a": 3,
+        "/b": 1,
+    }
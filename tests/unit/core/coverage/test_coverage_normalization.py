@@ -75,3 +75,62 @@ def test_coverage_strips_query_string(tmp_path: Path) -> None:
 
     assert ("GET", "/hello", 200) in coverage.covered
     assert coverage.extra == set()
+
+
+def test_coverage_keeps_first_original_path_of_extra_requests(tmp_path: Path) -> None:
+    spec_file = write_spec(tmp_path)
+    storage = InMemoryStorage()
+    for path in ("/api/v3/unknown", "/api/v3/unknown?page=2", "/api/v3/pet/1"):
+        storage.store(
+            Recording(
+                method="GET",
+                scheme="https",
+                netloc="example.com",
+                path=path,
+                params="",
+                query="",
+                response_code=404,
+                duration=0.1,
+            )
+        )
+    coverage = Coverage(openapi_file_path=str(spec_file))
+    coverage.load(storage)
+
+    assert coverage.extra == {("GET", "/unknown", 404), ("GET", "/pet/{petId}", 404)}
+    assert coverage.extra_details == [
+        ("GET", "/api/v3/unknown", "/unknown", 404),
+        ("GET", "/api/v3/pet/1", "/pet/{petId}", 404),
+    ]
+
+
+def test_incremental_update_resumes_from_saved_state(tmp_path: Path) -> None:
+    spec_file = write_spec(tmp_path)
+    state_file = tmp_path / "state.json"
+    storage = InMemoryStorage()
+
+    def record(path: str) -> None:
+        storage.store(
+            Recording(
+                method="GET",
+                scheme="https",
+                netloc="example.com",
+                path=path,
+                params="",
+                query="",
+                response_code=200,
+                duration=0.1,
+            )
+        )
+
+    record("/api/v3/hello")
+    first_run = Coverage(openapi_file_path=str(spec_file))
+    first_run.load(storage)
+    first_run.save_state(state_file)
+
+    record("/api/v3/pet/1")
+    second_run = Coverage(openapi_file_path=str(spec_file))
+    assert second_run.load_state(state_file)
+    assert second_run.update(storage) == 1
+
+    assert second_run.covered == {("GET", "/hello", 200), ("GET", "/pet/{petId}", 200)}
+    assert second_run.checkpoint == 2
@@ -0,0 +1,65 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from requests_stats.core.base_storage import Storage
+from requests_stats.core.multi_coverage import MultiCoverage
+from requests_stats.core.recording import Recording
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+from requests_stats.storage.sqlite_storage import SQLiteStorage
+
+
+def write_spec(tmp_path: Path, name: str, *paths: str) -> str:
+    spec = {
+        "openapi": "3.0.0",
+        "info": {"title": name, "version": "1.0.0"},
+        "paths": {
+            path: {"get": {"responses": {"200": {"description": "ok"}}}}
+            for path in paths
+        },
+    }
+    spec_file = tmp_path / f"{name}.json"
+    spec_file.write_text(json.dumps(spec))
+    return str(spec_file)
+
+
+REQUESTS = [
+    ("pets.example.com", "/pets"),
+    ("users.example.com:8443", "/users"),
+    ("gateway.example.com", "/orders/orders"),
+    ("gateway.example.com", "/pets/pets"),
+    ("unknown.example.com", "/pets"),
+]
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_recordings_are_routed_to_services_by_host(
+    tmp_path: Path, backend: str
+) -> None:
+    pets = write_spec(tmp_path, "pets", "/pets")
+    users = write_spec(tmp_path, "users", "/users")
+    orders = write_spec(tmp_path, "orders", "/orders")
+    storage: Storage = (
+        InMemoryStorage()
+        if backend == "memory"
+        else SQLiteStorage(filepath=str(tmp_path / "requests.db"))
+    )
+    for netloc, path in REQUESTS:
+        storage.store(Recording("GET", "https", netloc, path, "", "", 200, 0.1))
+
+    coverage = MultiCoverage(
+        {
+            "pets.example.com": pets,
+            "https://users.example.com": users,
+            "gateway.example.com/orders": orders,
+            "gateway.example.com/pets": pets,
+        }
+    )
+    coverage.load(storage)
+
+    assert coverage.coverages[pets].covered == {("GET", "/pets", 200)}
+    assert coverage.coverages[pets].extra == set()
+    assert coverage.coverages[users].covered == {("GET", "/users", 200)}
+    assert coverage.coverages[orders].covered == {("GET", "/orders", 200)}
+    assert coverage.unrouted == {"unknown.example.com": 1}
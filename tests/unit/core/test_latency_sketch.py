@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from requests_stats.core.sketch import LatencySketch
+
+
+def test_quantiles_within_relative_accuracy() -> None:
+    rng = random.Random(0)
+    values = sorted(rng.lognormvariate(-3, 1) for _ in range(50_000))
+    sketch = LatencySketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.9, 0.99, 0.999):
+        expected = values[int(q * len(values)) - 1]
+        assert sketch.quantile(q) == pytest.approx(expected, rel=0.02)
+    assert sketch.count == len(values)
+    assert sketch.min == values[0]
+    assert sketch.max == values[-1]
+
+
+def test_merge_equals_single_sketch() -> None:
+    left, right, combined = LatencySketch(), LatencySketch(), LatencySketch()
+    for index in range(1, 1001):
+        value = index / 1000
+        (left if index % 2 else right).add(value)
+        combined.add(value)
+    left.merge(right)
+
+    assert left.buckets == combined.buckets
+    assert left.count == combined.count
+    assert left.sum == pytest.approx(combined.sum)
+    assert LatencySketch.from_dict(left.to_dict()).quantile(0.9) == combined.quantile(
+        0.9
+    )
+
+
+def test_zero_durations_and_bucket_limit() -> None:
+    sketch = LatencySketch(max_buckets=8)
+    sketch.add(0.0, weight=10)
+    for index in range(1, 100):
+        sketch.add(index / 10)
+
+    assert sketch.quantile(0.05) == 0.0
+    assert len(sketch.buckets) == 8
+    assert sketch.quantile(1.0) == pytest.approx(9.9, rel=0.01)
@@ -0,0 +1,29 @@
+from requests_stats.core.normalization import CacheStats, PathNormalizer
+
+
+def test_normalize_strips_base_path_query_and_applies_template() -> None:
+    normalizer = PathNormalizer(["/pet/{petId}"], server_base_paths=["/api/v3"])
+
+    assert normalizer.normalize("GET", "/api/v3/pet/1001?x=1") == "/pet/{petId}"
+    assert normalizer.normalize("GET", "http://host/api/v3/pet/7") == "/pet/{petId}"
+    assert normalizer.normalize("GET", "/api/v3") == "/"
+    assert normalizer.normalize("GET", "/other/1") == "/other/1"
+
+
+def test_cache_counts_hits_misses_and_evictions() -> None:
+    normalizer = PathNormalizer(["/pet/{petId}"], cache_size=2)
+    for path in ("/pet/1", "/pet/1", "/pet/2", "/pet/3", "/pet/1"):
+        normalizer.normalize("GET", path)
+
+    assert normalizer.cache_stats() == CacheStats(
+        hits=1, misses=4, evictions=2, size=2, maxsize=2
+    )
+
+
+def test_cache_can_be_disabled() -> None:
+    normalizer = PathNormalizer(["/pet/{petId}"], cache_size=0)
+    normalizer.normalize("GET", "/pet/1")
+    normalizer.normalize("GET", "/pet/1")
+
+    assert normalizer.cache_stats().hits == 0
+    assert normalizer.cache_stats().size == 0
@@ -0,0 +1,24 @@
+from requests_stats.core.path_router import PathRouter
+
+
+def test_literal_segment_wins_regardless_of_spec_order() -> None:
+    router = PathRouter(["/pet/{petId}", "/pet/findByStatus"])
+
+    assert router.match("/pet/findByStatus") == "/pet/findByStatus"
+    assert router.match("/pet/1001") == "/pet/{petId}"
+
+
+def test_backtracks_when_literal_branch_does_not_match() -> None:
+    router = PathRouter(["/users/me", "/users/{id}/orders"])
+
+    assert router.match("/users/me/orders") == "/users/{id}/orders"
+
+
+def test_mixed_segments_and_unknown_paths() -> None:
+    router = PathRouter(["/files/{name}.json", "/files/{name}", "/"])
+
+    assert router.match("/files/report.json") == "/files/{name}.json"
+    assert router.match("/files/report.csv") == "/files/{name}"
+    assert router.match("/files/") is None
+    assert router.match("/unknown") is None
+    assert router.match("/") == "/"
@@ -0,0 +1,40 @@
+from requests_stats.core import profiling
+from requests_stats.core.profiling import Profiler
+
+
+def test_stages_nest_and_count_rows() -> None:
+    profiler = Profiler(memory=True)
+    profiling.enable(profiler)
+    try:
+        with profiling.stage("coverage") as stage:
+            for _ in profiling.iterate("read storage", range(3)):
+                with profiling.stage("normalize"):
+                    pass
+            stage.add(3)
+            buffer = [bytes(1_000_000)]
+        del buffer
+    finally:
+        profiling.disable()
+
+    stats = {s.path: s for s in profiler.stats()}
+    assert list(stats) == [
+        ("coverage",),
+        ("coverage", "read storage"),
+        ("coverage", "normalize"),
+    ]
+    coverage = stats["coverage",]
+    assert (coverage.calls, coverage.rows) == (1, 3)
+    assert stats["coverage", "read storage"].rows == 3
+    assert stats["coverage", "normalize"].calls == 3
+    children = sum(s.seconds for s in stats.values() if len(s.path) == 2)
+    assert abs(coverage.self_seconds - (coverage.seconds - children)) < 1e-9
+    assert coverage.peak_memory is not None and coverage.peak_memory >= 1_000_000
+
+
+def test_disabled_profiling_passes_everything_through() -> None:
+    items = [1, 2]
+
+    assert profiling.iterate("read storage", items) is items
+    with profiling.stage("coverage") as stage:
+        stage.add(2)
+    assert stage.rows == 0
@@ -0,0 +1,58 @@
+from collections.abc import Callable
+from pathlib import Path
+
+from requests_stats.core.recording import Recording
+from requests_stats.core.rollup import Rollup, timeseries
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+from requests_stats.storage.rollup_storage import RollupStorage
+
+
+def test_buckets_per_width(make_recording: Callable[..., Recording]) -> None:
+    storage = InMemoryStorage()
+    for timestamp in (100.2, 100.9, 105.0, 161.0):
+        storage.store(make_recording("/pets", method="get", timestamp=timestamp))
+    storage.store(
+        make_recording("/pets", method="get", timestamp=101.0, response_code=503)
+    )
+    storage.store(make_recording("/pets", method="get", timestamp=None))
+    rollup = Rollup(widths=(1, 60))
+
+    assert rollup.update(storage) == 6
+    assert rollup.skipped == 1
+    counts = {(w, s): b.count for (w, s, _, _), b in rollup.buckets.items()}
+    assert counts == {
+        (1, 100): 2,
+        (1, 101): 1,
+        (1, 105): 1,
+        (1, 161): 1,
+        (60, 60): 4,
+        (60, 120): 1,
+    }
+    assert rollup.buckets[(1, 101, "GET", "/pets")].errors == 1
+
+
+def test_storage_merges_incremental_runs(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    storage = InMemoryStorage()
+    store = RollupStorage(str(tmp_path / "rollups.db"))
+    rollup = Rollup(widths=(10,))
+    storage.store(make_recording("/pets", method="get", timestamp=100.0))
+    rollup.update(storage)
+    store.save(rollup)
+    assert rollup.buckets == {}
+
+    storage.store(
+        make_recording("/pets", method="get", timestamp=105.0, response_code=500)
+    )
+    storage.store(make_recording("/pets", method="get", timestamp=110.0))
+    rollup = Rollup(widths=(10,))
+    rollup.checkpoint = store.checkpoint
+    assert rollup.update(storage) == 2
+    store.save(rollup)
+
+    points = timeseries(store.read(10))
+    assert [(p.start, p.count, p.errors) for p in points] == [(100, 2, 1), (110, 1, 0)]
+    assert points[0].requests_per_second == 0.2
+    assert store.widths() == [10]
+    store.close()
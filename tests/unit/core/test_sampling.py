@@ -0,0 +1,74 @@
+import random
+from collections.abc import Callable
+
+from requests_stats.core.normalization import PathNormalizer
+from requests_stats.core.recording import Recording
+from requests_stats.core.sampling import Sampler, template_key
+
+
+def test_fixed_rate_weights_kept_recordings(
+    make_recording: Callable[..., Recording],
+) -> None:
+    sampler = Sampler(rate=0.25, random_source=random.Random(1).random)
+    kept = [sampler.sample(make_recording("/pets")) for _ in range(4000)]
+    weights = [recording.weight for recording in kept if recording]
+
+    assert set(weights) == {4.0}
+    assert 3600 < sum(weights) < 4400
+
+
+def test_errors_and_slow_requests_are_always_kept(
+    make_recording: Callable[..., Recording],
+) -> None:
+    sampler = Sampler(rate=0.01, slow_threshold=1.0, random_source=lambda: 0.99)
+
+    assert sampler.sample(make_recording("/pets")) is None
+    assert sampler.sample(make_recording("/pets", response_code=500)) == make_recording(
+        "/pets", response_code=500
+    )
+    assert sampler.sample(make_recording("/pets", duration=2.0)) == make_recording(
+        "/pets", duration=2.0
+    )
+
+
+def test_per_key_cap_keeps_weighted_counts_unbiased(
+    make_recording: Callable[..., Recording],
+) -> None:
+    sampler = Sampler(max_per_key=10, random_source=random.Random(2).random)
+    kept = [sampler.sample(make_recording("/hot")) for _ in range(10_000)]
+    kept += [sampler.sample(make_recording("/cold")) for _ in range(5)]
+    hot = [r for r in kept if r and r.path == "/hot"]
+    cold = [r for r in kept if r and r.path == "/cold"]
+
+    assert len(hot) < 200
+    assert 8000 < sum(r.weight for r in hot) < 12_000
+    assert [r.weight for r in cold] == [1.0] * 5
+
+
+def test_template_key_caps_paths_with_ids_per_endpoint(
+    make_recording: Callable[..., Recording],
+) -> None:
+    sampler = Sampler(
+        max_per_key=10,
+        key=template_key(PathNormalizer(["/pets/{petId}"])),
+        random_source=random.Random(3).random,
+        max_keys=5,
+    )
+    kept = [sampler.sample(make_recording(f"/pets/{i}")) for i in range(10_000)]
+    pets = [r for r in kept if r]
+
+    assert len(pets) < 200
+    assert 8000 < sum(r.weight for r in pets) < 12_000
+    assert len(sampler._counts) == 1
+
+
+def test_counts_are_bounded_by_max_keys(
+    make_recording: Callable[..., Recording],
+) -> None:
+    sampler = Sampler(max_per_key=1, random_source=lambda: 0.0, max_keys=3)
+    for index in range(100):
+        sampler.sample(make_recording(f"/pets/{index}"))
+
+    assert list(sampler._counts) == [
+        ("GET", "example.com", f"/pets/{index}", 200) for index in (97, 98, 99)
+    ]
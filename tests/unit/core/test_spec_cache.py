@@ -0,0 +1,53 @@
+import json
+from pathlib import Path
+
+from requests_stats.core.spec_cache import SpecCache
+from requests_stats.core.spec_index import SpecIndex
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Minimal API", "version": "1.0.0"},
+    "servers": [{"url": "https://example.com/api/v3"}],
+    "paths": {
+        "/hello": {
+            "get": {
+                "summary": " Returns a greeting ",
+                "tags": ["greeting"],
+                "responses": {
+                    "200": {"description": "ok"},
+                    "default": {"description": "error"},
+                },
+            }
+        }
+    },
+}
+
+
+def test_cached_index_round_trips(tmp_path: Path) -> None:
+    spec_file = tmp_path / "spec.json"
+    spec_file.write_text(json.dumps(SPEC))
+    cache = SpecCache(tmp_path / "cache")
+
+    parsed = cache.load(str(spec_file))
+    cached = cache.load(str(spec_file))
+
+    assert cached == parsed == SpecIndex.parse(str(spec_file))
+    assert parsed.server_base_paths == ("/api/v3",)
+    assert parsed.endpoints() == {("GET", "/hello", 200)}
+    assert parsed.operations[0].summary == "Returns a greeting"
+
+
+def test_changed_spec_invalidates_cache(tmp_path: Path) -> None:
+    spec_file = tmp_path / "spec.json"
+    spec_file.write_text(json.dumps(SPEC))
+    cache = SpecCache(tmp_path / "cache")
+    cache.load(str(spec_file))
+
+    changed = json.loads(json.dumps(SPEC))
+    changed["paths"]["/bye"] = changed["paths"].pop("/hello")
+    # a fresh file name, openapi_parser caches what it read per URI
+    changed_file = tmp_path / "changed.json"
+    changed_file.write_text(json.dumps(changed))
+
+    assert cache.load(str(changed_file)).paths == ("/bye",)
+    assert cache.clear() == 2
@@ -0,0 +1,136 @@
+import random
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from requests_stats.core.latency import Latency
+from requests_stats.core.recording import Recording, RecordingAggregate
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+from requests_stats.storage.sqlite_storage import SQLiteStorage
+
+
+def test_latency_from_aggregates_matches_row_iteration(tmp_path: Path) -> None:
+    rng = random.Random(1)
+    sqlite = SQLiteStorage(filepath=str(tmp_path / "requests.db"), batch_size=500)
+    memory = InMemoryStorage()
+    for _ in range(2000):
+        recording = Recording(
+            method="GET",
+            scheme="https",
+            netloc="example.com",
+            path=f"/pet/{rng.randrange(3)}",
+            params="",
+            query="",
+            response_code=rng.choice((200, 404)),
+            duration=rng.lognormvariate(-3, 1),
+        )
+        sqlite.store(recording)
+        memory.store(recording)
+
+    from_aggregates, from_rows = Latency(), Latency()
+    from_aggregates.load(sqlite)
+    from_rows.load(memory)
+
+    assert from_aggregates.sketches.keys() == from_rows.sketches.keys()
+    for key, sketch in from_rows.sketches.items():
+        aggregated = from_aggregates.sketches[key]
+        assert aggregated.buckets == sketch.buckets
+        assert (aggregated.min, aggregated.max) == (sketch.min, sketch.max)
+
+
+def test_latency_counts_are_weighted(tmp_path: Path) -> None:
+    sqlite = SQLiteStorage(filepath=str(tmp_path / "requests.db"))
+    memory = InMemoryStorage()
+    for duration, weight in ((0.01, 1.0), (0.02, 4.0), (0.03, 4.0), (0.05, 1.0)):
+        recording = Recording(
+            method="GET",
+            scheme="https",
+            netloc="example.com",
+            path="/pet/1",
+            params="",
+            query="",
+            response_code=200,
+            duration=duration,
+            weight=weight,
+        )
+        sqlite.store(recording)
+        memory.store(recording)
+
+    from_aggregates, from_rows = Latency(), Latency()
+    from_aggregates.load(sqlite)
+    from_rows.load(memory)
+
+    for latency in (from_aggregates, from_rows):
+        [stats] = latency.stats()
+        assert stats.count == 10
+        assert abs(stats.mean - 0.026) < 1e-9
+
+
+def test_latency_reads_compacted_and_raw_recordings(tmp_path: Path) -> None:
+    rng = random.Random(2)
+    compacted = SQLiteStorage(filepath=str(tmp_path / "compacted.db"), batch_size=500)
+    raw = SQLiteStorage(filepath=str(tmp_path / "raw.db"), batch_size=500)
+    for index in range(2000):
+        recording = Recording(
+            method="GET",
+            scheme="https",
+            netloc="example.com",
+            path=f"/pet/{rng.randrange(3)}",
+            params="",
+            query="",
+            response_code=rng.choice((200, 404)),
+            duration=rng.lognormvariate(-3, 1),
+            timestamp=1000.0 + index,
+        )
+        compacted.store(recording)
+        raw.store(recording)
+
+    assert compacted.compact(before=2500.0) == 1500
+    assert len(compacted.load()) == 500
+
+    from_compacted, from_raw = Latency(), Latency()
+    from_compacted.load(compacted)
+    from_raw.load(raw)
+
+    assert from_compacted.sketches.keys() == from_raw.sketches.keys()
+    for key, sketch in from_raw.sketches.items():
+        merged = from_compacted.sketches[key]
+        assert merged.buckets == pytest.approx(sketch.buckets)
+        assert merged.sum == pytest.approx(sketch.sum)
+        assert (merged.min, merged.max) == (sketch.min, sketch.max)
+
+
+class CountingStorage(SQLiteStorage):
+    def __init__(self, filepath: str) -> None:
+        super().__init__(filepath=filepath)
+        self.scans = 0
+        self.mapped: list[str] = []
+
+    def aggregate(self, *args: Any, **kwargs: Any) -> Iterator[RecordingAggregate]:
+        self.scans += 1
+        path_map = kwargs["path_map"]
+
+        def record(path: str) -> str:
+            self.mapped.append(path)
+            return str(path_map(path))
+
+        kwargs["path_map"] = record
+        return super().aggregate(*args, **kwargs)
+
+
+def test_latency_maps_every_distinct_path_once_in_one_scan(tmp_path: Path) -> None:
+    storage = CountingStorage(str(tmp_path / "requests.db"))
+    for path in ("/pet/1", "/pet/2", "/pet/1", "/pet/2", "/pet/1"):
+        storage.store(Recording("GET", "https", "example.com", path, "", "", 200, 0.1))
+
+    latency = Latency()
+    latency.load(storage)
+
+    assert storage.scans == 1
+    assert sorted(storage.mapped) == ["/pet/1", "/pet/2"]
+    assert [(s.path, s.count) for s in latency.stats()] == [
+        ("/pet/1", 3),
+        ("/pet/2", 2),
+    ]
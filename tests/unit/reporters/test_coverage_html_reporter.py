@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from requests_stats.core.coverage import Coverage, CoverageResult
+from requests_stats.reporters.coverage.html_reporter import HtmlReporter
+
+PETSTORE_SPEC = (
+    Path(__file__).parents[1] / "core" / "coverage" / "petstore_openapi.json"
+)
+
+
+def test_streamed_report_matches_rendered_report(tmp_path: Path) -> None:
+    coverage = Coverage(openapi_file_path=str(PETSTORE_SPEC))
+    coverage.merge(
+        CoverageResult(
+            coverage.spec_hash,
+            recorded={("GET", "/pet/{petId}", 200), ("GET", "/unknown", 200)},
+            extra_paths={("GET", "/unknown", 200): "/unknown"},
+        )
+    )
+    reporter = HtmlReporter(coverage)
+    output = tmp_path / "coverage.html"
+    reporter.create(output)
+
+    html = output.read_text(encoding="utf-8")
+    assert html == reporter.render()
+    assert "/unknown" in html
+    assert "1/3 covered" in html
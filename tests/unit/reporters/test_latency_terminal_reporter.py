@@ -0,0 +1,40 @@
+from textwrap import dedent
+
+from requests_stats.core.latency import Latency
+from requests_stats.core.recording import Recording
+from requests_stats.reporters.latency.terminal_reporter import TerminalReporter
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+
+
+def test_latency_grouped_by_method_path_and_code() -> None:
+    storage = InMemoryStorage()
+    for path, code, duration in (
+        ("/hello?name=a", 200, 0.010),
+        ("/hello?name=b", 200, 0.030),
+        ("/hello", 500, 0.100),
+    ):
+        storage.store(
+            Recording(
+                method="get",
+                scheme="https",
+                netloc="example.com",
+                path=path,
+                params="",
+                query="",
+                response_code=code,
+                duration=duration,
+            )
+        )
+
+    latency = Latency()
+    latency.load(storage)
+
+    assert TerminalReporter(latency).render() == dedent(
+        """\
+        Response times in milliseconds:
+
+        endpoint        count    mean     min     p50     p90     p95     p99   p99.9     max
+        GET /hello 200      2   20.00   10.00   10.00   29.89   29.89   29.89   29.89   30.00
+        GET /hello 500      1  100.00  100.00  100.00  100.00  100.00  100.00  100.00  100.00
+        """
+    )
@@ -0,0 +1,69 @@
+import asyncio
+from collections.abc import Callable
+
+from requests_stats.core.recording import Recording
+from requests_stats.storage.async_queued_storage import AsyncQueuedStorage
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+
+
+def test_aclose_writes_all_recordings_in_order(
+    make_recording: Callable[..., Recording],
+) -> None:
+    backend = InMemoryStorage()
+
+    async def run() -> None:
+        async with AsyncQueuedStorage(backend, batch_size=7) as storage:
+            for index in range(100):
+                storage.store(make_recording(f"/{index}"))
+                if index % 10 == 0:
+                    await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    assert [r.path for r in backend.recordings] == [f"/{i}" for i in range(100)]
+
+
+def test_full_queue_drops_instead_of_blocking(
+    make_recording: Callable[..., Recording],
+) -> None:
+    backend = InMemoryStorage()
+
+    async def run() -> AsyncQueuedStorage:
+        storage = AsyncQueuedStorage(backend, maxsize=5)
+        for index in range(8):
+            storage.store(make_recording(f"/{index}"))
+        await storage.aclose()
+        return storage
+
+    storage = asyncio.run(run())
+
+    assert storage.dropped == 3
+    assert len(backend.recordings) == 5
+
+
+class FailingStorage(InMemoryStorage):
+    def store(self, recording: Recording) -> None:
+        if recording.path == "/fail":
+            raise OSError("disk full")
+        super().store(recording)
+
+
+def test_failing_storage_does_not_stop_the_drain_task(
+    make_recording: Callable[..., Recording],
+) -> None:
+    backend = FailingStorage()
+
+    async def run() -> AsyncQueuedStorage:
+        storage = AsyncQueuedStorage(backend, batch_size=1)
+        storage.store(make_recording("/fail"))
+        await asyncio.sleep(0.01)
+        storage.store(make_recording("/0"))
+        storage.store(make_recording("/1"))
+        await asyncio.wait_for(storage.aclose(), timeout=5)
+        return storage
+
+    storage = asyncio.run(run())
+
+    assert storage.failed == 1
+    assert isinstance(storage.last_error, OSError)
+    assert [r.path for r in backend.recordings] == ["/0", "/1"]
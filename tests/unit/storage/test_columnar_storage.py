@@ -0,0 +1,67 @@
+import sys
+import threading
+from collections.abc import Callable
+
+from requests_stats.core.recording import Recording
+from requests_stats.storage.columnar_storage import ColumnarStorage
+
+
+def test_round_trips_recordings(make_recording: Callable[..., Recording]) -> None:
+    storage = ColumnarStorage()
+    recordings = [
+        make_recording("/a", query="a=1"),
+        make_recording("/b", response_code=404),
+        make_recording("/a", query="a=1"),
+    ]
+    for recording in recordings:
+        storage.store(recording)
+
+    assert storage.load() == recordings
+    assert [pos for pos, _ in storage.iter_since(2)] == [3]
+    assert len(storage.dictionaries["path"]) == 2
+
+
+def test_column_views_share_memory(make_recording: Callable[..., Recording]) -> None:
+    storage = ColumnarStorage()
+    storage.store(make_recording("/a"))
+    storage.store(make_recording("/b", response_code=404))
+
+    columns = storage.columns()
+
+    assert list(columns.response_code) == [200, 404]
+    assert [columns.dictionaries["path"][code] for code in columns.path] == ["/a", "/b"]
+    assert columns.duration.obj is storage.durations
+    for view in columns[:-1]:
+        view.release()
+    storage.store(make_recording("/c"))
+    assert len(storage) == 3
+
+
+def test_columns_stay_aligned_when_stored_from_threads(
+    make_recording: Callable[..., Recording],
+) -> None:
+    storage = ColumnarStorage()
+
+    def store(thread: int) -> None:
+        for _ in range(5000):
+            code = 200 + thread
+            storage.store(
+                make_recording(f"/{thread}", response_code=code, duration=float(code))
+            )
+
+    threads = [threading.Thread(target=store, args=(n,)) for n in range(4)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads often to provoke races
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    recordings = storage.load()
+    assert len(recordings) == 20000
+    for recording in recordings:
+        assert recording.path == f"/{recording.response_code - 200}"
+        assert recording.duration == recording.response_code
@@ -0,0 +1,82 @@
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+from requests_stats.core.recording import Recording
+from requests_stats.storage.jsonl_storage import JSONLStorage
+
+
+def test_round_trips_recordings_in_chunks(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    storage = JSONLStorage(filepath=str(tmp_path / "requests.jsonl"))
+    recordings = [make_recording(f"/{index}") for index in range(5)]
+    for recording in recordings:
+        storage.store(recording)
+
+    assert list(storage.iter_load(batch_size=2)) == recordings
+    storage.close()
+
+
+def test_concurrent_appenders_and_partial_lines(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    filepath = str(tmp_path / "requests.jsonl")
+    first = JSONLStorage(filepath=filepath, buffer_size=1)
+    second = JSONLStorage(filepath=filepath, buffer_size=1)
+    first.store(make_recording("/first"))
+    second.store(make_recording("/second"))
+    # a line another process has not finished writing yet
+    with open(filepath, "ab") as file:
+        file.write(b'["GET","https"')
+
+    positions = list(first.iter_since())
+    assert [rec.path for _, rec in positions] == ["/first", "/second"]
+    assert list(second.iter_since(positions[0][0])) == positions[1:]
+    assert positions[-1][0] == os.path.getsize(filepath) - len(b'["GET","https"')
+    first.close()
+    second.close()
+
+
+def test_round_trips_phase_timings(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    storage = JSONLStorage(filepath=str(tmp_path / "requests.jsonl"))
+    plain = make_recording("/plain")
+    timed = make_recording("/timed")._replace(
+        connection_reused=True, ttfb=0.25, request_bytes=80, response_bytes=512
+    )
+    storage.store(plain)
+    storage.store(timed)
+
+    assert storage.load() == [plain, timed]
+    storage.close()
+
+
+def test_skips_corrupt_lines(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    filepath = tmp_path / "requests.jsonl"
+    storage = JSONLStorage(filepath=str(filepath))
+    storage.store(make_recording("/before"))
+    storage.flush()
+    # a writer that crashed halfway through a line, then more recordings
+    with open(filepath, "ab") as file:
+        file.write(b'["GET","https"\n')
+    storage.store(make_recording("/after"))
+
+    assert [rec.path for rec in storage.iter_load(batch_size=10)] == [
+        "/before",
+        "/after",
+    ]
+    assert storage.corrupt_lines == 1
+    storage.close()
+
+
+def test_reading_does_not_create_the_file(tmp_path: Path) -> None:
+    filepath = tmp_path / "missing.jsonl"
+    storage = JSONLStorage(filepath=str(filepath))
+
+    assert storage.load() == []
+    storage.close()
+    assert not filepath.exists()
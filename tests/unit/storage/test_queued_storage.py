@@ -0,0 +1,136 @@
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from requests_stats.core.recording import Recording
+from requests_stats.storage.in_memory_storage import InMemoryStorage
+from requests_stats.storage.jsonl_storage import JSONLStorage
+from requests_stats.storage.queued_storage import BackpressurePolicy, QueuedStorage
+
+
+class BlockingStorage(InMemoryStorage):
+    def __init__(self) -> None:
+        super().__init__()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def store(self, recording: Recording) -> None:
+        self.entered.set()
+        self.release.wait()
+        super().store(recording)
+
+
+def test_close_flushes_all_recordings(make_recording: Callable[..., Recording]) -> None:
+    backend = InMemoryStorage()
+    storage = QueuedStorage(backend)
+    for index in range(100):
+        storage.store(make_recording(f"/{index}"))
+    storage.close()
+
+    assert len(backend.recordings) == 100
+    assert storage.pending == 0
+    assert storage.dropped == 0
+
+
+def test_drop_newest_discards_incoming_recordings(
+    make_recording: Callable[..., Recording],
+) -> None:
+    backend = BlockingStorage()
+    storage = QueuedStorage(backend, maxsize=2, policy=BackpressurePolicy.DROP_NEWEST)
+    storage.store(make_recording("/0"))
+    backend.entered.wait()
+    for index in range(1, 10):
+        storage.store(make_recording(f"/{index}"))
+    backend.release.set()
+    storage.close()
+
+    # one recording is held by the writer, two wait in the queue
+    assert storage.dropped == 7
+    assert [rec.path for rec in backend.recordings] == ["/0", "/1", "/2"]
+
+
+def test_drop_oldest_keeps_latest_recordings(
+    make_recording: Callable[..., Recording],
+) -> None:
+    backend = BlockingStorage()
+    storage = QueuedStorage(backend, maxsize=2, policy=BackpressurePolicy.DROP_OLDEST)
+    storage.store(make_recording("/0"))
+    backend.entered.wait()
+    for index in range(1, 10):
+        storage.store(make_recording(f"/{index}"))
+    backend.release.set()
+    storage.close()
+
+    assert storage.dropped == 7
+    assert [rec.path for rec in backend.recordings] == ["/0", "/8", "/9"]
+
+
+def test_pending_counts_recordings_not_written_yet(
+    make_recording: Callable[..., Recording],
+) -> None:
+    backend = BlockingStorage()
+    storage = QueuedStorage(backend)
+    storage.store(make_recording("/0"))
+    backend.entered.wait()
+    storage.store(make_recording("/1"))
+
+    assert storage.pending == 2
+    backend.release.set()
+    storage.flush()
+    assert storage.pending == 0
+    storage.close()
+
+
+def test_stores_racing_close_are_written_or_rejected(
+    make_recording: Callable[..., Recording],
+) -> None:
+    backend = InMemoryStorage()
+    storage = QueuedStorage(backend)
+    accepted: list[int] = []
+
+    def store() -> None:
+        for index in range(10_000):
+            try:
+                storage.store(make_recording(f"/{index}"))
+            except RuntimeError:
+                return
+            accepted.append(index)
+
+    threads = [threading.Thread(target=store) for _ in range(4)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads often to provoke races
+    try:
+        for thread in threads:
+            thread.start()
+        while len(accepted) < 100:
+            time.sleep(0)
+        storage.close()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert len(backend.recordings) == len(accepted)
+    with pytest.raises(RuntimeError):
+        storage.store(make_recording("/late"))
+
+
+def test_queued_recordings_are_written_at_exit(tmp_path: Path) -> None:
+    filepath = tmp_path / "requests.jsonl"
+    script = f"""
+from requests_stats.core.recording import Recording
+from requests_stats.storage.jsonl_storage import JSONLStorage
+from requests_stats.storage.queued_storage import QueuedStorage
+
+storage = QueuedStorage(JSONLStorage({str(filepath)!r}))
+for index in range(1000):
+    storage.store(Recording("GET", "https", "example.com", f"/{{index}}", "", "", 200, 0.1))
+"""
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=60)
+
+    assert len(JSONLStorage(str(filepath)).load()) == 1000
@@ -0,0 +1,128 @@
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from requests_stats.core.recording import Recording
+from requests_stats.storage.sharded_storage import ShardedSQLiteStorage, merge_shards
+from requests_stats.storage.sqlite_storage import SQLiteStorage
+
+
+def record_as_worker(
+    monkeypatch: pytest.MonkeyPatch,
+    directory: Path,
+    worker: str,
+    make_recording: Callable[..., Recording],
+    *paths: str,
+) -> None:
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", worker)
+    storage = ShardedSQLiteStorage(directory=str(directory))
+    for path in paths:
+        storage.store(make_recording(path))
+    storage.close()
+
+
+def test_one_shard_per_worker_read_as_one(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    make_recording: Callable[..., Recording],
+) -> None:
+    shards = tmp_path / "shards"
+    record_as_worker(monkeypatch, shards, "gw0", make_recording, "/a", "/b")
+    record_as_worker(monkeypatch, shards, "gw1", make_recording, "/c")
+
+    reader = ShardedSQLiteStorage(directory=str(shards))
+
+    assert [shard.name for shard in reader.shards()] == ["gw0.db", "gw1.db"]
+    assert sorted(rec.path for rec in reader.iter_load()) == ["/a", "/b", "/c"]
+    assert sum(a.request_count for a in reader.aggregate()) == 3
+    with pytest.raises(ValueError):
+        list(reader.iter_since(1))
+
+
+def test_merge_shards_into_single_database(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    make_recording: Callable[..., Recording],
+) -> None:
+    shards = tmp_path / "shards"
+    record_as_worker(monkeypatch, shards, "gw0", make_recording, "/a", "/b")
+    record_as_worker(monkeypatch, shards, "gw1", make_recording, "/c")
+
+    target = tmp_path / "merged.db"
+    copied = merge_shards(ShardedSQLiteStorage(str(shards)).shards(), target)
+
+    assert copied == 3
+    assert [rec.path for rec in SQLiteStorage(str(target)).load()] == ["/a", "/b", "/c"]
+
+
+def test_merge_shards_rebases_compacted_positions(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    make_recording: Callable[..., Recording],
+) -> None:
+    shards = tmp_path / "shards"
+    record_as_worker(monkeypatch, shards, "gw0", make_recording, "/a", "/b")
+    record_as_worker(
+        monkeypatch, shards, "gw1", make_recording, *[f"/{i}" for i in range(20)], "/c"
+    )
+    for shard in ShardedSQLiteStorage(str(shards)).shards():
+        storage = SQLiteStorage(str(shard))
+        storage.compact(before=time.time() + 60)
+        storage.close()
+
+    target = tmp_path / "merged.db"
+    merge_shards(ShardedSQLiteStorage(str(shards)).shards(), target)
+    storage = SQLiteStorage(str(target))
+    positions = [position for position, _ in storage.iter_since()]
+    compacted = {group.path: group.last_position for group in storage.compacted()}
+    checkpoint = max(group.last_position for group in storage.aggregate())
+    storage.store(make_recording("/d"))
+
+    # gw0 keeps /b at 1, gw1 keeps /c at 2, their compacted groups end there
+    assert positions == [1, 2]
+    assert compacted["/a"] == 1
+    assert compacted["/19"] == 2
+    assert checkpoint == 2
+    assert [rec.path for _, rec in storage.iter_since(checkpoint)] == ["/d"]
+    storage.close()
+
+
+def test_first_stores_from_threads_share_one_writer(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    make_recording: Callable[..., Recording],
+) -> None:
+    monkeypatch.setenv("PYTEST_XDIST_WORKER", "gw0")
+    storage = ShardedSQLiteStorage(directory=str(tmp_path), batch_size=100)
+    barrier = threading.Barrier(8)
+
+    def store(thread: int) -> None:
+        barrier.wait()
+        storage.store(make_recording(f"/{thread}"))
+
+    threads = [threading.Thread(target=store, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    storage.close()
+
+    assert len(ShardedSQLiteStorage(directory=str(tmp_path)).load()) == 8
+
+
+def test_check_names_shards_of_a_newer_version(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    make_recording: Callable[..., Recording],
+) -> None:
+    record_as_worker(monkeypatch, tmp_path, "gw0", make_recording, "/a")
+    connection = sqlite3.connect(tmp_path / "gw1.db")
+    connection.execute("PRAGMA user_version = 1000")
+    connection.close()
+
+    with pytest.raises(ValueError, match="gw1.db: .* upgrade requests-stats"):
+        ShardedSQLiteStorage(directory=str(tmp_path)).check()
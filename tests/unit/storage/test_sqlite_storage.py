@@ -0,0 +1,340 @@
+import json
+import sqlite3
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from requests_stats.core.recording import Recording
+from requests_stats.core.sketch import LatencySketch
+from requests_stats.storage.sqlite_schema import (
+    MIGRATIONS,
+    SCHEMA_VERSION,
+    STORED_COLUMNS,
+)
+from requests_stats.storage.sqlite_storage import SQLiteStorage
+
+
+def count_rows(db_path: Path) -> int:
+    reader = SQLiteStorage(filepath=str(db_path))
+    count = len(reader.load())
+    reader.close()
+    return count
+
+
+def test_batched_store_flushes_at_batch_size(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    db_path = tmp_path / "requests.db"
+    storage = SQLiteStorage(filepath=str(db_path), batch_size=3)
+    storage.store(make_recording("/a"))
+    storage.store(make_recording("/b"))
+    assert count_rows(db_path) == 0
+
+    storage.store(make_recording("/c"))
+    assert count_rows(db_path) == 3
+
+
+def test_close_flushes_pending_recordings(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    db_path = tmp_path / "requests.db"
+    storage = SQLiteStorage(filepath=str(db_path), batch_size=100)
+    storage.store(make_recording("/a"))
+    storage.close()
+
+    assert count_rows(db_path) == 1
+
+
+def test_load_includes_pending_recordings(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    storage = SQLiteStorage(filepath=str(tmp_path / "requests.db"), batch_size=100)
+    storage.store(make_recording("/a"))
+
+    assert [rec.path for rec in storage.load()] == ["/a"]
+
+
+def test_iter_load_streams_in_batches(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    storage = SQLiteStorage(filepath=str(tmp_path / "requests.db"), batch_size=100)
+    for index in range(5):
+        storage.store(make_recording(f"/{index}"))
+
+    paths = [rec.path for rec in storage.iter_load(batch_size=2)]
+
+    assert paths == ["/0", "/1", "/2", "/3", "/4"]
+
+
+def test_iter_since_skips_recordings_before_checkpoint(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    storage = SQLiteStorage(filepath=str(tmp_path / "requests.db"))
+    for index in range(3):
+        storage.store(make_recording(f"/{index}"))
+
+    positions = [(pos, rec.path) for pos, rec in storage.iter_since(1)]
+
+    assert positions == [(2, "/1"), (3, "/2")]
+
+
+def test_aggregate_groups_in_order_of_first_recording(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    storage = SQLiteStorage(filepath=str(tmp_path / "requests.db"))
+    for path, duration in (("/b", 0.1), ("/a", 0.2), ("/b", 0.3), ("/a", 0.5)):
+        storage.store(make_recording(path)._replace(duration=duration))
+
+    aggregates = list(storage.aggregate())
+    since_second = list(storage.aggregate(checkpoint=2))
+
+    assert [(a.path, a.request_count) for a in aggregates] == [("/b", 2), ("/a", 2)]
+    assert aggregates[0].duration_sum == 0.1 + 0.3
+    assert (aggregates[1].duration_min, aggregates[1].duration_max) == (0.2, 0.5)
+    assert (aggregates[1].first_position, aggregates[1].last_position) == (2, 4)
+    assert [(a.path, a.request_count) for a in since_second] == [("/b", 1), ("/a", 1)]
+
+
+def test_aggregate_splits_duration_buckets(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    storage = SQLiteStorage(filepath=str(tmp_path / "requests.db"))
+    for duration in (0.0, 0.1, 0.1001, 0.5):
+        storage.store(make_recording("/a")._replace(duration=duration))
+
+    counts = [a.request_count for a in storage.aggregate(duration_log_base=1.02)]
+
+    assert sorted(counts) == [1, 1, 2]
+
+
+def test_adds_weight_column_to_existing_databases(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    db_path = tmp_path / "requests.db"
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE requests(method, scheme, netloc, path, params, query, response_code, duration)"
+    )
+    connection.execute(
+        "INSERT INTO requests VALUES ('GET', 'https', 'example.com', '/a', '', '', 200, 0.1)"
+    )
+    connection.commit()
+    connection.close()
+
+    storage = SQLiteStorage(filepath=str(db_path))
+    storage.store(make_recording("/b")._replace(weight=4.0))
+    [aggregate_a, aggregate_b] = storage.aggregate()
+    storage.close()
+
+    assert storage_weights(db_path) == [1.0, 4.0]
+    assert (aggregate_a.weight_sum, aggregate_b.weight_sum) == (1.0, 4.0)
+    assert aggregate_b.duration_sum == 0.4
+
+
+def storage_weights(db_path: Path) -> list[float]:
+    reader = SQLiteStorage(filepath=str(db_path))
+    weights = [recording.weight for recording in reader.load()]
+    reader.close()
+    return weights
+
+
+def test_round_trips_phase_timings(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    storage = SQLiteStorage(filepath=str(tmp_path / "requests.db"))
+    timed = make_recording("/timed")._replace(
+        pool_wait=0.001, connection_reused=False, connect=0.01, response_bytes=512
+    )
+    storage.store(timed)
+
+    assert storage.load() == [timed]
+    storage.close()
+
+
+def test_migrates_unversioned_databases_keeping_positions(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    db_path = tmp_path / "requests.db"
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE requests(method, scheme, netloc, path, params, query,"
+        " response_code, duration, weight DEFAULT 1.0)"
+    )
+    connection.executemany(
+        "INSERT INTO requests(rowid, method, scheme, netloc, path, params, query,"
+        " response_code, duration) VALUES (?, 'GET', 'https', 'example.com', ?, '', '', 200, 0.1)",
+        [(1, "/a"), (2, "/b"), (5, "/a")],
+    )
+    connection.commit()
+    connection.close()
+
+    storage = SQLiteStorage(filepath=str(db_path))
+    storage.store(make_recording("/c"))
+    positions = [(position, rec.path) for position, rec in storage.iter_since()]
+    storage.close()
+
+    assert positions == [(1, "/a"), (2, "/b"), (5, "/a"), (6, "/c")]
+    connection = sqlite3.connect(db_path)
+    assert connection.execute("PRAGMA user_version").fetchone() == (SCHEMA_VERSION,)
+    assert connection.execute("SELECT value FROM paths ORDER BY id").fetchall() == [
+        ("/a",),
+        ("/b",),
+        ("/c",),
+    ]
+    connection.close()
+
+
+def test_migrations_create_a_column_per_field(tmp_path: Path) -> None:
+    db_path = tmp_path / "requests.db"
+    SQLiteStorage(filepath=str(db_path)).close()
+
+    connection = sqlite3.connect(db_path)
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(requests)")]
+    connection.close()
+
+    # a field added to Recording needs a migration adding its column
+    assert columns == ["id", *STORED_COLUMNS]
+
+
+def test_migrates_compacted_groups_of_version_2(tmp_path: Path) -> None:
+    db_path = tmp_path / "requests.db"
+    connection = sqlite3.connect(db_path)
+    with connection:
+        for migration in MIGRATIONS[:2]:
+            migration(connection)
+        connection.execute("PRAGMA user_version = 2")
+        connection.execute("INSERT INTO methods(id, value) VALUES (1, 'GET')")
+        connection.execute("INSERT INTO schemes(id, value) VALUES (1, 'https')")
+        connection.execute("INSERT INTO netlocs(id, value) VALUES (1, 'example.com')")
+        connection.execute("INSERT INTO paths(id, value) VALUES (1, '/a'), (2, '/b')")
+        connection.execute(
+            "INSERT INTO requests(id, method_id, scheme_id, netloc_id, path_id,"
+            " response_code, duration) VALUES (3, 1, 1, 1, 2, 200, 0.1)"
+        )
+        sketch = LatencySketch()
+        sketch.add(0.2)
+        sketch.add(0.4)
+        connection.execute(
+            "INSERT INTO compacted VALUES (1, 1, 200, 2, 0.6, 0.2, 0.4, 1, 2, 2.0, ?)",
+            (json.dumps(sketch.to_dict()),),
+        )
+    connection.close()
+
+    storage = SQLiteStorage(filepath=str(db_path))
+    compacted = list(storage.compacted())
+    aggregates = [
+        (a.netloc, a.path, a.request_count, a.first_position, a.last_position)
+        for a in storage.aggregate(by_netloc=True)
+    ]
+    storage.close()
+
+    assert [(group.netloc, group.path) for group in compacted] == [("", "/a")]
+    assert compacted[0].sketch is not None
+    assert compacted[0].sketch.count == 2
+    assert aggregates == [("", "/a", 2, 1, 2), ("example.com", "/b", 1, 3, 3)]
+    connection = sqlite3.connect(db_path)
+    assert connection.execute("PRAGMA user_version").fetchone() == (SCHEMA_VERSION,)
+    connection.close()
+
+
+def test_retention_compacts_old_recordings(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    storage = SQLiteStorage(
+        filepath=str(tmp_path / "requests.db"), retention=60.0, compact_interval=0.01
+    )
+    now = time.time()
+    storage.store(make_recording("/old")._replace(timestamp=now - 3600))
+    storage.store(make_recording("/old")._replace(timestamp=now - 3600))
+    storage.store(make_recording("/new")._replace(timestamp=now))
+    deadline = time.monotonic() + 5
+    while len(storage.load()) > 1 and time.monotonic() < deadline:
+        time.sleep(0.01)  # compacted in the background
+
+    assert storage.last_compaction_error is None
+    assert [(position, rec.path) for position, rec in storage.iter_since()] == [
+        (3, "/new")
+    ]
+    assert [
+        (aggregate.path, aggregate.request_count) for aggregate in storage.aggregate()
+    ] == [("/old", 2), ("/new", 1)]
+    storage.close()
+
+
+def test_aggregate_with_path_map_leaves_no_transaction_open(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    db_path = tmp_path / "requests.db"
+    writer = SQLiteStorage(filepath=str(db_path))
+    reader = SQLiteStorage(filepath=str(db_path))
+    writer.store(make_recording("/pets/1"))
+
+    aggregates = list(reader.aggregate(path_map={"/pets/1": "/pets/{id}"}))
+    writer.store(make_recording("/pets/2"))
+
+    assert [(a.path, a.request_count) for a in aggregates] == [("/pets/{id}", 1)]
+    assert not reader.connection.in_transaction
+    assert len(reader.load()) == 2
+    assert reader.compact(before=time.time()) == 1
+    writer.close()
+    reader.close()
+
+
+def test_read_only_reads_old_schema_versions_from_a_copy(tmp_path: Path) -> None:
+    db_path = tmp_path / "requests.db"
+    connection = sqlite3.connect(db_path)
+    connection.execute(
+        "CREATE TABLE requests(method, scheme, netloc, path, params, query,"
+        " response_code, duration)"
+    )
+    connection.execute(
+        "INSERT INTO requests VALUES ('GET', 'https', 'example.com', '/a', '', '',"
+        " 200, 0.1)"
+    )
+    connection.commit()
+    connection.close()
+    content = db_path.read_bytes()
+
+    reader = SQLiteStorage(filepath=str(db_path), read_only=True)
+    paths = [rec.path for rec in reader.load()]
+    aggregates = [(a.path, a.request_count) for a in reader.aggregate()]
+    reader.close()
+
+    assert paths == ["/a"]
+    assert aggregates == [("/a", 1)]
+    assert db_path.read_bytes() == content
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["requests.db"]
+
+
+def test_read_only_refuses_newer_schema_versions(tmp_path: Path) -> None:
+    db_path = tmp_path / "requests.db"
+    connection = sqlite3.connect(db_path)
+    connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    connection.close()
+
+    with pytest.raises(ValueError, match="upgrade requests-stats"):
+        SQLiteStorage(filepath=str(db_path), read_only=True)
+
+
+def test_read_only_leaves_the_file_unchanged(
+    tmp_path: Path, make_recording: Callable[..., Recording]
+) -> None:
+    db_path = tmp_path / "requests.db"
+    writer = SQLiteStorage(filepath=str(db_path), journal_mode="DELETE")
+    writer.store(make_recording("/pets/1"))
+    writer.close()
+    content = db_path.read_bytes()
+
+    reader = SQLiteStorage(filepath=str(db_path), read_only=True)
+    aggregates = list(reader.aggregate(path_map={"/pets/1": "/pets/{id}"}))
+    indexes = reader.connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index'"
+    ).fetchall()
+    reader.close()
+
+    assert [(a.path, a.request_count) for a in aggregates] == [("/pets/{id}", 1)]
+    assert ("requests_by_endpoint",) not in indexes
+    assert db_path.read_bytes() == content
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["requests.db"]